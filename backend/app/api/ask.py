@@ -1,14 +1,142 @@
+import asyncio
+import json
+import time
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from backend.app.services.embeddings.dependencies import embedder, qdrant_store
-from backend.app.services.llm_service import get_answer_from_context
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from backend.app.services.caching.dependencies import get_answer_cache, get_query_vector_cache
+from backend.app.services.embeddings.config import QUERY_EMBED_CONCURRENCY, QDRANT_SEARCH_CONCURRENCY
+from backend.app.services.embeddings.dependencies import get_async_qdrant_store, get_embedding_batcher
+from backend.app.services.retrieval.config import (
+    ASK_BATCH_LLM_CONCURRENCY,
+    ASK_BATCH_MAX_QUESTIONS,
+    HYBRID_CANDIDATES,
+    HYBRID_SEARCH,
+)
+from backend.app.services.retrieval.context import pack_context
+from backend.app.services.retrieval.dependencies import get_keyword_index
+from backend.app.services.retrieval.fusion import reciprocal_rank_fusion
+from backend.app.services import llm_service
+from backend.app.services.llm_service import (
+    BUSY_ANSWER,
+    ERROR_ANSWER,
+    FALLBACK_ANSWERS,
+    LLMBusyError,
+    get_answer_from_context,
+    stream_answer_from_context,
+)
 
 router = APIRouter()
 
+# Bound the work each API worker admits so a burst queues here instead of piling
+# onto the embedding thread or opening unbounded connections to Qdrant
+_embed_slots = asyncio.Semaphore(QUERY_EMBED_CONCURRENCY)
+_search_slots = asyncio.Semaphore(QDRANT_SEARCH_CONCURRENCY)
+
 class AskRequest(BaseModel):
     question: str
     top_k: int = 3
     subject_code: str | None = None  # optional filter by subject_code
+    # Optional search tuning: HNSW beam width, and candidates per result rescored with full vectors
+    hnsw_ef: int | None = Field(default=None, ge=1, le=4096)
+    oversampling: float | None = Field(default=None, ge=1.0, le=16.0)
+    hybrid: bool | None = None  # fuse BM25 keyword matches with vector results (default: HYBRID_SEARCH)
+
+
+class AskBatchItem(BaseModel):
+    question: str
+    top_k: int = 3
+    subject_code: str | None = None
+    hybrid: bool | None = None
+
+
+class AskBatchRequest(BaseModel):
+    questions: list[AskBatchItem] = Field(min_length=1, max_length=ASK_BATCH_MAX_QUESTIONS)
+    # Search tuning shared by every question in the batch
+    hnsw_ef: int | None = Field(default=None, ge=1, le=4096)
+    oversampling: float | None = Field(default=None, ge=1.0, le=16.0)
+
+
+async def _query_vectors(questions: list[str]) -> list[list[float]]:
+    """Cached vectors for `questions`; the misses are embedded together in one batcher call."""
+    query_vector_cache = get_query_vector_cache()
+    vectors = {q: query_vector_cache.get(q) for q in questions}
+    missing = [q for q, v in vectors.items() if v is None]
+    if missing:
+        async with _embed_slots:
+            embedded = await get_embedding_batcher().aembed_texts(missing)
+        for question, vector in zip(missing, embedded):
+            vectors[question] = vector
+            query_vector_cache.set(question, vector)
+    return [vectors[q] for q in questions]
+
+
+def _fuse(vector_results: list[dict], keyword_results: list[dict], top_k: int) -> list[dict]:
+    if not keyword_results:
+        return vector_results[:top_k]
+    return reciprocal_rank_fusion([vector_results, keyword_results], top_k)
+
+
+def _keyword_search(question: str, subject_code: str | None, limit: int) -> list[dict]:
+    try:
+        return get_keyword_index().search(question, subject_code=subject_code, top_k=limit)
+    except Exception as e:
+        # Vector results alone still answer the question
+        print(f"[WARN] Keyword search failed, using vector results only: {e}")
+        return []
+
+
+async def _retrieve(question: str, request: AskRequest) -> tuple[list[float], list[dict]]:
+    """
+    Embed the question and fetch the closest chunks from Qdrant; with hybrid search,
+    BM25 keyword matches from the same subject are fused in by reciprocal rank.
+    """
+    # Step 1: Embed the question (batched with other concurrent callers)
+    query_vector = (await _query_vectors([question]))[0]
+
+    hybrid = HYBRID_SEARCH if request.hybrid is None else request.hybrid
+    limit = max(request.top_k, HYBRID_CANDIDATES) if hybrid else request.top_k
+
+    # Step 2: Query Qdrant
+    async def vector_search() -> list[dict]:
+        async with _search_slots:
+            return await get_async_qdrant_store().query(
+                query_vector,
+                top_k=limit,
+                subject_code=request.subject_code,  # filter by subject_code if provided
+                hnsw_ef=request.hnsw_ef,
+                oversampling=request.oversampling,
+            )
+
+    if not hybrid:
+        return query_vector, await vector_search()
+
+    # The keyword search runs on a thread while the vector search is in flight; it
+    # can wait on the index lock while ingestion writes, so keep it off the event loop
+    vector_results, keyword_results = await asyncio.gather(
+        vector_search(),
+        asyncio.to_thread(_keyword_search, question, request.subject_code, limit),
+    )
+    return query_vector, _fuse(vector_results, keyword_results, request.top_k)
+
+
+async def _answer(question: str, subject_code: str | None, query_vector: list[float], results: list[dict]) -> str:
+    # Pack the chunks into the prompt's token budget
+    context = pack_context(results)
+
+    # Call LLM, unless a similar question was answered from the same chunks
+    answer_cache = get_answer_cache()
+    answer = answer_cache.get(subject_code, results, query_vector)
+    if answer is None:
+        answer = await get_answer_from_context(context, question)
+        if answer not in FALLBACK_ANSWERS:
+            answer_cache.set(subject_code, results, query_vector, answer)
+    return answer
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 @router.post("/ask")
 async def ask_question(request: AskRequest):
@@ -17,15 +145,7 @@ async def ask_question(request: AskRequest):
         if not question:
             raise HTTPException(status_code=400, detail="Question cannot be empty")
 
-        # Step 1: Embed the question
-        query_vector = embedder.embed_texts([question])[0]
-
-        # Step 2: Query Qdrant
-        results = qdrant_store.query(
-            query_vector,
-            top_k=request.top_k,
-            subject_code=request.subject_code  # filter by subject_code if provided
-        )
+        query_vector, results = await _retrieve(question, request)
 
         if not results:
             return {
@@ -34,14 +154,8 @@ async def ask_question(request: AskRequest):
                 "chunks": []
             }
 
-        # Step 3: Extract chunks
-        chunks = [
-            {"text": r.get("text", ""), "score": r.get("score")}
-            for r in results
-        ]
-
-        # Step 4: Call LLM
-        answer = await get_answer_from_context(chunks, question)
+        # Step 3: Pack the chunks and call the LLM
+        answer = await _answer(question, request.subject_code, query_vector, results)
 
         return {
             "status": "success",
@@ -51,3 +165,175 @@ async def ask_question(request: AskRequest):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@router.post("/ask/batch")
+async def ask_batch(request: AskBatchRequest):
+    """
+    Answer a set of questions in one request (quiz generation, FAQ pre-warming).
+
+    All questions are embedded in one batcher call and searched with one batched
+    vector-store request, each with its own subject filter; answers are then
+    generated at most ASK_BATCH_LLM_CONCURRENCY at a time. Results come back in
+    request order, each with its own status, so one failed question doesn't fail
+    the batch.
+    """
+    items = request.questions
+    questions = [item.question.strip() for item in items]
+    valid = [i for i, q in enumerate(questions) if q]
+    results = [
+        {"question": question, "status": "error", "detail": "Question cannot be empty"}
+        for question in questions
+    ]
+    if not valid:
+        return {"status": "success", "results": results}
+
+    hybrid = [HYBRID_SEARCH if items[i].hybrid is None else items[i].hybrid for i in valid]
+    limits = [
+        max(items[i].top_k, HYBRID_CANDIDATES) if use_keywords else items[i].top_k
+        for i, use_keywords in zip(valid, hybrid)
+    ]
+
+    try:
+        query_vectors = await _query_vectors([questions[i] for i in valid])
+
+        async def vector_search() -> list[list[dict]]:
+            async with _search_slots:
+                return await get_async_qdrant_store().query_batch(
+                    query_vectors,
+                    [items[i].subject_code for i in valid],
+                    limits,
+                    hnsw_ef=request.hnsw_ef,
+                    oversampling=request.oversampling,
+                )
+
+        def keyword_searches() -> list[list[dict]]:
+            return [
+                _keyword_search(questions[i], items[i].subject_code, limit) if use_keywords else []
+                for i, use_keywords, limit in zip(valid, hybrid, limits)
+            ]
+
+        # Keyword searches run on a thread while the batched vector search is in flight
+        vector_results, keyword_results = await asyncio.gather(vector_search(), asyncio.to_thread(keyword_searches))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    llm_slots = asyncio.Semaphore(ASK_BATCH_LLM_CONCURRENCY)
+
+    async def answer_one(i: int, query_vector: list[float], retrieved: list[dict]) -> dict:
+        question, item = questions[i], items[i]
+        if not retrieved:
+            return {"question": question, "status": "success", "chunks": []}
+        try:
+            async with llm_slots:
+                answer = await _answer(question, item.subject_code, query_vector, retrieved)
+        except Exception as e:
+            print(f"[ERROR] /ask/batch question {i} failed: {e}")
+            return {"question": question, "status": "error", "detail": f"Unexpected error: {str(e)}"}
+        if answer in FALLBACK_ANSWERS:
+            return {"question": question, "status": "error", "detail": answer}
+        return {"question": question, "status": "success", "answer": answer}
+
+    answers = await asyncio.gather(*(
+        answer_one(i, query_vector, _fuse(vectors, keywords, items[i].top_k))
+        for i, query_vector, vectors, keywords in zip(valid, query_vectors, vector_results, keyword_results)
+    ))
+    for i, answer in zip(valid, answers):
+        results[i] = answer
+
+    return {"status": "success", "results": results}
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: AskRequest):
+    """
+    Same as /ask, streamed as server-sent events:
+      `chunks` - retrieved chunk metadata, sent as soon as retrieval finishes
+      `token`  - answer text as the model produces it
+      `done`   - timings, including time to first byte and to first token
+      `error`  - generation failed mid-stream
+    """
+    started = time.perf_counter()
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    try:
+        query_vector, results = await _retrieve(question, request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    async def events():
+        timings = {"retrieval_ms": elapsed_ms()}
+        yield _sse("chunks", {
+            "question": question,
+            "chunks": [
+                {
+                    "id": r["id"],
+                    "score": r.get("score"),
+                    "subject_code": r["payload"].get("subject_code"),
+                    "chunk_index": r["payload"].get("chunk_index"),
+                }
+                for r in results
+            ],
+        })
+        timings["first_byte_ms"] = elapsed_ms()
+        if not results:
+            yield _sse("done", timings)
+            return
+
+        context = pack_context(results)
+
+        answer_cache = get_answer_cache()
+        answer = answer_cache.get(request.subject_code, results, query_vector)
+        if answer is not None:
+            timings["first_token_ms"] = elapsed_ms()
+            timings["cached"] = True
+            yield _sse("token", {"text": answer})
+        else:
+            parts = []
+            try:
+                async for piece in stream_answer_from_context(context, question):
+                    if not parts:
+                        timings["first_token_ms"] = elapsed_ms()
+                    parts.append(piece)
+                    yield _sse("token", {"text": piece})
+            except (LLMBusyError, TimeoutError) as e:
+                print(f"[WARN] Answer stream shed: {e}")
+                yield _sse("error", {"detail": BUSY_ANSWER})
+                return
+            except Exception as e:
+                print(f"Error streaming answer: {e}")
+                yield _sse("error", {"detail": ERROR_ANSWER})
+                return
+            if parts:
+                answer_cache.set(request.subject_code, results, query_vector, "".join(parts).strip())
+
+        timings["total_ms"] = elapsed_ms()
+        print(f"[INFO] /ask/stream first byte {timings['first_byte_ms']}ms, "
+              f"first token {timings.get('first_token_ms')}ms, total {timings['total_ms']}ms")
+        yield _sse("done", timings)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/ask/llm-stats")
+def llm_stats():
+    """LLM call counters (coalesced, shed, timeouts), queue depth and circuit state."""
+    return llm_service.stats()
+
+
+@router.get("/ask/cache-stats")
+def cache_stats():
+    """Hit/miss counters for the query-vector and answer caches."""
+    return {
+        "query_vectors": get_query_vector_cache().stats(),
+        "answers": get_answer_cache().stats(),
+    }
@@ -1,20 +1,59 @@
 from fastapi import APIRouter, HTTPException
-from ..services.drive_ingestor import sync_drive_folder
+from ..services.drive_ingestor import sync_jobs
+from ..services.ingestion.dependencies import get_manifest_store
+from ..services.ingestion.manifest import SyncInProgressError
 
 router = APIRouter()
 
 
-@router.post("/sync-drive")
-async def sync_drive():
+@router.post("/sync-drive", status_code=202)
+async def sync_drive(batch_size: int = 5):
     """
-    Trigger a Google Drive sync manually.
+    Start a Google Drive sync in the background and return its job id.
     Downloads new PDFs, extracts text, chunks, embeds, and stores in Qdrant.
+    Poll GET /api/sync-drive/{job_id} for progress.
     """
     try:
-        sync_drive_folder()
+        job = sync_jobs.start(batch_size)
         return {
-            "status": "success",
-            "message": "Drive sync completed."
+            "status": "accepted",
+            "message": "Drive sync started.",
+            "job_id": job.id
         }
+    except SyncInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Drive sync failed: {str(e)}")
+
+
+@router.get("/sync-drive/{job_id}")
+def sync_drive_status(job_id: str):
+    """Files done/total, chunks stored, throughput and ETA for a sync job."""
+    job = sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job.as_dict()
+
+
+@router.delete("/sync-drive/{job_id}")
+def cancel_sync_drive(job_id: str):
+    """Request cancellation; files not yet stored are picked up by the next sync."""
+    job = sync_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job.as_dict()
+
+
+@router.get("/ingest/status")
+def ingest_status():
+    """Files per ingest status and total chunks stored, from the manifest."""
+    return get_manifest_store().summary()
+
+
+@router.get("/ingest/files")
+def ingest_files(status: str | None = None, slowest: bool = False, limit: int = 50):
+    """
+    Per-file ingest records (status, chunk count, stage timings, last error).
+    Use `status=failed` to find broken files or `slowest=true` to rank by ingest time.
+    """
+    return {"files": get_manifest_store().list_files(status=status, slowest=slowest, limit=limit)}
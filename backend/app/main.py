@@ -1,8 +1,29 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from backend.app.api import  ask, drive_router
+from backend.app.services.embeddings import dependencies as embedding_deps
+from backend.app.services.startup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The model and clients are built lazily; warm them up so the first
+    # question does not pay for it (see STARTUP_WARMUP)
+    if warm_up.mode == "blocking":
+        if not await asyncio.to_thread(warm_up.run_once):
+            warm_up.start()  # keep retrying what failed while serving
+    elif warm_up.mode == "background":
+        warm_up.start()
+    yield
+    warm_up.stop()
+    await embedding_deps.close()
 
-app = FastAPI(title="Notes Assistant API")
+
+app = FastAPI(title="Notes Assistant API", lifespan=lifespan)
 
 # CORS Middleware (for later frontend integration)
 app.add_middleware(
@@ -18,6 +39,14 @@ app.add_middleware(
 def health_check():
     return {"status": "ok"}
 
+# Readiness: 503 until the model and clients have been warmed up
+@app.get("/ready")
+def readiness_check():
+    status = warm_up.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
 # Include API routes
 app.include_router(ask.router)
-app.include_router(drive_router.router, prefix="/api")
\ No newline at end of file
+app.include_router(drive_router.router, prefix="/api")
@@ -0,0 +1,195 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.app.services.caching import config
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive cache key for a question."""
+    return " ".join(question.lower().split())
+
+
+class TTLLRUCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class QueryVectorCache:
+    """Level 1: normalized question text → query vector."""
+
+    def __init__(self, maxsize: int = config.QUERY_CACHE_SIZE, ttl: float = config.QUERY_CACHE_TTL_SECONDS):
+        self._cache = TTLLRUCache(maxsize, ttl)
+
+    def get(self, question: str) -> list[float] | None:
+        return self._cache.get(normalize_question(question))
+
+    def set(self, question: str, vector: list[float]):
+        self._cache.set(normalize_question(question), vector)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class AnswerCache:
+    """
+    Level 2: answers keyed by (subject_code, retrieved chunk ids, digest of their texts).
+
+    Point ids are stable across re-ingests of a file, so the text digest is what
+    makes an answer built from since-changed chunks miss, in every API worker,
+    not only the one whose sync invalidated its own cache.
+
+    A lookup hits only when the same chunks were retrieved *and* the new question's
+    vector is within `threshold` cosine similarity of a question answered before,
+    so paraphrases reuse an answer but unrelated questions over the same chunks don't.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = config.ANSWER_CACHE_SIZE,
+        ttl: float = config.ANSWER_CACHE_TTL_SECONDS,
+        threshold: float = config.ANSWER_SIMILARITY_THRESHOLD,
+        entries_per_key: int = config.ANSWER_CACHE_ENTRIES_PER_KEY,
+    ):
+        self._cache = TTLLRUCache(maxsize, ttl)
+        self.threshold = threshold
+        self.entries_per_key = max(1, entries_per_key)
+        self.hits = 0
+        self.misses = 0
+        self.semantic_hits = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(subject_code: str | None, chunks: list[dict]) -> tuple:
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in chunks:
+            digest.update((chunk.get("text") or "").encode("utf-8"))
+            digest.update(b"\0")
+        return (subject_code, tuple(chunk["id"] for chunk in chunks), digest.digest())
+
+    @staticmethod
+    def _unit(vector: list[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def get(self, subject_code: str | None, chunks: list[dict], query_vector: list[float]) -> str | None:
+        """`chunks` are the retrieved results (id, text, ...) the answer would be built from."""
+        entries = self._cache.get(self._key(subject_code, chunks))
+        if not entries:
+            self.misses += 1
+            return None
+
+        query = self._unit(query_vector)
+        vectors = np.stack([v for v, _ in entries])
+        scores = vectors @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if scores[best] < 0.9999:
+            self.semantic_hits += 1
+        return entries[best][1]
+
+    def set(self, subject_code: str | None, chunks: list[dict], query_vector: list[float], answer: str):
+        key = self._key(subject_code, chunks)
+        # Copy on write so concurrent readers never see a half-updated list
+        entries = list(self._cache.pop(key) or [])
+        entries.append((self._unit(query_vector), answer))
+        self._cache.set(key, entries[-self.entries_per_key:])
+
+    def invalidate_subject(self, subject_code: str) -> int:
+        """
+        Drop answers built from a subject's chunks. Unfiltered (subject_code=None)
+        answers may include that subject too, so they are dropped as well.
+        """
+        removed = 0
+        for key in self._cache.keys():
+            if key[0] is None or key[0] == subject_code:
+                if self._cache.pop(key) is not None:
+                    removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        # Hits require a similar question, not just a matching key
+        lookups = self.hits + self.misses
+        stats["hits"] = self.hits
+        stats["misses"] = self.misses
+        stats["hit_rate"] = round(self.hits / lookups, 3) if lookups else 0.0
+        stats["semantic_hits"] = self.semantic_hits
+        stats["invalidations"] = self.invalidations
+        return stats
@@ -0,0 +1,11 @@
+import os
+
+# Level 1: normalized question → query vector
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 4096))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", 24 * 3600))
+
+# Level 2: (subject_code, retrieved chunk ids) → answers for similar questions
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 6 * 3600))
+ANSWER_CACHE_ENTRIES_PER_KEY = 8        # distinct questions remembered per retrieved context
+ANSWER_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_SIMILARITY_THRESHOLD", 0.95))  # cosine
@@ -0,0 +1,14 @@
+from backend.app.services.caching.ask_cache import AnswerCache, QueryVectorCache
+from backend.app.services.lazy import Lazy
+
+# Shared instances (cheap, but built on first use like the other dependencies)
+query_vector_cache = Lazy("query vector cache", QueryVectorCache)
+answer_cache = Lazy("answer cache", AnswerCache)
+
+
+def get_query_vector_cache() -> QueryVectorCache:
+    return query_vector_cache.get()
+
+
+def get_answer_cache() -> AnswerCache:
+    return answer_cache.get()
@@ -1,17 +1,12 @@
+import hashlib
+import threading
 from typing import List
 import re
-import nltk
+from backend.app.services.embeddings.tokenizer import TokenCounter
 from . import config
 from .cleaner import preprocess_pdf_text
-from .utils import merge_heading_chunks, cosine_text_similarity, SKLEARN_AVAILABLE
-
-# Ensure NLTK sentence tokenizer
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-from nltk.tokenize import sent_tokenize
+from .near_dedupe import near_duplicate_keep_mask
+from .utils import merge_heading_chunks
 
 # Try importing LangChain splitter
 try:
@@ -21,57 +16,96 @@ except Exception:
     LANGCHAIN_AVAILABLE = False
 
 
+# A new section starts at a short line beginning with a capital letter
+_SECTION_BREAK_RE = re.compile(r'\n(?=[A-Z][^\n]{0,80}\n)')
+
+# Split points for the recursive splitter, coarsest first
+SEPARATORS = ["\n\n", "\n", ".", " "]
+
+_punkt_lock = threading.Lock()
+_punkt_checked = False
+
+
+def sent_tokenize(text: str) -> List[str]:
+    """
+    NLTK sentence split. NLTK is only needed by the fallback chunker, so it is
+    imported, and its punkt model downloaded if missing, on first use.
+    """
+    global _punkt_checked
+    import nltk
+    from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+    with _punkt_lock:
+        if not _punkt_checked:
+            try:
+                nltk.data.find('tokenizers/punkt')
+            except LookupError:
+                nltk.download('punkt')
+            _punkt_checked = True
+    return nltk_sent_tokenize(text)
+
+
+def _word_count(text: str) -> int:
+    return len(text.split())
+
+
 def dedupe_exact_normalized(chunks: List[str]) -> List[str]:
     """Remove exact duplicates (case and whitespace insensitive)."""
     seen = set()
     unique = []
     for chunk in chunks:
-        norm = re.sub(r'\s+', ' ', chunk).strip().lower()
-        if norm not in seen:
-            seen.add(norm)
+        # Keep a fixed-size digest per chunk rather than its normalized copy
+        digest = hashlib.blake2b(" ".join(chunk.lower().split()).encode(), digest_size=16).digest()
+        if digest not in seen:
+            seen.add(digest)
             unique.append(chunk)
     return unique
 
 
 def semantic_dedupe(
     chunks: List[str],
-    threshold: float = config.SEMANTIC_SIMILARITY_THRESHOLD
+    threshold: float = config.SEMANTIC_SIMILARITY_THRESHOLD,
+    existing: List[str] = None,
 ) -> List[str]:
-    """Optionally remove semantically similar chunks using cosine similarity."""
-    if not SKLEARN_AVAILABLE:
-        return chunks
-
-    unique_chunks = []
-    for chunk in chunks:
-        if all(cosine_text_similarity(chunk, u) < threshold for u in unique_chunks):
-            unique_chunks.append(chunk)
-    return unique_chunks
+    """
+    Remove near-duplicate chunks (and chunks near-duplicating `existing` ones).
+    Each chunk is compared with the earlier chunks and `existing`, so cost grows with
+    len(chunks) * (len(chunks) + len(existing)); existing chunks aren't compared
+    with each other.
+    """
+    keep = near_duplicate_keep_mask(chunks, existing=existing, threshold=threshold)
+    return [chunk for chunk, kept in zip(chunks, keep) if kept]
 
 
 def sentence_chunker(
     text: str,
     chunk_size: int,
-    chunk_overlap: int
+    chunk_overlap: int,
+    counter: TokenCounter = None
 ) -> List[str]:
     """
     Sentence-aware chunker with token overlap (used if LangChain unavailable).
+    Sizes are in embedding-model tokens as counted by `counter`.
     """
-    sections = re.split(r'\n(?=[A-Z][^\n]{0,80}\n)', text)
-    merged_sections, buffer = [], ""
+    counter = counter or TokenCounter()
+    sections = _SECTION_BREAK_RE.split(text)
+    merged_sections, buffer = [], []
 
     # Merge short sections with previous ones
     for sec in sections:
-        token_count = len(sec.split())
-        if token_count < 150:
-            buffer += sec + "\n"
+        if _word_count(sec) < 150:
+            buffer.append(sec)
         else:
-            if buffer.strip():
-                merged_sections.append(buffer.strip())
-                buffer = ""
+            if buffer:
+                merged = "\n".join(buffer).strip()
+                if merged:
+                    merged_sections.append(merged)
+                buffer = []
             merged_sections.append(sec.strip())
 
-    if buffer.strip():
-        merged_sections.append(buffer.strip())
+    if buffer:
+        merged = "\n".join(buffer).strip()
+        if merged:
+            merged_sections.append(merged)
 
     if not merged_sections and text.strip():
         merged_sections = [text.strip()]
@@ -81,46 +115,90 @@ def sentence_chunker(
         sentences = sent_tokenize(section)
         if not sentences:
             continue
+        # Token counts are needed for both sizing and overlap; encode the sentences once
+        counts = counter.count_many(sentences)
 
         start = 0
         while start < len(sentences):
-            chunk_sentences, token_count = [], 0
+            end, token_count = start, 0
 
             # Build each chunk by sentence length
-            while (
-                start + len(chunk_sentences) < len(sentences)
-                and token_count + len(sentences[start + len(chunk_sentences)].split()) <= chunk_size
-            ):
-                s = sentences[start + len(chunk_sentences)]
-                chunk_sentences.append(s)
-                token_count += len(s.split())
+            while end < len(sentences) and token_count + counts[end] <= chunk_size:
+                token_count += counts[end]
+                end += 1
 
-            if not chunk_sentences:
-                chunk_sentences = [sentences[start]]
+            if end == start:
+                end = start + 1
 
-            chunk = " ".join(chunk_sentences)
-            final_chunks.append(chunk)
+            final_chunks.append(" ".join(sentences[start:end]))
+            if end == len(sentences):
+                break
 
             # Calculate overlap in sentences
             overlap_tokens, overlap_sentences = 0, 0
-            for s in reversed(chunk_sentences):
-                overlap_tokens += len(s.split())
+            for count in reversed(counts[start:end]):
+                overlap_tokens += count
                 overlap_sentences += 1
                 if overlap_tokens >= chunk_overlap:
                     break
 
-            start += len(chunk_sentences) - overlap_sentences
+            # Always advance, or a single long sentence would repeat forever
+            start = max(end - overlap_sentences, start + 1)
 
     return final_chunks
 
 
+def _split_keep_separator(text: str, separator: str) -> List[str]:
+    """Same pieces as the LangChain splitter: each separator starts the following piece."""
+    parts = text.split(separator)
+    return [p for p in [parts[0]] + [separator + p for p in parts[1:]] if p]
+
+
+def _prime_token_counts(text: str, chunk_size: int, counter: TokenCounter):
+    """
+    Batch-encode the segments the recursive splitter will measure, one level at a
+    time: the pieces at the first separator found, then the pieces of every piece
+    that is still too long, and so on.
+    """
+    pending = [(text, SEPARATORS)]
+    while pending:
+        level = []
+        for piece, separators in pending:
+            for i, separator in enumerate(separators):
+                if separator in piece:
+                    level.append((_split_keep_separator(piece, separator), separators[i + 1:]))
+                    break
+        counter.prime(s for splits, _ in level for s in splits)
+        pending = [
+            (s, rest)
+            for splits, rest in level if rest
+            for s in splits if counter(s) >= chunk_size
+        ]
+
+
+def _token_splitter(chunk_size: int, chunk_overlap: int, counter: TokenCounter):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=counter,
+        separators=SEPARATORS,
+    )
+
+
 def chunk_text(
     raw_text: str,
     chunk_size: int = config.CHUNK_SIZE_TOKENS,
     chunk_overlap: int = config.CHUNK_OVERLAP_TOKENS,
-    use_semantic_dedupe: bool = False
+    use_semantic_dedupe: bool = False,
+    existing_chunks: List[str] = None
 ) -> List[str]:
-    """Main entry for chunking text into semantically meaningful pieces."""
+    """
+    Main entry for chunking text into semantically meaningful pieces.
+    `chunk_size` and `chunk_overlap` are in embedding-model tokens, so chunks fit
+    the model's input instead of being silently truncated.
+    `existing_chunks` (e.g. already stored for the subject) are only used to
+    drop near-duplicates when `use_semantic_dedupe` is set.
+    """
 
     if not raw_text or not raw_text.strip():
         return []
@@ -128,27 +206,25 @@ def chunk_text(
     # 1️⃣ Clean raw text
     cleaned_text = preprocess_pdf_text(raw_text)
 
+    # Token lengths are memoized per document and shared by every step below
+    counter = TokenCounter()
+
     # 2️⃣ Use LangChain splitter if available
     if LANGCHAIN_AVAILABLE:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=lambda x: len(x.split()),  # approximate token count
-            separators=["\n\n", "\n", ".", " "],
-        )
-        chunks = splitter.split_text(cleaned_text)
+        _prime_token_counts(cleaned_text, chunk_size, counter)
+        chunks = _token_splitter(chunk_size, chunk_overlap, counter).split_text(cleaned_text)
     else:
         # fallback to custom sentence-aware splitter
-        chunks = sentence_chunker(cleaned_text, chunk_size, chunk_overlap)
+        chunks = sentence_chunker(cleaned_text, chunk_size, chunk_overlap, counter)
 
     # 3️⃣ Deduplicate exact text
     chunks = dedupe_exact_normalized(chunks)
 
     # 4️⃣ Optional semantic deduplication
     if use_semantic_dedupe:
-        chunks = semantic_dedupe(chunks)
+        chunks = semantic_dedupe(chunks, existing=existing_chunks)
 
     # 5️⃣ Merge heading-based sections for cohesion
-    chunks = merge_heading_chunks(chunks)
+    chunks = merge_heading_chunks(chunks, max_tokens=chunk_size, length_function=counter)
 
     return chunks
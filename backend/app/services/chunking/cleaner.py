@@ -1,41 +1,52 @@
 import re
+from collections import Counter
+
+from . import config
+
+# \r\n, lone \r and \n all end a line
+_LINE_BREAK_RE = re.compile(r"\r\n?|\n")
+
+# Repeated short lines (headers/footers) are dropped; longer ones are real content
+HEADER_FOOTER_MAX_CHARS = 80
+
+
+def _is_page_number(stripped_line: str) -> bool:
+    return stripped_line.isascii() and stripped_line.isdigit()
+
 
 def preprocess_pdf_text(text: str) -> str:
-    """Light cleanup of extracted PDF text without deleting all content."""
+    """
+    Light cleanup of extracted PDF text without deleting all content.
+
+    Single pass over the lines: normalizes newlines, drops lines that are only a
+    page number, drops short lines repeated at least HEADER_FOOTER_MIN_REPEATS
+    times (headers/footers) and keeps at most one blank line in a row.
+    """
     if not text:
         return ""
 
     original_len = len(text)
 
-    # Normalize newlines
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-
-    # Remove repeated empty lines (but keep one)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-
-    # Remove page numbers alone on a line
-    text = re.sub(r"^\s*\d+\s*$", "", text, flags=re.MULTILINE)
-
-    # Remove common headers/footers — only if repeated >=3 times
-    lines = text.split("\n")
-    seen_headers = {}
-    for line in lines:
-        norm = line.strip()
-        if norm:
-            seen_headers[norm] = seen_headers.get(norm, 0) + 1
+    lines = _LINE_BREAK_RE.split(text)
+    stripped = [line.strip() for line in lines]
+    counts = Counter(stripped)
 
     cleaned_lines = []
-    for line in lines:
-        norm = line.strip()
-        # Remove line if repeated at least 3 times and line length < 80 (header/footer)
-        if seen_headers.get(norm, 0) >= 3 and len(norm) < 80:
+    previous_blank = True  # also drops leading blank lines
+    for line, norm in zip(lines, stripped):
+        if norm and (
+            _is_page_number(norm)
+            or (counts[norm] >= config.HEADER_FOOTER_MIN_REPEATS and len(norm) < HEADER_FOOTER_MAX_CHARS)
+        ):
             continue
+        if not norm:
+            if previous_blank:
+                continue
+            line = ""
         cleaned_lines.append(line)
+        previous_blank = not norm
 
-    text = "\n".join(cleaned_lines)
-
-    # Trim whitespace
-    text = text.strip()
+    text = "\n".join(cleaned_lines).strip()
 
     print(f"[DEBUG] Cleaner reduced length from {original_len} to {len(text)}")
 
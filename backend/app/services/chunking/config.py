@@ -1,6 +1,7 @@
-# Chunking size & behavior (tokens preferred, falls back to words)
-CHUNK_SIZE_TOKENS = 500
-CHUNK_OVERLAP_TOKENS = 50
+# Chunking size & behavior, in embedding-model tokens (estimated from words if the
+# tokenizer is unavailable). Must stay under the model's EMBEDDING_MAX_TOKENS.
+CHUNK_SIZE_TOKENS = 250
+CHUNK_OVERLAP_TOKENS = 25
 
 # When detecting repeated header/footer lines:
 HEADER_FOOTER_MIN_REPEATS = 3       # min occurrences to consider a line repeated
@@ -13,3 +14,6 @@ MIN_SECTION_WORDS_TO_KEEP = 50
 
 # Deduplication threshold (optional semantic dedupe if sklearn installed)
 SEMANTIC_SIMILARITY_THRESHOLD = 0.85  # if using semantic dedupe (cosine)
+# Same for the MinHash path (no sklearn), on its own scale: Jaccard similarity of
+# word 3-shingles. 0.6 is about one word in ten changed; cosine is still ~0.98 there
+JACCARD_SIMILARITY_THRESHOLD = 0.6
@@ -0,0 +1,133 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import List
+
+import numpy as np
+
+from . import config
+from .utils import SKLEARN_AVAILABLE
+
+if SKLEARN_AVAILABLE:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+_WORD_RE = re.compile(r"\w+")
+
+# MinHash parameters: NUM_PERM = BANDS * ROWS
+MINHASH_BANDS = 32
+MINHASH_ROWS = 4
+MINHASH_SHINGLE = 3
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def near_duplicate_keep_mask(
+    chunks: List[str],
+    existing: List[str] = None,
+    threshold: float = config.SEMANTIC_SIMILARITY_THRESHOLD,
+    method: str = "auto",
+    jaccard_threshold: float = config.JACCARD_SIMILARITY_THRESHOLD,
+) -> List[bool]:
+    """
+    Flag which `chunks` to keep. A chunk is dropped when it is a near-duplicate of an
+    earlier kept chunk or of any of `existing` (e.g. chunks already stored for the
+    subject): term-frequency cosine >= `threshold` with "tfidf", estimated Jaccard
+    similarity of word shingles >= `jaccard_threshold` with "minhash".
+
+    "tfidf" vectorizes everything once into a sparse matrix and compares only the
+    new chunks against existing + new ones, in blocks of sparse products: cost
+    grows with len(chunks) * (len(existing) + len(chunks)), never with
+    existing x existing. "minhash" uses MinHash signatures with LSH banding and
+    needs no sklearn. "auto" prefers tfidf.
+    """
+    if not chunks:
+        return []
+    existing = existing or []
+    if method == "auto":
+        method = "tfidf" if SKLEARN_AVAILABLE else "minhash"
+
+    if method == "tfidf":
+        pairs_fn = _tfidf_pairs
+    elif method == "minhash":
+        # The two similarities are on different scales
+        pairs_fn, threshold = _minhash_pairs, jaccard_threshold
+    else:
+        raise ValueError(f"Unknown near-duplicate method: {method}")
+
+    # Candidate pairs (i, j) with i < j and j a new chunk, over existing + chunks
+    offset = len(existing)
+    keep = [True] * len(chunks)
+    neighbours = defaultdict(list)
+    for i, j in pairs_fn(existing + list(chunks), threshold, offset):
+        if i < offset and j >= offset:
+            keep[j - offset] = False          # duplicates something already stored
+        elif i >= offset:
+            neighbours[i - offset].append(j - offset)
+
+    # Greedy in document order: a kept chunk removes its later near-duplicates
+    for i in range(len(chunks)):
+        if keep[i]:
+            for j in neighbours.get(i, ()):
+                keep[j] = False
+    return keep
+
+
+def _tfidf_pairs(texts: List[str], threshold: float, first_new: int = 0, block_size: int = 512):
+    """Pairs (i, j), i < j, j >= first_new, with cosine >= threshold; rows before first_new aren't compared."""
+    try:
+        # Term-frequency cosine: a corpus-wide IDF would make scores depend on the
+        # batch, so thresholds tuned on pairwise comparisons keep their meaning
+        matrix = TfidfVectorizer(use_idf=False).fit_transform(texts).tocsr()  # rows are L2-normalized
+    except ValueError:
+        return  # empty vocabulary (e.g. only punctuation)
+    matrix_t = matrix.T.tocsc()
+    for start in range(first_new, matrix.shape[0], block_size):
+        sims = (matrix[start:start + block_size] @ matrix_t).tocoo()
+        rows = sims.row + start
+        # Each new row against the earlier rows (existing ones and earlier new ones)
+        mask = (sims.col < rows) & (sims.data >= threshold)
+        yield from zip(sims.col[mask].tolist(), rows[mask].tolist())
+
+
+def _shingles(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MINHASH_SHINGLE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[k:k + MINHASH_SHINGLE]) for k in range(len(words) - MINHASH_SHINGLE + 1)}
+
+
+def _signatures(texts: List[str]) -> np.ndarray:
+    num_perm = MINHASH_BANDS * MINHASH_ROWS
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(texts), num_perm), _MERSENNE_PRIME, dtype=np.uint64)
+    for row, text in enumerate(texts):
+        shingles = _shingles(text)
+        if not shingles:
+            continue
+        hashes = np.fromiter((zlib.crc32(s.encode()) & 0x7FFFFFFF for s in shingles), dtype=np.uint64)
+        signatures[row] = ((np.outer(hashes, a) + b) % _MERSENNE_PRIME).min(axis=0)
+    return signatures
+
+
+def _minhash_pairs(texts: List[str], threshold: float, first_new: int = 0):
+    signatures = _signatures(texts)
+    buckets = defaultdict(list)
+    for band in range(MINHASH_BANDS):
+        cols = slice(band * MINHASH_ROWS, (band + 1) * MINHASH_ROWS)
+        for row in range(len(texts)):
+            buckets[(band, signatures[row, cols].tobytes())].append(row)
+
+    seen = set()
+    for rows in buckets.values():
+        for x in range(len(rows)):
+            for y in range(x + 1, len(rows)):
+                pair = (rows[x], rows[y])
+                # Rows are in ascending order, so pair[1] < first_new means both are existing
+                if pair[1] < first_new or pair in seen:
+                    continue
+                seen.add(pair)
+                # Fraction of agreeing MinHash values estimates Jaccard similarity
+                if np.mean(signatures[pair[0]] == signatures[pair[1]]) >= threshold:
+                    yield pair
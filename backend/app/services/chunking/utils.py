@@ -1,5 +1,7 @@
 import re
-from typing import List
+from functools import lru_cache
+
+from backend.app.services.embeddings.tokenizer import TokenCounter
 
 try:
     import tiktoken
@@ -28,10 +30,11 @@ def is_heading(line: str) -> bool:
         return True
     return False
 
-def merge_heading_chunks(sections, max_chunk_size=800):
+def merge_heading_chunks(sections, max_chunk_size=800, max_tokens=None, length_function=None):
     """
     Merge sections into chunks without breaking headings or definitions.
-    Keeps paragraphs together when possible.
+    Keeps paragraphs together when possible. With `max_tokens` and a token
+    `length_function`, a merge must also stay within the token limit.
     """
     merged_chunks = []
     current_chunk = ""
@@ -41,8 +44,13 @@ def merge_heading_chunks(sections, max_chunk_size=800):
         if not sec:
             continue
 
+        fits = len(current_chunk) + len(sec) + 1 <= max_chunk_size
+        # Tokens are only counted for the short pieces that could be merged
+        if fits and current_chunk and max_tokens is not None:
+            fits = length_function(current_chunk) + length_function(sec) <= max_tokens
+
         # If adding section exceeds limit, start new chunk
-        if len(current_chunk) + len(sec) + 1 > max_chunk_size:
+        if not fits:
             if current_chunk:
                 merged_chunks.append(current_chunk.strip())
             current_chunk = sec
@@ -64,19 +72,23 @@ def clean_leading_chars(chunk: str) -> str:
 def count_tokens(text: str, model: str = None) -> int:
     """
     Token counting function:
-    - If tiktoken available, use a default encoding (cl100k_base) for rough token count.
-    - Otherwise fallback to word count.
+    - By default, counts tokens of the embedding model (what chunk sizes mean).
+    - With `model` and tiktoken available, counts that OpenAI model's tokens.
+    - Otherwise falls back to an estimate from the word count.
     """
     if not text:
         return 0
-    if TIKTOKEN_AVAILABLE:
-        try:
-            enc = tiktoken.get_encoding("cl100k_base")
-        except Exception:
-            enc = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
-        return len(enc.encode(text))
-    # fallback: words count
-    return len(text.split())
+    if model and TIKTOKEN_AVAILABLE:
+        return len(_tiktoken_encoding(model).encode(text))
+    return TokenCounter()(text)
+
+
+@lru_cache(maxsize=8)
+def _tiktoken_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
 
 # Optional: semantic similarity if sklearn available
 try:
@@ -1,13 +1,19 @@
 import os
 import json
 import re
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
 
 import backend.app.utils.google_drive as google_drive
-import backend.app.services.extractor as ext
-from backend.app.services.chunking.chunker import chunk_text
-from backend.app.services.embeddings.dependencies import embedder, qdrant_store
+from backend.app.services.caching.dependencies import get_answer_cache
+from backend.app.services.embeddings.dependencies import get_ingest_embedder, get_qdrant_store
+from backend.app.services.embeddings.ids import chunk_point_id
+from backend.app.services.ingestion.jobs import SyncJobManager
+from backend.app.services.ingestion.dependencies import get_manifest_store
+from backend.app.services.ingestion.pipeline import IngestPipeline
+from backend.app.services.retrieval.config import HYBRID_SEARCH
+from backend.app.services.retrieval.dependencies import get_keyword_index
 
 BASE_DIR = Path(__file__).parent.parent
 PROCESSED_FILE_PATH = BASE_DIR / "db" / "processed_files.json"
@@ -16,95 +22,229 @@ load_dotenv()
 DRIVE_FOLDER_ID = os.getenv("DRIVE_FOLDER_ID")
 
 
-def load_processed_files():
+def load_processed_files() -> dict:
+    """
+    Read the old processed_files.json manifest (superseded by the SQLite manifest).
+    The oldest format, a plain list of ids, is read as records without
+    change-tracking fields.
+    """
     if PROCESSED_FILE_PATH.exists():
         try:
             with open(PROCESSED_FILE_PATH, "r") as f:
                 data = f.read().strip()
                 if not data:
-                    return set()
-                return set(json.loads(data))
+                    return {}
+                data = json.loads(data)
+                if isinstance(data, list):
+                    return {file_id: {} for file_id in data}
+                return data
         except json.JSONDecodeError:
-            return set()
-    return set()
+            return {}
+    return {}
+
 
+def _migrate_processed_files():
+    """Import processed_files.json into an empty manifest, once."""
+    manifest_store = get_manifest_store()
+    if not PROCESSED_FILE_PATH.exists() or not manifest_store.is_empty():
+        return
+    records = load_processed_files()
+    if records:
+        manifest_store.import_processed_files(records)
+        print(f"[INFO] Imported {len(records)} files from {PROCESSED_FILE_PATH.name} into the manifest")
+    PROCESSED_FILE_PATH.rename(PROCESSED_FILE_PATH.with_name(PROCESSED_FILE_PATH.name + ".migrated"))
 
-def save_processed_files(processed_files):
-    with open(PROCESSED_FILE_PATH, "w") as f:
-        json.dump(list(processed_files), f, indent=2)
+
+def _is_unchanged(record: dict, item: dict) -> bool:
+    """Compare a manifest record with Drive metadata, without downloading the file."""
+    if record.get("modified_time") and record["modified_time"] == item.get("modifiedTime"):
+        return True
+    # Touched but identical bytes (e.g. renamed or re-uploaded)
+    return bool(item.get("md5Checksum")) and record.get("md5") == item.get("md5Checksum")
 
 
 # ... same imports and helper functions ...
 
-def sync_drive_folder(batch_size: int = 5):
+def sync_drive_folder(batch_size: int = 5, progress=None, cancel_event: threading.Event = None, lease: str = None):
     """
-    Sync PDFs from nested structure: Root → Semester → Subject → Files.
+    Incrementally sync PDFs from nested structure: Root → Semester → Subject → Files.
     Subject code = file name (without .pdf).
-    Processes `batch_size` PDFs at a time.
+
+    Unchanged files are skipped from their Drive metadata alone, changed files have
+    their points replaced in place (point ids derive from file id + chunk index),
+    and points of files removed from Drive are deleted. Per-file progress is
+    committed to the SQLite manifest as it happens, and files left unfinished by
+    an interrupted run are picked up first. Processes up to `batch_size` new or
+    changed PDFs per run through the staged ingest pipeline.
+
+    `progress` (e.g. a SyncJob) receives planned(total), file_done(chunks) and
+    file_failed() calls; setting `cancel_event` stops the run early. `lease` is a
+    manifest lease token the caller already holds (and releases); without one the
+    sync takes its own.
     """
     if not DRIVE_FOLDER_ID:
         raise ValueError("DRIVE_FOLDER_ID not set in environment variables")
 
-    processed_files = load_processed_files()
-    total_chunks = 0
-    batch_count = 0
-
-    def process_folder(folder_id: str):
-        nonlocal total_chunks, batch_count
-        items = google_drive.list_files_in_folder(folder_id)
-
-        for item in items:
-            if batch_count >= batch_size:
-                return
-
-            if item["mimeType"] == "application/vnd.google-apps.folder":
-                process_folder(item["id"])
-
-            elif item["mimeType"] == "application/pdf":
-                file_id = item["id"]
-                file_name = item["name"]
-                subject_code = re.sub(r"\.pdf$", "", file_name, flags=re.IGNORECASE)
-
-                if file_id in processed_files:
-                    continue
-
-                print(f"⬇️ Downloading {file_name}")
-                file_bytes = google_drive.download_file(file_id)
-
-                # Extract text
-                extracted_text = ext.extract_text_from_pdf_bytes(file_bytes)
-                extracted_text = extracted_text.encode("utf-8", errors="ignore").decode("utf-8")
-                extracted_text = extracted_text.replace("\r\n", "\n").strip()
-                extracted_text = re.sub(r"\n{2,}", "\n\n", extracted_text)
-
-                # Chunk text
-                chunks = chunk_text(extracted_text, chunk_size=500, chunk_overlap=50, use_semantic_dedupe=False)
-                if not chunks:
-                    processed_files.add(file_id)
-                    continue
-
-                # Embed chunks
-                embeddings = embedder.embed_texts(chunks)
-
-
-                # Create payloads
-                payloads = [
-                    {"chunk_index": i, "text": chunks[i], "subject_code": subject_code}
-                    for i in range(len(chunks))
-                ]
-
-                # Upsert into Qdrant
-                qdrant_store.upsert(embeddings, payloads)
-                total_chunks += len(chunks)
-                batch_count += 1
-                processed_files.add(file_id)
-                print(f"Stored {len(chunks)} chunks for {file_name} (subject: {subject_code})")
-
-                if batch_count >= batch_size:
-                    return
+    manifest_store = get_manifest_store()
+    owned = lease is None
+    if owned:
+        lease = manifest_store.acquire_lease()
+    try:
+        with manifest_store.lease_heartbeat(lease):
+            return _sync(batch_size, progress, cancel_event)
+    finally:
+        if owned:
+            manifest_store.release_lease(lease)
+
+
+def _sync(batch_size: int, progress, cancel_event: threading.Event | None) -> dict:
+    _migrate_processed_files()
+    manifest_store = get_manifest_store()
+    qdrant_store = get_qdrant_store()
+    keyword_index = get_keyword_index() if HYBRID_SEARCH else None
+    answer_cache = get_answer_cache()
+    manifest = manifest_store.get_all()
 
     print(f"Root folder ID: {DRIVE_FOLDER_ID}")
-    process_folder(DRIVE_FOLDER_ID)
-
-    save_processed_files(processed_files)
-    print(f"\nDrive sync completed. Total chunks stored: {total_chunks} (processed {batch_count} files this run)")
+    seen, resumed, changed, unchanged = set(), [], [], 0
+    for item in google_drive.list_files_in_folder(DRIVE_FOLDER_ID):
+        if item["mimeType"] != "application/pdf":
+            continue
+        seen.add(item["id"])
+        subject_code = re.sub(r"\.pdf$", "", item["name"], flags=re.IGNORECASE)
+        record = manifest.get(item["id"])
+        job = {
+            "id": item["id"],
+            "name": item["name"],
+            "subject_code": subject_code,
+            "modified_time": item.get("modifiedTime"),
+            "md5": item.get("md5Checksum"),
+            "previous": record,
+        }
+
+        if record is None:
+            changed.append(job)
+        elif record["legacy"] and not record["modified_time"]:
+            # Ingested before change tracking: adopt the current Drive version as-is.
+            # Its points have random ids, so a later change must clear them by subject.
+            manifest_store.adopt_legacy(item["id"], item["name"], subject_code, job["modified_time"], job["md5"])
+            unchanged += 1
+        elif record["status"] != "stored":
+            # Interrupted or failed in an earlier run
+            resumed.append(job)
+        elif _is_unchanged(record, item):
+            if (record["modified_time"], record["md5"]) != (job["modified_time"], job["md5"]):
+                manifest_store.update_version(item["id"], job["modified_time"], job["md5"])
+            unchanged += 1
+        else:
+            changed.append(job)
+
+    pending = (resumed + changed)[:batch_size]
+    for job in pending:
+        manifest_store.mark_queued(job)
+    if progress:
+        progress.planned(len(pending))
+
+    # Files that disappeared from Drive
+    removed = [file_id for file_id in manifest if file_id not in seen]
+    for file_id in removed:
+        record = manifest[file_id]
+        qdrant_store.delete_file(file_id)
+        if keyword_index:
+            keyword_index.delete_file(file_id)
+        if record["legacy"] and record["subject_code"]:
+            qdrant_store.delete_legacy_points(record["subject_code"])
+            if keyword_index:
+                keyword_index.delete_legacy_points(record["subject_code"])
+        if record["subject_code"]:
+            answer_cache.invalidate_subject(record["subject_code"])
+        manifest_store.delete(file_id)
+        print(f"🗑️ Removed points for deleted file {record['name'] or file_id}")
+
+    def skip_if(item: dict) -> bool:
+        previous = item["previous"]
+        return bool(previous) and previous["content_hash"] == item["content_hash"]
+
+    def on_skipped(item: dict):
+        manifest_store.mark_stored(item, item["previous"]["chunk_ids"])
+        if progress:
+            progress.file_done(0)
+
+    def on_progress(item: dict, stage: str):
+        manifest_store.mark_stage(item["id"], stage, item["timings"][stage])
+
+    def on_failed(item: dict, stage: str, error: str):
+        manifest_store.mark_failed(item["id"], stage, error)
+        if progress:
+            progress.file_failed()
+
+    def on_stored(item: dict, chunk_count: int):
+        chunk_ids = [chunk_point_id(item["id"], i) for i in range(chunk_count)]
+        previous = item["previous"] or {}
+
+        # New points already overwrote the old ones with the same ids; drop the rest
+        stale = set(previous.get("chunk_ids") or []) - set(chunk_ids)
+        qdrant_store.delete_points(list(stale))
+        if keyword_index:
+            keyword_index.delete_points(list(stale))
+        if previous.get("legacy"):
+            qdrant_store.delete_legacy_points(previous.get("subject_code") or item["subject_code"])
+            if keyword_index:
+                keyword_index.delete_legacy_points(previous.get("subject_code") or item["subject_code"])
+
+        manifest_store.mark_stored(item, chunk_ids, item.get("timings", {}).get("upsert"))
+        if chunk_count or stale:
+            # New chunks can change what /ask retrieves for this subject
+            answer_cache.invalidate_subject(item["subject_code"])
+        if progress:
+            progress.file_done(chunk_count)
+        if chunk_count:
+            print(f"Stored {chunk_count} chunks for {item['name']} (subject: {item['subject_code']})")
+
+    embedder = get_ingest_embedder()
+    cache = getattr(embedder, "cache", None)
+    cache_before = cache.stats() if cache else None
+
+    pipeline = IngestPipeline(
+        embedder,
+        qdrant_store,
+        google_drive.download_file,
+        on_stored=on_stored,
+        skip_if=skip_if,
+        on_skipped=on_skipped,
+        on_progress=on_progress,
+        on_failed=on_failed,
+        cancel_event=cancel_event,
+        keyword_index=keyword_index,
+    )
+    summary = pipeline.run(pending)
+    summary["files_resumed"] = min(len(resumed), batch_size)
+    summary["files_skipped_unchanged"] = unchanged
+    summary["files_removed"] = len(removed)
+    if cache:
+        cache_after = cache.stats()
+        hits = cache_after["hits"] - cache_before["hits"]
+        misses = cache_after["misses"] - cache_before["misses"]
+        summary["embedding_cache"] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": cache_after["entries"],
+        }
+
+    print(
+        f"\nDrive sync completed. Total chunks stored: {summary['chunks_stored']} "
+        f"(processed {summary['files_stored']} files this run in {summary['wall_seconds']}s, "
+        f"{unchanged + summary['files_unchanged']} unchanged, {len(removed)} removed)"
+    )
+    if cache:
+        print(f"  [embedding cache] {summary['embedding_cache']['hits']} hits, {summary['embedding_cache']['misses']} misses")
+    for name, stage in summary["stages"].items():
+        print(f"  [{name}] {stage['items_per_sec']} files/s, {stage['chunks_per_sec']} chunks/s, utilization {stage['utilization']}")
+    writer = summary["writer"]
+    print(f"  [vector writes] {writer['points']} points in {writer['batches']} batches, {writer['points_per_sec']} points/s, {writer['retries']} retries")
+    return summary
+
+
+# Background runner used by the API, so a sync never blocks a request
+sync_jobs = SyncJobManager(sync_drive_folder, lease=get_manifest_store)
@@ -0,0 +1,185 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+from backend.app.services.embeddings.config import (
+    BATCH_SIZE,
+    BATCH_MAX_WAIT_SECONDS,
+    BATCH_WINDOW_BATCHES,
+)
+from backend.app.services.embeddings.tokenizer import TokenCounter
+
+
+class _Request:
+    """Texts submitted by one caller and the future its vectors are delivered on."""
+
+    __slots__ = ("texts", "future", "results", "remaining")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.future = Future()
+        self.results = [None] * len(texts)
+        self.remaining = len(texts)
+
+    # A caller may cancel at any time (e.g. a disconnected /ask client cancels the
+    # asyncio wrapper), so resolving the future can lose that race
+
+    def set_result(self, result):
+        try:
+            self.future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def set_exception(self, error: Exception):
+        try:
+            self.future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching front for an Embedder.
+
+    Texts from many callers (ingest files, /ask requests) are queued and merged into
+    token-length-sorted batches of up to `batch_size`, or whatever arrived within
+    `max_wait` seconds. Each caller gets a future resolving to its own vectors.
+    A single worker thread owns the model, so forward passes never compete.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        batch_size: int = BATCH_SIZE,
+        max_wait: float = BATCH_MAX_WAIT_SECONDS,
+        window_batches: int = BATCH_WINDOW_BATCHES,
+    ):
+        self.embedder = embedder
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.window_batches = max(1, window_batches)
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._texts = 0
+        self._batches = 0
+        self._embed_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for embedding; the returned future resolves to their vectors."""
+        request = _Request(list(texts))
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+        with self._stats_lock:
+            self._requests += 1
+        self._queue.put(request)
+        return request.future
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Blocking, Embedder-compatible wrapper around `submit`."""
+        return self.submit(texts).result()
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_texts([text])[0]
+
+    async def aembed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Await vectors without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "texts": self._texts,
+                "batches": self._batches,
+                "avg_batch_size": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "embed_seconds": round(self._embed_seconds, 3),
+                "texts_per_sec": round(self._texts / self._embed_seconds, 2) if self._embed_seconds else 0.0,
+            }
+
+    # ------------------------------------------------------------------ worker
+
+    def _run(self):
+        pending = deque()  # (request, index) pairs in arrival order
+
+        while True:
+            window = []
+            try:
+                window = self._next_window(pending)
+                window = self._by_token_length(window)
+                for start in range(0, len(window), self.batch_size):
+                    self._run_batch(window[start:start + self.batch_size])
+            except Exception as e:
+                # This is the only worker thread: fail the window, never stop serving
+                print(f"[ERROR] Embedding batch failed: {e}")
+                for req, _ in window:
+                    req.set_exception(e)
+
+    def _next_window(self, pending: deque) -> list:
+        if not pending:
+            self._enqueue(pending, self._queue.get())
+
+        # Wait briefly for more callers so small requests share a forward pass
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                self._enqueue(pending, self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        while True:
+            try:
+                self._enqueue(pending, self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # A bounded window in arrival order
+        window_size = min(len(pending), self.batch_size * self.window_batches)
+        return [pending.popleft() for _ in range(window_size)]
+
+    @staticmethod
+    def _by_token_length(window: list) -> list:
+        # Batches of similar token counts pad to similar sizes
+        lengths = TokenCounter().count_many([req.texts[i] for req, i in window])
+        order = sorted(range(len(window)), key=lengths.__getitem__)
+        return [window[k] for k in order]
+
+    @staticmethod
+    def _enqueue(pending: deque, request: _Request):
+        pending.extend((request, i) for i in range(len(request.texts)))
+
+    def _run_batch(self, batch: list):
+        # Skip items whose request already failed or was cancelled
+        batch = [(req, i) for req, i in batch if not req.future.done()]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            vectors = self.embedder.embed_texts([req.texts[i] for req, i in batch])
+        except Exception as e:
+            for req, _ in batch:
+                req.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._texts += len(batch)
+            self._batches += 1
+            self._embed_seconds += elapsed
+
+        for (req, i), vector in zip(batch, vectors):
+            req.results[i] = vector
+            req.remaining -= 1
+            if req.remaining == 0:
+                req.set_result(req.results)
@@ -0,0 +1,169 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.services.embeddings.config import (
+    EMBED_CACHE_MAX_ENTRIES,
+    EMBED_CACHE_PATH,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key        BLOB PRIMARY KEY,      -- blake2b(model id, chunk text)
+    vector     BLOB NOT NULL,         -- float32, little-endian
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+# Evict a little more than needed, so inserts near the limit don't evict every time
+_EVICT_SLACK = 0.05
+# Hits refresh last_used at most this often, to avoid a write per lookup
+_TOUCH_INTERVAL_SECONDS = 3600
+
+
+def _model_id(model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND) -> str:
+    # int8 vectors differ slightly from fp32 ones, so each backend has its own entries
+    return f"{model_name}|{backend}"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed vectors on disk (SQLite, WAL mode), keyed by model and chunk text.
+
+    Re-ingesting a file, moving it to another folder, or embedding boilerplate pages
+    shared by many notes only runs the model for text it has not seen. The least
+    recently used entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path: Path = EMBED_CACHE_PATH, max_entries: int = EMBED_CACHE_MAX_ENTRIES, model_id: str = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self.model_id = (model_id or _model_id()).encode()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(self.model_id + b"\0" + text.encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, texts: list[str]) -> list:
+        """Cached vector (float32 array) for each text, or None where missing."""
+        keys = [self.key(t) for t in texts]
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update((key, (vector, last_used)) for key, vector, last_used in rows)
+
+            stale = [(now, key) for key, (_, last_used) in found.items() if now - last_used > _TOUCH_INTERVAL_SECONDS]
+            if stale:
+                # One transaction for the batch, rather than a commit per row
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", stale)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+
+        return [
+            np.frombuffer(found[k][0], dtype="<f4") if k in found else None
+            for k in keys
+        ]
+
+    def put_many(self, texts: list[str], vectors):
+        now = time.time()
+        rows = [
+            (self.key(t), np.asarray(v, dtype="<f4").tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+                )
+                count = self._count + max(cursor.rowcount, 0)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._count = count
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        excess = self._count - self.max_entries + int(self.max_entries * _EVICT_SLACK)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.evictions += excess
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CachedEmbedder:
+    """
+    Embedder-compatible wrapper that looks texts up in an EmbeddingCache in bulk
+    and only sends the misses (each distinct text once) to the wrapped embedder.
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        cached = self.cache.get_many(texts)
+
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        computed = {}
+        if missing:
+            vectors = self.embedder.embed_texts(missing)
+            self.cache.put_many(missing, vectors)
+            computed = dict(zip(missing, vectors))
+
+        return [
+            v.tolist() if v is not None else list(computed[t])
+            for t, v in zip(texts, cached)
+        ]
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_texts([text])[0]
@@ -1,13 +1,77 @@
+import os
 from pathlib import Path
-import torch
 
 # Embedding Model
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Longest input the model reads, including [CLS]/[SEP]; anything after is truncated
+EMBEDDING_MAX_TOKENS = 256
+
+# Inference backend for the same model:
+#   "torch"     - PyTorch fp32 (default)
+#   "onnx"      - ONNX Runtime fp32
+#   "onnx-int8" - ONNX Runtime with dynamically quantized int8 weights
+# The ONNX backends need `optimum[onnxruntime]`.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# Quantized export in the model repo to load for "onnx-int8": the avx2 file runs on
+# any recent x86 CPU; use onnx/model_qint8_avx512_vnni.onnx or
+# onnx/model_qint8_arm64.onnx where those instruction sets are available
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
 
 # Vector DB Config
 CHROMA_DB_PATH = Path("data/chroma_db")
 COLLECTION_NAME = "notes_embeddings"
 
+# Where chunk vectors are stored:
+#   "qdrant" - the Qdrant server at QDRANT_URL (default)
+#   "local"  - in-process memory-mapped index under LOCAL_VECTOR_STORE_PATH, for small
+#              deployments, offline development and benchmarks (one process at a time:
+#              a single API worker, and no CLI sync while it runs; enforced with a lock)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant").lower()
+LOCAL_VECTOR_STORE_PATH = Path(os.getenv("LOCAL_VECTOR_STORE_PATH", Path(__file__).parent.parent.parent / "db" / "vectors"))
+
+# Qdrant collection layout, applied when the collection is created (or on startup
+# with QDRANT_UPDATE_COLLECTION=true):
+#   int8 scalar quantized vectors stay in RAM for the HNSW search, while the
+#   original fp32 vectors (used to rescore the candidates) and payloads with the
+#   chunk text live on disk. RAM per 384-dim point drops from ~1.5 KB + text to ~400 B.
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "int8").lower()   # "int8" or "none"
+QDRANT_QUANTILE = float(os.getenv("QDRANT_QUANTILE", 0.99))             # clips outliers before int8 scaling
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "true").lower() == "true"  # original vectors + payloads on disk
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 16))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+QDRANT_UPDATE_COLLECTION = os.getenv("QDRANT_UPDATE_COLLECTION", "false").lower() == "true"
+
+# Search-time defaults; /ask accepts per-request overrides
+QDRANT_SEARCH_HNSW_EF = int(os.getenv("QDRANT_SEARCH_HNSW_EF", 0)) or None   # None: Qdrant's default
+QDRANT_SEARCH_OVERSAMPLING = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", 2.0))  # candidates fetched per result before rescoring
+QDRANT_SEARCH_RESCORE = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+
+# Optional embedding server: one process per host owns the model and serves every
+# API worker over a Unix socket (python -m backend.app.services.embeddings.server).
+# Unset (default): each worker loads its own model.
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET") or None
+# Shared secret for the socket, required in server mode: an authenticated peer's
+# messages are unpickled, so use a long random value (e.g. `openssl rand -hex 32`)
+EMBEDDING_SERVER_AUTHKEY = os.getenv("EMBEDDING_SERVER_AUTHKEY", "").encode() or None
+EMBEDDING_SERVER_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_SERVER_TIMEOUT_SECONDS", 30))
+
 # Batch Settings
 BATCH_SIZE = 32
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
\ No newline at end of file
+# None lets sentence-transformers pick (CUDA when available); set to force a device.
+# Keeps torch out of this module, which the chunking workers import for the tokenizer.
+DEVICE = os.getenv("EMBEDDING_DEVICE") or None
+
+# On-disk embedding cache used by ingestion (keyed by model + chunk text).
+# ~1.6 KB per 384-dim entry, so the default cap is about 800 MB.
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", Path(__file__).parent.parent.parent / "db" / "embedding_cache.sqlite3"))
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", 500_000))
+
+# Micro-batching: how long the batcher waits for more texts before running a partial batch
+BATCH_MAX_WAIT_SECONDS = 0.005
+# Upper bound on batches formed per scheduling round, so queued callers are served in order
+BATCH_WINDOW_BATCHES = 4
+
+# Concurrency limits for the /ask retrieval path (per API worker)
+QUERY_EMBED_CONCURRENCY = int(os.getenv("QUERY_EMBED_CONCURRENCY", 64))   # questions waiting on the batcher
+QDRANT_SEARCH_CONCURRENCY = int(os.getenv("QDRANT_SEARCH_CONCURRENCY", 32))  # in-flight Qdrant searches
@@ -1,6 +1,90 @@
-from backend.app.services.embeddings.embedder import Embedder
-from backend.app.services.embeddings.qdrant_store import QdrantStore
+from backend.app.services.embeddings.config import EMBEDDING_SERVER_SOCKET, VECTOR_STORE
+from backend.app.services.lazy import Lazy
 
-# Initialize shared instances
-embedder = Embedder()
-qdrant_store = QdrantStore(collection_name="notes", vector_size=384)
+# Shared instances, built on first use (or by the startup warm-up) rather than at
+# import: loading the model and connecting to Qdrant can take seconds and must not
+# keep the API from starting when Qdrant is unreachable.
+
+
+def _create_embedder():
+    if EMBEDDING_SERVER_SOCKET:
+        # The model lives in the shared embedding server; this worker never imports torch
+        from backend.app.services.embeddings.server import RemoteEmbedder
+        return RemoteEmbedder()
+    from backend.app.services.embeddings.embedder import Embedder
+    return Embedder()
+
+
+def _create_embedding_batcher():
+    from backend.app.services.embeddings.batcher import EmbeddingBatcher
+    return EmbeddingBatcher(get_embedder())
+
+
+def _create_embedding_cache():
+    from backend.app.services.embeddings.cache import EmbeddingCache
+    return EmbeddingCache()
+
+
+def _create_qdrant_store():
+    if VECTOR_STORE == "local":
+        from backend.app.services.embeddings.local_store import LocalVectorStore
+        return LocalVectorStore(vector_size=384)
+    from backend.app.services.embeddings.qdrant_store import QdrantStore
+    return QdrantStore(collection_name="notes", vector_size=384)
+
+
+def _create_async_qdrant_store():
+    if VECTOR_STORE == "local":
+        # Same index as ingestion writes to, so new chunks are searchable at once
+        from backend.app.services.embeddings.local_store import AsyncLocalVectorStore
+        return AsyncLocalVectorStore(get_qdrant_store())
+    from backend.app.services.embeddings.qdrant_store import AsyncQdrantStore
+    return AsyncQdrantStore(collection_name="notes")
+
+
+embedder = Lazy("embedder", _create_embedder)
+embedding_batcher = Lazy("embedding batcher", _create_embedding_batcher)
+embedding_cache = Lazy("embedding cache", _create_embedding_cache)
+qdrant_store = Lazy("vector store", _create_qdrant_store)
+async_qdrant_store = Lazy("async vector store", _create_async_qdrant_store)
+
+
+def get_embedder():
+    return embedder.get()
+
+
+def get_embedding_batcher():
+    return embedding_batcher.get()
+
+
+def get_embedding_cache():
+    return embedding_cache.get()
+
+
+def get_ingest_embedder():
+    """
+    Embedder for the ingest path: the shared batcher, behind the on-disk
+    embedding cache unless EMBED_CACHE_ENABLED is off.
+    """
+    from backend.app.services.embeddings.cache import CachedEmbedder
+    from backend.app.services.embeddings.config import EMBED_CACHE_ENABLED
+
+    if not EMBED_CACHE_ENABLED:
+        return get_embedding_batcher()
+    return CachedEmbedder(get_embedding_batcher(), get_embedding_cache())
+
+
+def get_qdrant_store():
+    """The vector store selected by VECTOR_STORE (Qdrant or the local index)."""
+    return qdrant_store.get()
+
+
+def get_async_qdrant_store():
+    return async_qdrant_store.get()
+
+
+async def close():
+    """Release clients that were created; called on API shutdown."""
+    store = async_qdrant_store.reset()
+    if store is not None:
+        await store.close()
@@ -1,10 +1,36 @@
-from backend.app.services.embeddings.config import EMBEDDING_MODEL_NAME, DEVICE
-from sentence_transformers import SentenceTransformer
+from backend.app.services.embeddings.config import (
+    DEVICE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_ONNX_INT8_FILE,
+)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_model(model_name: str = EMBEDDING_MODEL_NAME, device: str = DEVICE, backend: str = EMBEDDING_BACKEND):
+    """SentenceTransformer for `model_name` running on the given inference backend."""
+    # Imported here: sentence-transformers pulls in torch, which takes seconds
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device=device, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            model_name,
+            device=device,
+            backend="onnx",
+            model_kwargs={"file_name": EMBEDDING_ONNX_INT8_FILE},
+        )
+    raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(BACKENDS)})")
 
 
 class Embedder:
-    def __init__(self, model_name=EMBEDDING_MODEL_NAME, device=DEVICE):
-        self.model = SentenceTransformer(model_name, device=device)
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME, device=DEVICE, backend=EMBEDDING_BACKEND):
+        self.backend = backend
+        self.model = load_model(model_name, device=device, backend=backend)
 
     def embed_texts(self, texts: list[str]) -> list[list[float]]:
         """Embed a list of texts into vectors."""
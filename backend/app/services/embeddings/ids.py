@@ -0,0 +1,9 @@
+import uuid
+
+# Namespace for deterministic point ids, so re-ingesting a file overwrites its points
+CHUNK_ID_NAMESPACE = uuid.UUID("5b0e7c2e-3f4a-4c1e-9d1a-6f0b8a2c4e71")
+
+
+def chunk_point_id(file_id: str, chunk_index: int) -> str:
+    """Stable point id for chunk `chunk_index` of Drive file `file_id`."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{file_id}:{chunk_index}"))
@@ -0,0 +1,323 @@
+import asyncio
+import fcntl
+import json
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.services.embeddings.config import LOCAL_VECTOR_STORE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    row           INTEGER PRIMARY KEY,   -- row of the vector in vectors.f32
+    id            TEXT NOT NULL UNIQUE,
+    subject_code  TEXT,
+    file_id       TEXT,
+    payload       TEXT NOT NULL          -- JSON
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+# Rows allocated when the vector file is created; it doubles when full
+_INITIAL_CAPACITY = 1024
+
+
+class StoreLockedError(RuntimeError):
+    """Raised when another process already has the local vector store open."""
+    pass
+
+
+class LocalVectorStore:
+    """
+    In-process vector store with the same interface as QdrantStore, for small
+    deployments, offline development and benchmarks.
+
+    Vectors are L2-normalized and kept in a memory-mapped float32 matrix
+    (`vectors.f32`); ids and payloads live in SQLite next to it. Rows are grouped
+    per subject_code, so a query scores only its subject's rows with one
+    matrix-vector product and takes the top k with argpartition. Scores are cosine
+    similarities, as with the Qdrant collection.
+
+    Row allocation and the index live in this process's memory, so one process
+    at a time owns a store directory: an exclusive lock on `lock` in it is taken
+    on open, and a second process (e.g. the CLI sync while the API is up) gets
+    StoreLockedError instead of overwriting rows.
+    """
+
+    def __init__(self, path: Path = LOCAL_VECTOR_STORE_PATH, vector_size: int = 384):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vector_size = vector_size
+        self._lock = threading.RLock()
+
+        self._lock_file = open(self.path / "lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise StoreLockedError(
+                f"{self.path} is open in another process; the local vector store is single-process "
+                f"(stop the API before a CLI sync, or use VECTOR_STORE=qdrant)"
+            )
+
+        self._conn = sqlite3.connect(str(self.path / "points.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        stored_size = self._conn.execute("SELECT value FROM meta WHERE key = 'vector_size'").fetchone()
+        if stored_size is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('vector_size', ?)", (str(vector_size),))
+        elif int(stored_size[0]) != vector_size:
+            raise ValueError(f"{self.path} holds {stored_size[0]}-dim vectors, not {vector_size}")
+
+        self._rows = {}          # point id -> row
+        self._points = {}        # row -> (id, payload)
+        self._partitions = {}    # subject_code -> set of rows
+        self._arrays = {}        # subject_code (None: all) -> sorted row array, rebuilt on change
+        self._free = []
+        self._matrix = None
+
+        high_water = 0
+        for row, point_id, subject_code, payload in self._conn.execute(
+            "SELECT row, id, subject_code, payload FROM points"
+        ):
+            self._index(row, point_id, subject_code, json.loads(payload))
+            high_water = max(high_water, row + 1)
+        self._free = sorted(set(range(high_water)) - set(self._points), reverse=True)
+        self._next_row = high_water
+        self._open_matrix(max(_INITIAL_CAPACITY, high_water))
+        print(f"[INFO] Local vector store at {self.path}: {len(self._points)} points")
+
+    # ---------------------------------------------------------------- storage
+
+    def _open_matrix(self, capacity: int):
+        file = self.path / "vectors.f32"
+        row_bytes = self.vector_size * 4
+        if not file.exists() or file.stat().st_size < capacity * row_bytes:
+            with open(file, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        capacity = file.stat().st_size // row_bytes
+        self._matrix = np.memmap(file, dtype="<f4", mode="r+", shape=(capacity, self.vector_size))
+
+    def _allocate(self, count: int) -> list[int]:
+        rows = [self._free.pop() for _ in range(min(count, len(self._free)))]
+        extra = count - len(rows)
+        if extra:
+            rows.extend(range(self._next_row, self._next_row + extra))
+            self._next_row += extra
+        if self._next_row > self._matrix.shape[0]:
+            self._matrix.flush()
+            self._open_matrix(max(self._matrix.shape[0] * 2, self._next_row))
+        return rows
+
+    def _index(self, row: int, point_id: str, subject_code: str, payload: dict):
+        self._rows[point_id] = row
+        self._points[row] = (point_id, payload)
+        self._partitions.setdefault(subject_code, set()).add(row)
+        self._arrays.pop(subject_code, None)
+        self._arrays.pop(None, None)
+
+    def _unindex(self, rows: list[int]):
+        for row in rows:
+            point_id, payload = self._points.pop(row)
+            del self._rows[point_id]
+            subject_code = payload.get("subject_code")
+            partition = self._partitions.get(subject_code)
+            if partition is not None:
+                partition.discard(row)
+                if not partition:
+                    del self._partitions[subject_code]
+            self._arrays.pop(subject_code, None)
+            self._free.append(row)
+        self._arrays.pop(None, None)
+
+    def _partition(self, subject_code: str = None) -> np.ndarray:
+        rows = self._arrays.get(subject_code)
+        if rows is None:
+            if subject_code is None:
+                members = self._points.keys()
+            else:
+                members = self._partitions.get(subject_code, ())
+            rows = np.fromiter(sorted(members), dtype=np.int64)
+            self._arrays[subject_code] = rows
+        return rows
+
+    # ----------------------------------------------------------------- writes
+
+    def upsert(self, vectors: list[list[float]], payloads: list[dict], ids: list[str] = None, wait: bool = True):
+        """Insert or overwrite points. Random ids are used when `ids` is not given."""
+        if not len(vectors):
+            return
+        ids = [str(i) for i in ids] if ids else [str(uuid.uuid4()) for _ in range(len(vectors))]
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            existing = [self._rows[i] for i in ids if i in self._rows]
+            self._unindex(existing)
+            rows = self._allocate(len(ids))
+            self._matrix[rows] = matrix
+            # Vectors reach the file before the rows that point at them
+            self._matrix.flush()
+            records = [
+                (row, point_id, payload.get("subject_code"), payload.get("file_id"), json.dumps(payload))
+                for row, point_id, payload in zip(rows, ids, payloads)
+            ]
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points (row, id, subject_code, file_id, payload) VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+            self._conn.execute("COMMIT")
+            for row, point_id, payload in zip(rows, ids, payloads):
+                self._index(row, point_id, payload.get("subject_code"), dict(payload))
+        print(f"[INFO] {len(ids)} vectors inserted")
+
+    def _delete_rows(self, rows: list[int]):
+        if not rows:
+            return
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM points WHERE row = ?", [(r,) for r in rows])
+        self._conn.execute("COMMIT")
+        self._unindex(rows)
+
+    def delete_points(self, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            self._delete_rows([self._rows[str(i)] for i in ids if str(i) in self._rows])
+        print(f"[INFO] {len(ids)} vectors deleted")
+
+    def delete_file(self, file_id: str):
+        """Delete every point ingested from Drive file `file_id`."""
+        with self._lock:
+            self._delete_rows([row for row, (_, p) in self._points.items() if p.get("file_id") == file_id])
+
+    def delete_legacy_points(self, subject_code: str):
+        """Delete points for `subject_code` whose payload has no file_id."""
+        with self._lock:
+            self._delete_rows([
+                row for row in self._partitions.get(subject_code, ())
+                if not self._points[row][1].get("file_id")
+            ])
+
+    # ------------------------------------------------------------------ reads
+
+    def fetch_subject_texts(self, subject_code: str, exclude_file_id: str = None, limit: int = 10000) -> list[str]:
+        """Chunk texts stored for `subject_code`, optionally skipping one file's chunks."""
+        with self._lock:
+            texts = []
+            for row in self._partition(subject_code):
+                payload = self._points[row][1]
+                if exclude_file_id and payload.get("file_id") == exclude_file_id:
+                    continue
+                texts.append(payload.get("text", ""))
+                if len(texts) >= limit:
+                    break
+            return texts
+
+    def iter_points(self):
+        """(id, payload) for every stored point."""
+        with self._lock:
+            points = list(self._points.values())
+        yield from points
+
+    def query(self, query_vector: list[float], subject_code: str = None, top_k: int = 5, **search_params) -> list[dict]:
+        """Exact search; Qdrant's `hnsw_ef` / `oversampling` are accepted and ignored."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            rows = self._partition(subject_code)
+            if not len(rows) or top_k <= 0:
+                return []
+            scores = self._matrix[rows] @ query
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for i in top:
+                point_id, payload = self._points[int(rows[i])]
+                results.append({"id": point_id, "text": payload.get("text"), "score": float(scores[i]), "payload": payload})
+            return results
+
+    def query_batch(
+        self,
+        query_vectors: list[list[float]],
+        subject_codes: list[str],
+        top_ks: list[int],
+        **search_params,
+    ) -> list[list[dict]]:
+        """Many searches at once: questions on the same subject share one matrix product."""
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        groups = {}
+        for i, subject_code in enumerate(subject_codes):
+            groups.setdefault(subject_code or None, []).append(i)
+
+        batches = [[] for _ in query_vectors]
+        with self._lock:
+            for subject_code, members in groups.items():
+                rows = self._partition(subject_code)
+                if not len(rows):
+                    continue
+                scores = self._matrix[rows] @ queries[members].T
+                for column, i in enumerate(members):
+                    k = min(top_ks[i], len(rows))
+                    if k <= 0:
+                        continue
+                    column_scores = scores[:, column]
+                    top = np.argpartition(-column_scores, k - 1)[:k]
+                    top = top[np.argsort(-column_scores[top])]
+                    for j in top:
+                        point_id, payload = self._points[int(rows[j])]
+                        batches[i].append(
+                            {"id": point_id, "text": payload.get("text"), "score": float(column_scores[j]), "payload": payload}
+                        )
+        return batches
+
+    def count(self) -> int:
+        return len(self._points)
+
+    def close(self):
+        with self._lock:
+            self._matrix.flush()
+            self._conn.close()
+            self._lock_file.close()  # releases the flock
+
+
+class AsyncLocalVectorStore:
+    """
+    Async facade over a LocalVectorStore for the /ask path. Searches run on a
+    thread: they wait on the store's lock, which ingestion holds while it writes.
+    """
+
+    def __init__(self, store: LocalVectorStore):
+        self.store = store
+
+    async def query(self, query_vector: list[float], subject_code: str = None, top_k: int = 5, **search_params) -> list[dict]:
+        return await asyncio.to_thread(self.store.query, query_vector, subject_code=subject_code, top_k=top_k)
+
+    async def query_batch(
+        self,
+        query_vectors: list[list[float]],
+        subject_codes: list[str],
+        top_ks: list[int],
+        **search_params,
+    ) -> list[list[dict]]:
+        return await asyncio.to_thread(self.store.query_batch, query_vectors, subject_codes, top_ks)
+
+    async def close(self):
+        # The sync store owns the files and stays open for ingestion
+        pass
@@ -1,72 +1,310 @@
 import os
 import uuid
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from dotenv import load_dotenv
 
+from backend.app.services.embeddings.config import (
+    QDRANT_HNSW_EF_CONSTRUCT,
+    QDRANT_HNSW_M,
+    QDRANT_ON_DISK,
+    QDRANT_QUANTILE,
+    QDRANT_QUANTIZATION,
+    QDRANT_SEARCH_HNSW_EF,
+    QDRANT_SEARCH_OVERSAMPLING,
+    QDRANT_SEARCH_RESCORE,
+    QDRANT_UPDATE_COLLECTION,
+)
+
 load_dotenv()
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
+def _subject_filter(subject_code: str = None):
+    if not subject_code:
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="subject_code",
+                match=models.MatchValue(value=subject_code),
+            )
+        ]
+    )
+
+
+def _quantization_config(quantization: str):
+    if quantization == "none":
+        return None
+    if quantization == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=QDRANT_QUANTILE,
+                always_ram=True,
+            )
+        )
+    raise ValueError(f"Unknown quantization: {quantization} (expected int8 or none)")
+
+
+def _search_params(hnsw_ef: int = None, oversampling: float = None, rescore: bool = None):
+    """Per-search HNSW beam width and quantization rescoring (ignored by unquantized collections)."""
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef or QDRANT_SEARCH_HNSW_EF,
+        quantization=models.QuantizationSearchParams(
+            rescore=QDRANT_SEARCH_RESCORE if rescore is None else rescore,
+            oversampling=oversampling or QDRANT_SEARCH_OVERSAMPLING,
+        ),
+    )
+
+
+def _search_requests(query_vectors, subject_codes, top_ks, hnsw_ef=None, oversampling=None) -> list:
+    params = _search_params(hnsw_ef, oversampling)
+    return [
+        models.SearchRequest(
+            vector=list(vector),
+            filter=_subject_filter(subject_code),
+            limit=top_k,
+            params=params,
+            with_payload=True,
+        )
+        for vector, subject_code, top_k in zip(query_vectors, subject_codes, top_ks)
+    ]
+
+
+def _to_results(points) -> list[dict]:
+    return [
+        {"id": str(r.id), "text": r.payload.get("text"), "score": r.score, "payload": r.payload}
+        for r in points
+    ]
+
 
 class QdrantStore:
-    def __init__(self, collection_name: str, vector_size: int):
+    def __init__(
+        self,
+        collection_name: str,
+        vector_size: int,
+        quantization: str = QDRANT_QUANTIZATION,
+        on_disk: bool = QDRANT_ON_DISK,
+        hnsw_m: int = QDRANT_HNSW_M,
+        hnsw_ef_construct: int = QDRANT_HNSW_EF_CONSTRUCT,
+        client: QdrantClient = None,
+    ):
         self.collection_name = collection_name
-        self.client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+        self.client = client or QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+        self.quantization = quantization
+        self.on_disk = on_disk
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
 
         # Create collection if not exists
         collections = self.client.get_collections().collections
         if not any(c.name == self.collection_name for c in collections):
-            print(f"[INFO] Creating collection: {self.collection_name}")
+            print(f"[INFO] Creating collection: {self.collection_name} "
+                  f"(quantization={quantization}, on_disk={on_disk}, m={hnsw_m}, ef_construct={hnsw_ef_construct})")
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=models.VectorParams(
                     size=vector_size,
                     distance=models.Distance.COSINE,
+                    on_disk=on_disk,
                 ),
+                hnsw_config=models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+                quantization_config=_quantization_config(quantization),
+                on_disk_payload=on_disk,
             )
+        elif QDRANT_UPDATE_COLLECTION:
+            self.update_storage_config()
+
+        # Ensure payload indexes exist
+        for field_name in ("subject_code", "file_id"):
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+            except Exception as e:
+                print(f"[INFO] Payload index for '{field_name}' already exists or failed: {e}")
+
+    def update_storage_config(self):
+        """
+        Apply this store's quantization, on-disk and HNSW settings to an existing
+        collection. Qdrant rebuilds the affected segments in the background.
+        """
+        print(f"[INFO] Updating storage config of collection: {self.collection_name}")
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=self.on_disk)},
+            hnsw_config=models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct),
+            quantization_config=_quantization_config(self.quantization) or models.Disabled.DISABLED,
+            # Moves payloads of segments the optimizer rewrites; new segments follow it at once
+            collection_params=models.CollectionParamsDiff(on_disk_payload=self.on_disk),
+        )
+
+    def upsert(self, vectors: list[list[float]], payloads: list[dict], ids: list[str] = None, wait: bool = True):
+        """
+        Insert or overwrite points. Random ids are used when `ids` is not given.
+        With wait=False Qdrant returns once the update is queued, before it is searchable.
+        """
+        batch = models.Batch(
+            ids=list(ids) if ids else [str(uuid.uuid4()) for _ in range(len(vectors))],
+            vectors=[list(v) for v in vectors],
+            payloads=list(payloads),
+        )
+        self.client.upsert(collection_name=self.collection_name, points=batch, wait=wait)
+        print(f"[INFO] {len(vectors)} vectors inserted")
 
-        # Ensure payload index exists
-        try:
-            self.client.create_payload_index(
+    def delete_points(self, ids: list[str]):
+        if not ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(ids)),
+        )
+        print(f"[INFO] {len(ids)} vectors deleted")
+
+    def delete_file(self, file_id: str):
+        """Delete every point ingested from Drive file `file_id`."""
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    must=[models.FieldCondition(key="file_id", match=models.MatchValue(value=file_id))]
+                )
+            ),
+        )
+
+    def delete_legacy_points(self, subject_code: str):
+        """
+        Delete points for `subject_code` written before payloads carried a file_id
+        (random ids, so they can't be addressed any other way).
+        """
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    must=[
+                        models.FieldCondition(key="subject_code", match=models.MatchValue(value=subject_code)),
+                        models.IsEmptyCondition(is_empty=models.PayloadField(key="file_id")),
+                    ]
+                )
+            ),
+        )
+
+    def fetch_subject_texts(self, subject_code: str, exclude_file_id: str = None, limit: int = 10000) -> list[str]:
+        """Chunk texts stored for `subject_code`, optionally skipping one file's chunks."""
+        query_filter = _subject_filter(subject_code)
+        if exclude_file_id:
+            query_filter.must_not = [
+                models.FieldCondition(key="file_id", match=models.MatchValue(value=exclude_file_id))
+            ]
+
+        texts, offset = [], None
+        while len(texts) < limit:
+            points, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                field_name="subject_code",
-                field_schema=models.PayloadSchemaType.KEYWORD,
-            )
-        except Exception as e:
-            print(f"[INFO] Payload index for 'subject_code' already exists or failed: {e}")
-
-    def upsert(self, vectors: list[list[float]], payloads: list[dict]):
-        points = [
-            models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vectors[i],
-                payload=payloads[i],
+                scroll_filter=query_filter,
+                limit=min(1000, limit - len(texts)),
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=False,
             )
-            for i in range(len(vectors))
-        ]
-        self.client.upsert(collection_name=self.collection_name, points=points)
-        print(f"[INFO] {len(vectors)} vectors inserted")
+            texts.extend(p.payload.get("text", "") for p in points)
+            if offset is None:
+                break
+        return texts
 
-    def query(self, query_vector: list[float], subject_code: str = None, top_k: int = 5) -> list[dict]:
-        query_filter = None
-        if subject_code:
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="subject_code",
-                        match=models.MatchValue(value=subject_code),
-                    )
-                ]
+    def iter_points(self, batch_size: int = 1000):
+        """(id, payload) for every point in the collection."""
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
             )
+            for p in points:
+                yield str(p.id), p.payload
+            if offset is None:
+                break
 
+    def query(
+        self,
+        query_vector: list[float],
+        subject_code: str = None,
+        top_k: int = 5,
+        hnsw_ef: int = None,
+        oversampling: float = None,
+    ) -> list[dict]:
         results = self.client.search(
             collection_name=self.collection_name,
             query_vector=query_vector,
-            query_filter=query_filter,
+            query_filter=_subject_filter(subject_code),
             limit=top_k,
+            search_params=_search_params(hnsw_ef, oversampling),
         )
 
-        return [
-            {"text": r.payload.get("text"), "score": r.score, "payload": r.payload}
-            for r in results
-        ]
+        return _to_results(results)
+
+    def query_batch(
+        self,
+        query_vectors: list[list[float]],
+        subject_codes: list[str],
+        top_ks: list[int],
+        hnsw_ef: int = None,
+        oversampling: float = None,
+    ) -> list[list[dict]]:
+        """One `search_batch` round-trip for many questions, each with its own subject filter and limit."""
+        batches = self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=_search_requests(query_vectors, subject_codes, top_ks, hnsw_ef, oversampling),
+        )
+        return [_to_results(points) for points in batches]
+
+
+class AsyncQdrantStore:
+    """
+    Read-side store for the async request path, built on AsyncQdrantClient.
+    Collection creation stays with QdrantStore; this class only searches.
+    """
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self.client = AsyncQdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+    async def query(
+        self,
+        query_vector: list[float],
+        subject_code: str = None,
+        top_k: int = 5,
+        hnsw_ef: int = None,
+        oversampling: float = None,
+    ) -> list[dict]:
+        results = await self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            query_filter=_subject_filter(subject_code),
+            limit=top_k,
+            search_params=_search_params(hnsw_ef, oversampling),
+        )
+
+        return _to_results(results)
+
+    async def query_batch(
+        self,
+        query_vectors: list[list[float]],
+        subject_codes: list[str],
+        top_ks: list[int],
+        hnsw_ef: int = None,
+        oversampling: float = None,
+    ) -> list[list[dict]]:
+        batches = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=_search_requests(query_vectors, subject_codes, top_ks, hnsw_ef, oversampling),
+        )
+        return [_to_results(points) for points in batches]
+
+    async def close(self):
+        await self.client.close()
@@ -0,0 +1,217 @@
+"""
+Embedding server shared by the API workers of one host.
+
+One process loads the model and serves embedding requests over a Unix socket;
+each API worker uses a RemoteEmbedder in place of its own Embedder, so the model
+and the torch runtime are in RAM once, and texts from all workers are merged
+into the same batches.
+
+    EMBEDDING_SERVER_SOCKET=/run/notes-assistant/embed.sock EMBEDDING_SERVER_AUTHKEY=<secret> \
+        python -m backend.app.services.embeddings.server
+
+Server and workers must share EMBEDDING_SERVER_AUTHKEY; the socket is only
+accessible to the user running the server.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from backend.app.services.embeddings.config import (
+    EMBEDDING_SERVER_AUTHKEY,
+    EMBEDDING_SERVER_SOCKET,
+    EMBEDDING_SERVER_TIMEOUT_SECONDS,
+)
+
+
+def _require_authkey(authkey: bytes | None) -> bytes:
+    if not authkey:
+        # Requests are pickled, so an unauthenticated peer could run code in the server
+        raise ValueError("EMBEDDING_SERVER_AUTHKEY must be set to use the embedding server")
+    return authkey
+
+
+def _socket_in_use(path: str) -> bool:
+    """True when a live server accepts connections on `path` (not just a leftover file)."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class EmbeddingServer:
+    """
+    Accepts connections on a Unix socket and answers ("embed", texts) with a
+    float32 array of vectors, ("stats",) with the batcher's counters. Each
+    connection gets a thread; all of them submit to one EmbeddingBatcher, whose
+    worker thread owns the model.
+    """
+
+    def __init__(self, batcher, path: str = EMBEDDING_SERVER_SOCKET, authkey: bytes = EMBEDDING_SERVER_AUTHKEY):
+        if not path:
+            raise ValueError("EMBEDDING_SERVER_SOCKET is not set")
+        authkey = _require_authkey(authkey)
+        self.batcher = batcher
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            if _socket_in_use(path):
+                raise RuntimeError(f"An embedding server is already listening on {path}")
+            # Left behind by a server that didn't shut down cleanly
+            os.unlink(path)
+        self._listener = Listener(path, family="AF_UNIX", authkey=authkey)
+        os.chmod(path, 0o600)
+        self._clients = 0
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        print(f"[INFO] Embedding server listening on {self.path}")
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break  # listener closed
+            except Exception as e:
+                # e.g. a client with the wrong authkey
+                print(f"[WARN] Embedding server rejected a connection: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name="embedding-client", daemon=True).start()
+
+    def _serve(self, conn):
+        with self._lock:
+            self._clients += 1
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break  # client went away
+                try:
+                    if message[0] == "embed":
+                        vectors = self.batcher.embed_texts(message[1])
+                        reply = ("ok", np.asarray(vectors, dtype=np.float32))
+                    elif message[0] == "stats":
+                        reply = ("ok", self.stats())
+                    else:
+                        reply = ("error", f"unknown request: {message[0]!r}")
+                except Exception as e:
+                    print(f"[ERROR] Embedding request failed: {e}")
+                    reply = ("error", str(e))
+                try:
+                    conn.send(reply)
+                except OSError:
+                    break
+        finally:
+            conn.close()
+            with self._lock:
+                self._clients -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            clients = self._clients
+        return {"clients": clients, **self.batcher.stats()}
+
+    def close(self):
+        self._listener.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RemoteEmbedder:
+    """
+    Embedder-compatible client of an EmbeddingServer. Each calling thread keeps
+    its own connection; a dropped connection (e.g. the server restarted) is
+    reopened once per call.
+    """
+
+    def __init__(
+        self,
+        path: str = EMBEDDING_SERVER_SOCKET,
+        authkey: bytes = EMBEDDING_SERVER_AUTHKEY,
+        timeout: float = EMBEDDING_SERVER_TIMEOUT_SECONDS,
+    ):
+        self.path = path
+        self.authkey = _require_authkey(authkey)
+        self.timeout = timeout
+        self._local = threading.local()
+        # Fail at startup (and in the warm-up) when the server isn't running
+        self._connection()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.path, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def _call(self, message):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send(message)
+                if not conn.poll(self.timeout):
+                    # A late reply would be read as the answer to the next request
+                    self._drop()
+                    raise TimeoutError(f"Embedding server did not answer within {self.timeout}s")
+                status, result = conn.recv()
+                break
+            except (EOFError, ConnectionError, BrokenPipeError):
+                self._drop()
+                if attempt:
+                    raise
+                print("[WARN] Embedding server connection lost, reconnecting")
+        if status != "ok":
+            raise RuntimeError(f"Embedding server error: {result}")
+        return result
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of texts into vectors."""
+        if not texts:
+            return []
+        return self._call(("embed", list(texts))).tolist()
+
+    def embed(self, text: str) -> list[float]:
+        """Embed a single text string into a vector."""
+        return self.embed_texts([text])[0]
+
+    def stats(self) -> dict:
+        return self._call(("stats",))
+
+
+def main(args):
+    from backend.app.services.embeddings.batcher import EmbeddingBatcher
+    from backend.app.services.embeddings.embedder import Embedder
+
+    embedder = Embedder()
+    embedder.embed_texts(["warm-up"])
+    server = EmbeddingServer(EmbeddingBatcher(embedder), path=args.socket)
+    # Process managers stop the server with SIGTERM; remove the socket then too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        print("[INFO] Embedding server stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=EMBEDDING_SERVER_SOCKET, help="Unix socket path (default: EMBEDDING_SERVER_SOCKET)")
+    main(parser.parse_args())
@@ -0,0 +1,122 @@
+import os
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from backend.app.services.embeddings.config import EMBEDDING_MODEL_NAME
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except Exception:
+    TOKENIZERS_AVAILABLE = False
+
+# Optional local tokenizer.json, e.g. for offline workers
+EMBEDDING_TOKENIZER_PATH = os.getenv("EMBEDDING_TOKENIZER_PATH")
+
+# Without the tokenizer, tokens are estimated from words (word pieces per English word)
+TOKENS_PER_WORD = 1.3
+
+
+_UNRESOLVED = object()
+_tokenizer_path = _UNRESOLVED
+
+
+def _resolve_tokenizer_path() -> Optional[str]:
+    if EMBEDDING_TOKENIZER_PATH:
+        return EMBEDDING_TOKENIZER_PATH
+    # Shares the Hugging Face cache with sentence-transformers
+    from huggingface_hub import hf_hub_download
+    try:
+        # No network round-trip (and no retries when offline) once it is cached
+        return hf_hub_download(EMBEDDING_MODEL_NAME, "tokenizer.json", local_files_only=True)
+    except Exception:
+        pass
+    try:
+        return hf_hub_download(EMBEDDING_MODEL_NAME, "tokenizer.json")
+    except Exception as e:
+        print(f"[WARN] Could not load tokenizer for {EMBEDDING_MODEL_NAME}, estimating tokens from words: {e}")
+        return None
+
+
+def tokenizer_path() -> Optional[str]:
+    """Local tokenizer.json of the embedding model, resolved once per process (None if unavailable)."""
+    global _tokenizer_path
+    if _tokenizer_path is _UNRESOLVED:
+        _tokenizer_path = _resolve_tokenizer_path() if TOKENIZERS_AVAILABLE else None
+    return _tokenizer_path
+
+
+def set_tokenizer_path(path: Optional[str]):
+    """
+    Process-pool initializer: use the path the parent resolved, so spawned
+    workers neither download nor retry on their own (None: estimate from words).
+    """
+    global _tokenizer_path
+    _tokenizer_path = path
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> Optional["Tokenizer"]:
+    """
+    The embedding model's fast (Rust) tokenizer, loaded once per process.
+    Returns None when it cannot be loaded; callers then estimate from word counts.
+    """
+    path = tokenizer_path()
+    if path is None:
+        return None
+    try:
+        tokenizer = Tokenizer.from_file(path)
+    except Exception as e:
+        print(f"[WARN] Could not load tokenizer from {path}, estimating tokens from words: {e}")
+        return None
+
+    # Count every token: the tokenizer.json may ship with truncation/padding enabled
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def _estimate_tokens(text: str) -> int:
+    return int(len(text.split()) * TOKENS_PER_WORD + 0.5)
+
+
+class TokenCounter:
+    """
+    Counts embedding-model tokens (without special tokens) for text segments.
+
+    Lengths are memoized, and `prime` encodes many segments in one batch call, so
+    a splitter that asks for the same pieces repeatedly pays for each piece once.
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer if tokenizer is not None else get_tokenizer()
+        self._lengths = {}
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def prime(self, segments: Iterable[str]):
+        """Batch-encode every segment not counted yet."""
+        missing = list({s for s in segments if s not in self._lengths})
+        if not missing:
+            return
+        if self.tokenizer is None:
+            self._lengths.update((s, _estimate_tokens(s)) for s in missing)
+            return
+        encodings = self.tokenizer.encode_batch(missing, add_special_tokens=False)
+        self._lengths.update((s, len(e.ids)) for s, e in zip(missing, encodings))
+
+    def count_many(self, texts: list[str]) -> list[int]:
+        self.prime(texts)
+        return [self._lengths[t] for t in texts]
+
+    def __call__(self, text: str) -> int:
+        length = self._lengths.get(text)
+        if length is None:
+            if self.tokenizer is None:
+                length = _estimate_tokens(text)
+            else:
+                length = len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+            self._lengths[text] = length
+        return length
@@ -1,27 +1,69 @@
+import os
+from concurrent.futures import Executor
+
 import fitz # pyright: ignore[reportMissingImports]
 
+# Documents with at least this many pages are split across worker processes
+PARALLEL_MIN_PAGES = int(os.getenv("EXTRACT_PARALLEL_MIN_PAGES", 64))
+# Pages per worker task; each task reopens the PDF bytes, so keep ranges coarse
+PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", 16))
+
+
 def extract_text_from_pdf(file_path: str) -> str:
     """
     Extracts text from a PDF file using PyMuPDF.
     Returns the full text as a single string.
     """
-    text_content = []
     with fitz.open(file_path) as pdf:
-        for page_num, page in enumerate(pdf, start=1):
-            text = page.get_text()
-            if text:
-                text_content.append(text)
-    return "\n".join(text_content)
+        return "\n".join(_page_texts(pdf))
 
 def extract_text_from_pdf_bytes(file_bytes: bytes) -> str:
     """
     Extracts text form a PDF file provided as raw bytes.
     Useful when downloading directly from Google Drive.
     """
-    text_content = []
     with fitz.open(stream=file_bytes, filetype="pdf") as pdf:
-        for page_num, page in enumerate(pdf, start=1):
-            text = page.get_text()
-            if text:
-                text_content.append(text)
-    return "\n".join(text_content)
\ No newline at end of file
+        return "\n".join(_page_texts(pdf))
+
+
+def page_count(file_bytes: bytes) -> int:
+    with fitz.open(stream=file_bytes, filetype="pdf") as pdf:
+        return pdf.page_count
+
+
+def _page_texts(pdf, start: int = 0, stop: int = None) -> list[str]:
+    texts = []
+    for page_num in range(start, pdf.page_count if stop is None else stop):
+        text = pdf[page_num].get_text()
+        if text:
+            texts.append(text)
+    return texts
+
+
+def page_ranges(file_bytes: bytes, pages_per_task: int = PAGES_PER_TASK) -> list[tuple[int, int]]:
+    """
+    [start, stop) page ranges to extract in parallel, or [] when the document is
+    too small to be worth splitting. Runs in a worker process.
+    """
+    total = page_count(file_bytes)
+    if total < PARALLEL_MIN_PAGES:
+        return []
+    return [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+
+
+def extract_page_range(file_bytes: bytes, start: int, stop: int) -> list[str]:
+    """Text of the non-empty pages in [start, stop). Runs in a worker process."""
+    with fitz.open(stream=file_bytes, filetype="pdf") as pdf:
+        return _page_texts(pdf, start, stop)
+
+
+def extract_text_parallel(file_bytes: bytes, ranges: list[tuple[int, int]], executor: Executor) -> str:
+    """
+    Extract `ranges` (from page_ranges) on `executor`'s worker processes, each
+    opening the same bytes, and join the pages in order.
+
+    The calling process never opens the PDF: PyMuPDF is not thread-safe, and the
+    ingest pipeline extracts several files at once from its threads.
+    """
+    futures = [executor.submit(extract_page_range, file_bytes, start, stop) for start, stop in ranges]
+    return "\n".join(text for future in futures for text in future.result())
@@ -0,0 +1,40 @@
+import os
+import time
+
+# Simulated latencies, so benchmarks see realistic time-to-first-token and token rate
+FAKE_LLM_FIRST_TOKEN_SECONDS = float(os.getenv("FAKE_LLM_FIRST_TOKEN_SECONDS", 0.3))
+FAKE_LLM_TOKEN_SECONDS = float(os.getenv("FAKE_LLM_TOKEN_SECONDS", 0.01))
+FAKE_LLM_ANSWER_WORDS = int(os.getenv("FAKE_LLM_ANSWER_WORDS", 120))
+
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Offline stand-in for `genai.GenerativeModel`, used when LLM_BACKEND=fake.
+    Produces a deterministic answer built from the prompt's words with simulated
+    latency, for tests and benchmarks that must not call Gemini.
+    """
+
+    def __init__(self, model_name: str = "fake"):
+        self.model_name = model_name
+
+    def _words(self, prompt: str) -> list[str]:
+        words = prompt.split()[-FAKE_LLM_ANSWER_WORDS:] or ["(empty)"]
+        return [f"{w} " for w in words]
+
+    def _stream(self, prompt: str):
+        time.sleep(FAKE_LLM_FIRST_TOKEN_SECONDS)
+        for word in self._words(prompt):
+            yield _FakeChunk(word)
+            time.sleep(FAKE_LLM_TOKEN_SECONDS)
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: dict = None):
+        if stream:
+            return self._stream(prompt)
+        words = self._words(prompt)
+        time.sleep(FAKE_LLM_FIRST_TOKEN_SECONDS + FAKE_LLM_TOKEN_SECONDS * len(words))
+        return _FakeChunk("".join(words))
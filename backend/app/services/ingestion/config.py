@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+# Concurrency per pipeline stage (overridable from the environment)
+DOWNLOAD_WORKERS = int(os.getenv("INGEST_DOWNLOAD_WORKERS", 4))   # threads fetching PDFs from Drive
+EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", os.cpu_count() or 2))  # processes running PyMuPDF + chunking
+UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", 2))       # threads writing to the vector store
+
+# Embedding stage: number of chunks gathered across documents per model call
+EMBED_BATCH_CHUNKS = int(os.getenv("INGEST_EMBED_BATCH_CHUNKS", 128))
+EMBED_MAX_WAIT_SECONDS = float(os.getenv("INGEST_EMBED_MAX_WAIT_SECONDS", 0.2))
+
+# Backpressure: max items waiting between two stages
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 8))
+
+# Chunking parameters used during ingestion
+CHUNK_SIZE = 250     # embedding-model tokens; all-MiniLM-L6-v2 reads at most 256
+CHUNK_OVERLAP = 25
+
+# Near-duplicate chunk removal, optionally against chunks already stored for the subject.
+# Off by default: a chunk dropped for matching another file is lost from the index
+# when that file is deleted, and the unchanged file is never re-ingested to restore it
+SEMANTIC_DEDUPE = os.getenv("INGEST_SEMANTIC_DEDUPE", "true").lower() == "true"
+DEDUPE_AGAINST_STORED = os.getenv("INGEST_DEDUPE_AGAINST_STORED", "false").lower() == "true"
+
+# Per-file ingest manifest (SQLite, WAL mode)
+MANIFEST_PATH = Path(os.getenv("INGEST_MANIFEST_PATH", Path(__file__).parent.parent.parent / "db" / "manifest.sqlite3"))
+# A sync lease not renewed for this long is considered abandoned (crashed worker)
+SYNC_LEASE_SECONDS = float(os.getenv("SYNC_LEASE_SECONDS", 600))
+
+# Vector store writes: points are buffered across files and sent in fixed-size batches
+UPSERT_BATCH_POINTS = int(os.getenv("INGEST_UPSERT_BATCH_POINTS", 256))
+UPSERT_PARALLEL = int(os.getenv("INGEST_UPSERT_PARALLEL", 4))      # batches in flight at once
+UPSERT_MAX_DELAY_SECONDS = float(os.getenv("INGEST_UPSERT_MAX_DELAY_SECONDS", 1.0))  # send a partial batch after this
+# false: Qdrant acknowledges before applying; the writer ends each run with one waited write
+UPSERT_WAIT = os.getenv("INGEST_UPSERT_WAIT", "true").lower() == "true"
+UPSERT_MAX_RETRIES = int(os.getenv("INGEST_UPSERT_MAX_RETRIES", 5))
+UPSERT_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_UPSERT_RETRY_BACKOFF_SECONDS", 0.5))
@@ -0,0 +1,9 @@
+from backend.app.services.ingestion.manifest import ManifestStore
+from backend.app.services.lazy import Lazy
+
+# Opened (and its directory created) on first use, not at import
+manifest_store = Lazy("ingest manifest", ManifestStore)
+
+
+def get_manifest_store() -> ManifestStore:
+    return manifest_store.get()
@@ -0,0 +1,140 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable
+
+from backend.app.services.ingestion.manifest import SyncInProgressError
+
+# Finished jobs kept around for GET /api/sync-drive/{job_id}
+MAX_FINISHED_JOBS = 20
+
+
+class SyncJob:
+    """State and progress counters for one background Drive sync."""
+
+    def __init__(self, batch_size: int):
+        self.id = uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.status = "queued"          # queued / running / completed / failed / cancelled
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.files_total = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.chunks_stored = 0
+        self.error = None
+        self.summary = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    # Progress hooks called by sync_drive_folder from pipeline threads
+
+    def planned(self, files_total: int):
+        with self._lock:
+            self.files_total = files_total
+
+    def file_done(self, chunk_count: int):
+        with self._lock:
+            self.files_done += 1
+            self.chunks_stored += chunk_count
+
+    def file_failed(self):
+        with self._lock:
+            self.files_failed += 1
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            now = self.finished_at or time.time()
+            elapsed = now - self.started_at if self.started_at else 0.0
+            processed = self.files_done + self.files_failed
+            rate = processed / elapsed if elapsed else 0.0
+            remaining = max(0, self.files_total - processed)
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "cancel_requested": self.cancel_event.is_set(),
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "files_failed": self.files_failed,
+                "chunks_stored": self.chunks_stored,
+                "elapsed_seconds": round(elapsed, 1),
+                "files_per_sec": round(rate, 3),
+                "chunks_per_sec": round(self.chunks_stored / elapsed, 2) if elapsed else 0.0,
+                "eta_seconds": round(remaining / rate, 1) if rate and not self.finished else None,
+                "error": self.error,
+                "summary": self.summary,
+            }
+
+
+class SyncJobManager:
+    """
+    Runs Drive syncs on a background thread, one at a time, so the API stays
+    responsive while a large ingest runs. The lease of the ManifestStore returned
+    by `lease()` is taken before a job is accepted, so a sync already running in
+    another API worker or the CLI is refused up front instead of failing in the
+    background. The job's lease token is passed to `sync_fn`, which keeps it renewed.
+    """
+
+    def __init__(self, sync_fn: Callable[..., dict], lease: Callable = None):
+        self.sync_fn = sync_fn
+        self.lease = lease
+        self._jobs = OrderedDict()
+        self._active = None
+        self._lock = threading.Lock()
+
+    def start(self, batch_size: int = 5) -> SyncJob:
+        with self._lock:
+            if self._active is not None and not self._active.finished:
+                raise SyncInProgressError(f"Drive sync {self._active.id} is already running")
+            # Raises SyncInProgressError while another process holds it
+            token = self.lease().acquire_lease() if self.lease is not None else None
+            job = SyncJob(batch_size)
+            self._active = job
+            self._jobs[job.id] = job
+            self._prune()
+
+        threading.Thread(target=self._run, args=(job, token), name=f"sync-job-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> SyncJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> SyncJob | None:
+        """Stop feeding new files; files already in the pipeline are dropped at the next stage."""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+        return job
+
+    def _run(self, job: SyncJob, token: str | None):
+        job.status = "running"
+        job.started_at = time.time()
+        status, error = "failed", None
+        try:
+            job.summary = self.sync_fn(job.batch_size, progress=job, cancel_event=job.cancel_event, lease=token)
+            status = "cancelled" if job.cancel_event.is_set() else "completed"
+        except Exception as e:
+            print(f"[ERROR] Drive sync {job.id} failed: {e}")
+            error = str(e)
+        finally:
+            if token is not None:
+                self.lease().release_lease(token)
+            # Publish the final status only once the lease is free
+            job.error = error
+            job.finished_at = time.time()
+            job.status = status
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
@@ -0,0 +1,286 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from backend.app.services.ingestion import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id           TEXT PRIMARY KEY,
+    name              TEXT,
+    subject_code      TEXT,
+    status            TEXT NOT NULL,      -- queued / downloaded / extracted / embedded / stored / failed
+    -- Version of the file whose points are currently in the vector store
+    modified_time     TEXT,
+    md5               TEXT,
+    content_hash      TEXT,
+    chunk_count       INTEGER NOT NULL DEFAULT 0,
+    chunk_ids         TEXT,               -- JSON list of point ids
+    legacy            INTEGER NOT NULL DEFAULT 0,
+    -- Last ingest attempt
+    download_seconds  REAL,
+    extract_seconds   REAL,
+    embed_seconds     REAL,
+    upsert_seconds    REAL,
+    error             TEXT,
+    updated_at        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_status ON files(status);
+CREATE INDEX IF NOT EXISTS idx_files_subject ON files(subject_code);
+
+CREATE TABLE IF NOT EXISTS sync_lease (
+    id          INTEGER PRIMARY KEY CHECK (id = 1),
+    owner       TEXT NOT NULL,
+    expires_at  REAL NOT NULL
+);
+"""
+
+STAGE_STATUS = {
+    "download": "downloaded",
+    "extract": "extracted",
+    "embed": "embedded",
+}
+
+
+class SyncInProgressError(RuntimeError):
+    """Raised when another sync already holds the manifest lease."""
+    pass
+
+
+class ManifestStore:
+    """
+    Transactional per-file ingest state in SQLite (WAL mode), keyed by Drive file id.
+
+    Every status change is committed immediately, so a crashed or restarted sync
+    resumes from the files that never reached `stored`. A lease row keeps two
+    syncs (even in different API workers) from ingesting at the same time; each
+    acquisition gets its own token, and only that token renews or releases it.
+    """
+
+    def __init__(self, path: Path = config.MANIFEST_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    # ------------------------------------------------------------------ reads
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        record = dict(row)
+        record["chunk_ids"] = json.loads(record["chunk_ids"]) if record["chunk_ids"] else []
+        record["legacy"] = bool(record["legacy"])
+        return record
+
+    def get_all(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM files").fetchall()
+        return {row["file_id"]: self._to_dict(row) for row in rows}
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def summary(self) -> dict:
+        """Ingest progress: file counts per status and total stored chunks."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS files, SUM(chunk_count) AS chunks FROM files GROUP BY status"
+            ).fetchall()
+        by_status = {row["status"]: row["files"] for row in rows}
+        return {
+            "files": sum(by_status.values()),
+            "by_status": by_status,
+            "chunks_stored": sum(row["chunks"] or 0 for row in rows if row["status"] == "stored"),
+        }
+
+    def list_files(self, status: str = None, slowest: bool = False, limit: int = 50) -> list[dict]:
+        """Files filtered by status, optionally ordered by total ingest time."""
+        query = "SELECT * FROM files"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        if slowest:
+            query += (
+                " ORDER BY COALESCE(download_seconds, 0) + COALESCE(extract_seconds, 0)"
+                " + COALESCE(embed_seconds, 0) + COALESCE(upsert_seconds, 0) DESC"
+            )
+        else:
+            query += " ORDER BY updated_at DESC"
+        query += " LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        files = []
+        for row in rows:
+            record = self._to_dict(row)
+            record.pop("chunk_ids")
+            files.append(record)
+        return files
+
+    # ----------------------------------------------------------------- writes
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def mark_queued(self, item: dict):
+        """Record a file picked up by this run, keeping its last stored version."""
+        self._execute(
+            """
+            INSERT INTO files (file_id, name, subject_code, status, error, updated_at)
+            VALUES (?, ?, ?, 'queued', NULL, ?)
+            ON CONFLICT(file_id) DO UPDATE SET
+                name = excluded.name,
+                subject_code = excluded.subject_code,
+                status = 'queued',
+                error = NULL,
+                download_seconds = NULL, extract_seconds = NULL,
+                embed_seconds = NULL, upsert_seconds = NULL,
+                updated_at = excluded.updated_at
+            """,
+            (item["id"], item["name"], item["subject_code"], time.time()),
+        )
+
+    def mark_stage(self, file_id: str, stage: str, seconds: float):
+        self._execute(
+            f"UPDATE files SET status = ?, {stage}_seconds = ?, updated_at = ? WHERE file_id = ?",
+            (STAGE_STATUS[stage], seconds, time.time(), file_id),
+        )
+
+    def mark_failed(self, file_id: str, stage: str, error: str):
+        self._execute(
+            "UPDATE files SET status = 'failed', error = ?, updated_at = ? WHERE file_id = ?",
+            (f"{stage}: {error}", time.time(), file_id),
+        )
+
+    def mark_stored(self, item: dict, chunk_ids: list[str], upsert_seconds: float = None):
+        self._execute(
+            """
+            UPDATE files SET
+                status = 'stored', modified_time = ?, md5 = ?, content_hash = ?,
+                chunk_count = ?, chunk_ids = ?, legacy = 0, error = NULL,
+                upsert_seconds = ?, updated_at = ?
+            WHERE file_id = ?
+            """,
+            (
+                item.get("modified_time"), item.get("md5"), item.get("content_hash"),
+                len(chunk_ids), json.dumps(chunk_ids), upsert_seconds, time.time(), item["id"],
+            ),
+        )
+
+    def update_version(self, file_id: str, modified_time: str, md5: str):
+        """Refresh Drive metadata for a file whose content is unchanged."""
+        self._execute(
+            "UPDATE files SET modified_time = ?, md5 = ?, updated_at = ? WHERE file_id = ?",
+            (modified_time, md5, time.time(), file_id),
+        )
+
+    def adopt_legacy(self, file_id: str, name: str, subject_code: str, modified_time: str, md5: str):
+        self._execute(
+            """
+            UPDATE files SET name = ?, subject_code = ?, modified_time = ?, md5 = ?, updated_at = ?
+            WHERE file_id = ?
+            """,
+            (name, subject_code, modified_time, md5, time.time(), file_id),
+        )
+
+    def delete(self, file_id: str):
+        self._execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def import_processed_files(self, records: dict):
+        """One-off import of the old processed_files.json manifest."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for file_id, record in records.items():
+                chunk_ids = record.get("chunk_ids")
+                self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO files (
+                        file_id, name, subject_code, status, modified_time, md5, content_hash,
+                        chunk_count, chunk_ids, legacy, updated_at
+                    ) VALUES (?, ?, ?, 'stored', ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        file_id, record.get("name"), record.get("subject_code"),
+                        record.get("modified_time"), record.get("md5"), record.get("content_hash"),
+                        len(chunk_ids or []), json.dumps(chunk_ids or []),
+                        int(bool(record.get("legacy")) or chunk_ids is None), now,
+                    ),
+                )
+            self._conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------ lease
+
+    def acquire_lease(self, ttl: float = config.SYNC_LEASE_SECONDS) -> str:
+        """
+        Take the sync lease and return its token, or raise SyncInProgressError if
+        another live sync holds it (in this process or any other).
+        """
+        token = f"{self.owner}:{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT owner, expires_at FROM sync_lease WHERE id = 1").fetchone()
+                if row and row["expires_at"] > now:
+                    raise SyncInProgressError("A Drive sync is already running")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sync_lease (id, owner, expires_at) VALUES (1, ?, ?)",
+                    (token, now + ttl),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return token
+
+    def renew_lease(self, token: str, ttl: float = config.SYNC_LEASE_SECONDS) -> bool:
+        """Extend the lease; False if `token` no longer holds it (e.g. it expired and was taken)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sync_lease SET expires_at = ? WHERE id = 1 AND owner = ?",
+                (time.time() + ttl, token),
+            )
+            return cursor.rowcount > 0
+
+    def release_lease(self, token: str):
+        self._execute("DELETE FROM sync_lease WHERE id = 1 AND owner = ?", (token,))
+
+    @contextmanager
+    def lease_heartbeat(self, token: str, ttl: float = config.SYNC_LEASE_SECONDS):
+        """
+        Renew the lease every ttl/3 from a background thread while the block runs,
+        so a long Drive listing or extraction can't let it expire mid-sync.
+        """
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(ttl / 3):
+                try:
+                    if not self.renew_lease(token, ttl):
+                        print("[WARN] Sync lease was lost; another sync may start")
+                except Exception as e:
+                    print(f"[WARN] Sync lease renewal failed: {e}")
+
+        thread = threading.Thread(target=beat, name="sync-lease-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
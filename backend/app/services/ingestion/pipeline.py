@@ -0,0 +1,417 @@
+import hashlib
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable
+
+import backend.app.services.extractor as ext
+from backend.app.services.embeddings.ids import chunk_point_id
+from backend.app.services.embeddings.tokenizer import set_tokenizer_path, tokenizer_path
+from backend.app.services.ingestion import config
+from backend.app.services.ingestion.writer import BulkWriter
+
+# Sentinel passed down a queue once the producing stage has finished
+_DONE = object()
+
+
+def chunk_extracted_text(extracted_text: str, existing_chunks: list[str] = None) -> list[str]:
+    """
+    Split extracted PDF text into chunks. Runs in a worker process.
+    Newline and blank-line normalization happens in the cleaner's single pass.
+    """
+    # Imported here so the API process, which only schedules work, never loads the
+    # chunking stack (LangChain, scikit-learn, tokenizer)
+    from backend.app.services.chunking.chunker import chunk_text
+
+    # Drop lone surrogates PyMuPDF can emit; they cannot be encoded for the embedder
+    extracted_text = extracted_text.encode("utf-8", errors="ignore").decode("utf-8")
+    return chunk_text(
+        extracted_text,
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        use_semantic_dedupe=config.SEMANTIC_DEDUPE,
+        existing_chunks=existing_chunks,
+    )
+
+
+def extract_and_chunk(file_bytes: bytes, existing_chunks: list[str] = None) -> list[str]:
+    """
+    Extract text from PDF bytes and split it into chunks.
+    Runs inside a worker process, so it must stay a top-level function.
+    """
+    return chunk_extracted_text(ext.extract_text_from_pdf_bytes(file_bytes), existing_chunks)
+
+
+class StageStats:
+    """Thread-safe throughput counters for a single pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.chunks = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.perf_counter()
+
+    def record(self, seconds: float, items: int = 1, chunks: int = 0):
+        with self._lock:
+            self.items += items
+            self.chunks += chunks
+            self.busy_seconds += seconds
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def as_dict(self) -> dict:
+        wall = 0.0
+        if self.started_at is not None:
+            wall = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "items_per_sec": round(self.items / wall, 2) if wall else 0.0,
+            "chunks_per_sec": round(self.chunks / wall, 2) if wall else 0.0,
+            # Busy time over available worker time; the stage closest to 1.0 is the bottleneck
+            "utilization": round(self.busy_seconds / (wall * self.workers), 2) if wall else 0.0,
+        }
+
+
+class IngestPipeline:
+    """
+    Staged ingestion pipeline connected by bounded queues:
+
+        download (threads) → extract + chunk (processes) → embed (batched) → upsert (threads)
+
+    The upsert stage hands each file's points to a BulkWriter, which writes them in
+    fixed-size batches across files; a file counts as stored once all of its points
+    are written.
+
+    Every stage runs concurrently with the others, so total wall time is set by the
+    slowest stage instead of the sum of all of them. Full queues block the upstream
+    stage, which keeps memory bounded when one stage falls behind.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        store,
+        download_fn: Callable[[str], bytes],
+        on_stored: Callable[[dict, int], None] = None,
+        skip_if: Callable[[dict], bool] = None,
+        on_skipped: Callable[[dict], None] = None,
+        on_progress: Callable[[dict, str], None] = None,
+        on_failed: Callable[[dict, str, str], None] = None,
+        cancel_event: threading.Event = None,
+        keyword_index=None,
+        download_workers: int = config.DOWNLOAD_WORKERS,
+        extract_workers: int = config.EXTRACT_WORKERS,
+        upsert_workers: int = config.UPSERT_WORKERS,
+        embed_batch_chunks: int = config.EMBED_BATCH_CHUNKS,
+        embed_max_wait: float = config.EMBED_MAX_WAIT_SECONDS,
+        queue_size: int = config.QUEUE_SIZE,
+    ):
+        self.embedder = embedder
+        self.store = store
+        self.download_fn = download_fn
+        self.on_stored = on_stored
+        self.skip_if = skip_if
+        self.on_skipped = on_skipped
+        self.on_progress = on_progress
+        self.on_failed = on_failed
+        self.cancel_event = cancel_event or threading.Event()
+        self.keyword_index = keyword_index
+        self.download_workers = max(1, download_workers)
+        self.extract_workers = max(1, extract_workers)
+        self.upsert_workers = max(1, upsert_workers)
+        self.embed_batch_chunks = max(1, embed_batch_chunks)
+        self.embed_max_wait = embed_max_wait
+        self.queue_size = max(1, queue_size)
+
+        self.stats = {
+            "download": StageStats("download", self.download_workers),
+            "extract": StageStats("extract", self.extract_workers),
+            "embed": StageStats("embed", 1),
+            "upsert": StageStats("upsert", self.upsert_workers),
+        }
+        self.skipped = 0
+        self.files_stored = 0
+        self.chunks_stored = 0
+        self.errors = []
+        self._lock = threading.Lock()
+        self._pool = None
+        self._writer = None
+
+    # ------------------------------------------------------------------ stages
+
+    def _download(self, job: dict) -> dict | None:
+        item = job["file"]
+        print(f"⬇️ Downloading {item['name']}")
+        job["bytes"] = self.download_fn(item["id"])
+        item["content_hash"] = hashlib.sha256(job["bytes"]).hexdigest()
+
+        # Drive metadata changed but the bytes didn't: nothing to re-embed
+        if self.skip_if and self.skip_if(item):
+            with self._lock:
+                self.skipped += 1
+            if self.on_skipped:
+                self.on_skipped(item)
+            return None
+        return job
+
+    def _extract(self, job: dict) -> dict | None:
+        file_bytes = job.pop("bytes")
+        item = job["file"]
+        existing = None
+        if config.SEMANTIC_DEDUPE and config.DEDUPE_AGAINST_STORED:
+            # Other files' chunks for this subject; the file's own old chunks get replaced
+            existing = self.store.fetch_subject_texts(item["subject_code"], exclude_file_id=item["id"])
+
+        # Counted in a worker: PyMuPDF is not thread-safe, so no extract thread opens the PDF
+        ranges = self._pool.submit(ext.page_ranges, file_bytes).result()
+        if ranges:
+            # Large packs: spread page ranges over the pool, then chunk in one task
+            text = ext.extract_text_parallel(file_bytes, ranges, self._pool)
+            job["chunks"] = self._pool.submit(chunk_extracted_text, text, existing).result()
+        else:
+            job["chunks"] = self._pool.submit(extract_and_chunk, file_bytes, existing).result()
+        if not job["chunks"]:
+            # Nothing to embed, but the file still counts as processed
+            self._stored(job["file"], 0)
+            return None
+        return job
+
+    def _upsert(self, job: dict) -> None:
+        item, chunks = job["file"], job["chunks"]
+        payloads = [
+            {"chunk_index": i, "text": chunks[i], "subject_code": item["subject_code"], "file_id": item["id"]}
+            for i in range(len(chunks))
+        ]
+        ids = [chunk_point_id(item["id"], i) for i in range(len(chunks))]
+
+        def on_done(seconds: float):
+            item.setdefault("timings", {})["upsert"] = seconds
+            if self.keyword_index is not None:
+                try:
+                    self.keyword_index.add(ids, payloads)
+                except Exception as e:
+                    # The vectors are stored; the chunks are only missing from keyword search
+                    print(f"[ERROR] Keyword indexing failed for {item['name']}: {e}")
+            # Raising here fails only this file: the writer passes the error to on_error
+            self._stored(item, len(chunks))
+            with self._lock:
+                self.files_stored += 1
+                self.chunks_stored += len(chunks)
+
+        def on_error(error: Exception):
+            self.stats["upsert"].error()
+            self._failed(job, "upsert", error)
+
+        # Blocks while too many batches are in flight, which backs up the embed stage
+        self._writer.add(ids, job["vectors"], payloads, on_done=on_done, on_error=on_error)
+
+    def _embed_loop(self, inbox: queue.Queue, outbox: queue.Queue):
+        """Gather chunks across documents into one model call per batch."""
+        stats = self.stats["embed"]
+        stats.start()
+        finished = False
+
+        while not finished:
+            job = inbox.get()
+            if job is _DONE:
+                break
+
+            batch, count = [job], len(job["chunks"])
+            deadline = time.monotonic() + self.embed_max_wait
+            while count < self.embed_batch_chunks:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = inbox.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if nxt is _DONE:
+                    finished = True
+                    break
+                batch.append(nxt)
+                count += len(nxt["chunks"])
+
+            if self.cancel_event.is_set():
+                continue
+
+            texts = [chunk for j in batch for chunk in j["chunks"]]
+            start = time.perf_counter()
+            try:
+                vectors = self.embedder.embed_texts(texts)
+            except Exception as e:
+                for j in batch:
+                    stats.error()
+                    self._failed(j, "embed", e)
+                continue
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed, items=len(batch), chunks=len(texts))
+
+            offset = 0
+            for j in batch:
+                n = len(j["chunks"])
+                j["vectors"] = vectors[offset:offset + n]
+                offset += n
+                self._progress(j["file"], "embed", elapsed)
+                outbox.put(j)
+
+        stats.finish()
+        for _ in range(self.upsert_workers):
+            outbox.put(_DONE)
+
+    # ----------------------------------------------------------------- helpers
+
+    def _stored(self, item: dict, chunk_count: int):
+        if self.on_stored:
+            self.on_stored(item, chunk_count)
+
+    def _progress(self, item: dict, stage: str, seconds: float):
+        item.setdefault("timings", {})[stage] = seconds
+        if self.on_progress:
+            self.on_progress(item, stage)
+
+    def _failed(self, job: dict, stage: str, error: Exception):
+        name = job["file"]["name"]
+        print(f"[ERROR] {stage} failed for {name}: {error}")
+        with self._lock:
+            self.errors.append({"file_id": job["file"]["id"], "name": name, "stage": stage, "error": str(error)})
+        if self.on_failed:
+            self.on_failed(job["file"], stage, str(error))
+
+    def _start_stage(
+        self,
+        name: str,
+        workers: int,
+        handler: Callable[[dict], dict | None],
+        inbox: queue.Queue,
+        outbox: queue.Queue | None,
+        downstream_workers: int,
+    ) -> list[threading.Thread]:
+        """Start `workers` threads that apply `handler` to every job in `inbox`."""
+        stats = self.stats[name]
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def worker():
+            stats.start()
+            while True:
+                job = inbox.get()
+                if job is _DONE:
+                    break
+                if self.cancel_event.is_set():
+                    # Keep draining so upstream stages never block on a full queue
+                    continue
+                start = time.perf_counter()
+                try:
+                    result = handler(job)
+                except Exception as e:
+                    stats.error()
+                    self._failed(job, name, e)
+                    continue
+                elapsed = time.perf_counter() - start
+                stats.record(elapsed, chunks=len(job.get("chunks") or []))
+                if result is not None and outbox is not None:
+                    self._progress(job["file"], name, elapsed)
+                    outbox.put(result)
+
+            # The last worker to exit closes the downstream queue
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                stats.finish()
+                if outbox is not None:
+                    for _ in range(downstream_workers):
+                        outbox.put(_DONE)
+
+        threads = [
+            threading.Thread(target=worker, name=f"ingest-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        return threads
+
+    # --------------------------------------------------------------------- run
+
+    def run(self, files: Iterable[dict]) -> dict:
+        """
+        Ingest `files` (dicts with id, name and subject_code) and block until every
+        stage has drained. Returns a summary with per-stage throughput counters.
+        """
+        started = time.perf_counter()
+        download_q = queue.Queue(maxsize=self.queue_size)
+        extract_q = queue.Queue(maxsize=self.queue_size)
+        embed_q = queue.Queue(maxsize=self.queue_size)
+        upsert_q = queue.Queue(maxsize=self.queue_size)
+        self._writer = BulkWriter(self.store)
+
+        # "spawn" keeps worker processes clear of locks held by the parent's threads;
+        # workers get the tokenizer file resolved here instead of each looking it up
+        with ProcessPoolExecutor(
+            max_workers=self.extract_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_tokenizer_path,
+            initargs=(tokenizer_path(),),
+        ) as pool:
+            self._pool = pool
+            threads = []
+            threads += self._start_stage("download", self.download_workers, self._download, download_q, extract_q, self.extract_workers)
+            threads += self._start_stage("extract", self.extract_workers, self._extract, extract_q, embed_q, 1)
+            embed_thread = threading.Thread(target=self._embed_loop, args=(embed_q, upsert_q), name="ingest-embed", daemon=True)
+            embed_thread.start()
+            threads.append(embed_thread)
+            threads += self._start_stage("upsert", self.upsert_workers, self._upsert, upsert_q, None, 0)
+
+            submitted = 0
+            for item in files:
+                if self.cancel_event.is_set():
+                    print("[INFO] Ingest cancelled, draining in-flight files")
+                    break
+                download_q.put({"file": item})
+                submitted += 1
+            for _ in range(self.download_workers):
+                download_q.put(_DONE)
+
+            for t in threads:
+                t.join()
+            self._pool = None
+
+        # Write what is still buffered and wait until every point is searchable
+        self._writer.close()
+        writer, self._writer = self._writer, None
+
+        return {
+            "files_submitted": submitted,
+            "cancelled": self.cancel_event.is_set(),
+            "files_stored": self.files_stored,
+            "files_unchanged": self.skipped,
+            "chunks_stored": self.chunks_stored,
+            "errors": self.errors,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "stages": {name: s.as_dict() for name, s in self.stats.items()},
+            "writer": writer.stats(),
+        }
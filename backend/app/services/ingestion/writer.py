@@ -0,0 +1,247 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from backend.app.services.ingestion import config
+
+
+class _Document:
+    """Points of one document still waiting for their batch to be written."""
+
+    __slots__ = ("remaining", "on_done", "on_error", "failed", "added_at")
+
+    def __init__(self, count: int, on_done: Callable, on_error: Callable):
+        self.remaining = count
+        self.on_done = on_done
+        self.on_error = on_error
+        self.failed = False
+        self.added_at = time.perf_counter()
+
+
+class BulkWriter:
+    """
+    Buffers points across documents and writes them to the vector store in
+    fixed-size batches, `parallel` batches at a time, retrying failed batches
+    with exponential backoff.
+
+    A document's `on_done(seconds)` runs once every batch holding its points has
+    been written, or `on_error(exc)` once if any of them failed for good; an
+    exception raised by `on_done` fails that document only. With `wait=False`
+    Qdrant acknowledges a batch before applying it; `flush()` then ends with a
+    barrier: the last batch is written again with wait=True, and as updates are
+    applied in order its completion means every earlier one is visible. `on_done`
+    is held back until the barrier has passed, and a failed barrier fails every
+    document it covered.
+    """
+
+    def __init__(
+        self,
+        store,
+        batch_size: int = config.UPSERT_BATCH_POINTS,
+        parallel: int = config.UPSERT_PARALLEL,
+        wait: bool = config.UPSERT_WAIT,
+        max_retries: int = config.UPSERT_MAX_RETRIES,
+        retry_backoff: float = config.UPSERT_RETRY_BACKOFF_SECONDS,
+        max_delay: float = config.UPSERT_MAX_DELAY_SECONDS,
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.parallel = max(1, parallel)
+        self.wait = wait
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_delay = max_delay
+
+        self._pool = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="vector-write")
+        # Bounds batches submitted but not yet written, so a slow store pushes back on callers
+        self._slots = threading.BoundedSemaphore(self.parallel * 2)
+        self._lock = threading.Lock()
+        self._buffer = []          # (id, vector, payload, document)
+        self._buffer_since = None
+        self._futures = set()
+        self._last_batch = None
+        self._acknowledged = []    # (document, seconds) waiting for the wait=False barrier
+
+        self.points = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_batches = 0
+        self.callback_errors = 0
+        self.write_seconds = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    # ------------------------------------------------------------------ input
+
+    def add(self, ids: list, vectors: list, payloads: list, on_done: Callable = None, on_error: Callable = None):
+        """Queue one document's points; full batches are sent right away."""
+        document = _Document(len(ids), on_done, on_error)
+        if not ids:
+            self._complete(document, 0.0)
+            return
+
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.perf_counter()
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.extend(zip(ids, vectors, payloads, [document] * len(ids)))
+            batches = self._take_batches(force=time.monotonic() - self._buffer_since >= self.max_delay)
+        for batch in batches:
+            self._submit(batch)
+
+    def _take_batches(self, force: bool = False) -> list:
+        batches = []
+        while len(self._buffer) >= self.batch_size:
+            batches.append(self._buffer[:self.batch_size])
+            del self._buffer[:self.batch_size]
+        if force and self._buffer:
+            batches.append(self._buffer)
+            self._buffer = []
+        if self._buffer:
+            self._buffer_since = time.monotonic()
+        return batches
+
+    def _submit(self, batch: list):
+        self._slots.acquire()
+        future = self._pool.submit(self._write, batch)
+        with self._lock:
+            self._futures.add(future)
+            self._last_batch = batch
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    # ------------------------------------------------------------------ write
+
+    def _send(self, batch: list, wait: bool):
+        ids = [p[0] for p in batch]
+        vectors = [p[1] for p in batch]
+        payloads = [p[2] for p in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.store.upsert(vectors, payloads, ids=ids, wait=wait)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random())
+                with self._lock:
+                    self.retries += 1
+                print(f"[INFO] Vector write of {len(batch)} points failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _write(self, batch: list):
+        start = time.perf_counter()
+        try:
+            self._send(batch, self.wait)
+        except Exception as e:
+            with self._lock:
+                self.failed_batches += 1
+                failed = []
+                for *_, document in batch:
+                    if not document.failed:
+                        document.failed = True
+                        failed.append(document)
+            for document in failed:
+                self._fail(document, e)
+            return
+
+        now = time.perf_counter()
+        done = []
+        with self._lock:
+            self.points += len(batch)
+            self.batches += 1
+            self.write_seconds += now - start
+            self._finished_at = now
+            for *_, document in batch:
+                document.remaining -= 1
+                if document.remaining == 0 and not document.failed:
+                    done.append((document, now - document.added_at))
+            if not self.wait:
+                # Acknowledged, not yet applied: finish them after the barrier in flush()
+                self._acknowledged.extend(done)
+                return
+        for document, seconds in done:
+            self._complete(document, seconds)
+
+    def _complete(self, document: _Document, seconds: float):
+        if document.on_done is None:
+            return
+        try:
+            document.on_done(seconds)
+        except Exception as e:
+            with self._lock:
+                self.callback_errors += 1
+            self._fail(document, e)
+
+    def _fail(self, document: _Document, error: Exception):
+        document.failed = True
+        if document.on_error is None:
+            return
+        try:
+            document.on_error(error)
+        except Exception as e:
+            with self._lock:
+                self.callback_errors += 1
+            print(f"[ERROR] Vector write error handler failed: {e}")
+
+    # ------------------------------------------------------------------ drain
+
+    def flush(self):
+        """Send buffered points, wait for every batch, then apply the wait=False barrier."""
+        with self._lock:
+            batches = self._take_batches(force=True)
+        for batch in batches:
+            self._submit(batch)
+
+        while True:
+            with self._lock:
+                pending = list(self._futures)
+            if not pending:
+                break
+            for future in pending:
+                future.result()
+
+        with self._lock:
+            last, self._last_batch = self._last_batch, None
+            acknowledged, self._acknowledged = self._acknowledged, []
+        if self.wait or not last:
+            return
+        try:
+            self._send(last, wait=True)
+        except Exception as e:
+            print(f"[ERROR] Vector write barrier failed, {len(acknowledged)} documents not confirmed: {e}")
+            for document, _ in acknowledged:
+                self._fail(document, e)
+            return
+        with self._lock:
+            self._finished_at = time.perf_counter()
+        for document, seconds in acknowledged:
+            self._complete(document, seconds)
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            wall = (self._finished_at or 0) - (self._started_at or 0) if self._started_at else 0.0
+            return {
+                "points": self.points,
+                "batches": self.batches,
+                "batch_size": self.batch_size,
+                "parallel": self.parallel,
+                "wait": self.wait,
+                "retries": self.retries,
+                "failed_batches": self.failed_batches,
+                "callback_errors": self.callback_errors,
+                "write_seconds": round(self.write_seconds, 3),
+                "wall_seconds": round(max(wall, 0.0), 3),
+                "points_per_sec": round(self.points / wall, 1) if wall > 0 else 0.0,
+            }
@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Callable
+
+
+class Lazy:
+    """
+    A shared instance built on first use instead of at import.
+
+    `get()` runs `factory` once, even when several threads ask at the same time.
+    If the factory raises, nothing is cached and the next `get()` tries again,
+    so a dependency that was down at startup is picked up once it is back.
+    """
+
+    def __init__(self, name: str, factory: Callable):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self.init_seconds = None
+        self.last_error = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self.last_error = str(e)
+                    raise
+                self.init_seconds = round(time.perf_counter() - start, 3)
+                self.last_error = None
+                self._loaded = True
+                print(f"[INFO] Initialized {self.name} in {self.init_seconds}s")
+        return self._value
+
+    def peek(self):
+        """The instance if it has been built, without building it."""
+        return self._value if self._loaded else None
+
+    def reset(self):
+        """Forget the instance (returned so the caller can close it)."""
+        with self._lock:
+            value, self._value, self._loaded = self._value, None, False
+            return value
+
+    def status(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "init_seconds": self.init_seconds,
+            "error": self.last_error,
+        }
@@ -1,44 +1,231 @@
 import os
 import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from backend.app.services.circuit_breaker import CircuitBreaker
+from backend.app.services.fake_llm import FakeGenerativeModel
 
 load_dotenv()
 api_key = os.getenv("API_KEY")
-genai.configure(api_key=api_key)
 
-async def get_answer_from_context(context: list[str], question: str) -> str:
+# "gemini" (default) or "fake" for the offline stand-in used by tests and benchmarks
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_MODEL_NAME = "gemini-2.5-flash-lite"
+
+# Calls to the model run on their own threads, so a slow upstream can't starve the
+# default executor; beyond LLM_MAX_QUEUE waiting calls, new ones are shed as busy
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 32))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+# Consecutive failures (errors, timeouts, rate limits) that open the circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+
+BUSY_ANSWER = "The server is busy. Please try again shortly."
+ERROR_ANSWER = "Something went wrong while generating the answer."
+# Answers returned in place of a model response; callers must not cache these
+FALLBACK_ANSWERS = {BUSY_ANSWER, ERROR_ANSWER}
+
+SYSTEM_INSTRUCTION = (
+    "You are a highly precise and reliable assistant. "
+    "Answer the user’s question using ONLY the provided context. "
+    "Do NOT guess, infer, or use outside knowledge. "
+    "When giving an answer, provide it in a detailed and structured manner, explaining each relevant part clearly. "
+    "Use complete sentences, examples, and step-by-step explanations where helpful so that even someone with no prior knowledge can fully understand. "
+    "If multiple context passages are provided, carefully integrate them into a single coherent and thorough answer without assuming anything beyond what is written. "
+    "If you notice minor typos or spelling errors in the context, silently correct them in your answer, but do not alter or replace entire words."
+)
+
+
+@lru_cache(maxsize=1)
+def _genai():
+    """Import and configure the Gemini SDK once, on first use (the import alone takes ~1s)."""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai
+
+
+@lru_cache(maxsize=1)
+def _model():
+    """The shared model client, built once and reused by every call."""
+    if LLM_BACKEND == "fake":
+        return FakeGenerativeModel(LLM_MODEL_NAME)
+    return _genai().GenerativeModel(LLM_MODEL_NAME)
+
+
+def warm_up():
+    """Load and configure the LLM client ahead of the first question."""
+    _model()
+
+
+class LLMBusyError(RuntimeError):
+    """Raised when a call is shed: too many waiting calls, or the circuit is open."""
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=max(1, LLM_MAX_CONCURRENCY), thread_name_prefix="llm")
+_breaker = CircuitBreaker("LLM", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+_counter_lock = threading.Lock()
+_pending = 0        # calls submitted to _executor and not finished
+_counters = {"calls": 0, "coalesced": 0, "shed": 0, "timeouts": 0, "errors": 0}
+# Prompt digest -> task generating its answer, shared by identical concurrent requests
+_inflight: dict[bytes, asyncio.Task] = {}
+
+
+def _count(name: str):
+    with _counter_lock:
+        _counters[name] += 1
+
+
+def _submit(fn, *args):
+    """Run `fn` on the LLM executor, or raise LLMBusyError instead of queueing too deep."""
+    global _pending
+    with _counter_lock:
+        if _pending >= LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE:
+            _counters["shed"] += 1
+            raise LLMBusyError("too many LLM calls waiting")
+        if not _breaker.allow():
+            _counters["shed"] += 1
+            raise LLMBusyError("LLM circuit open")
+        _pending += 1
+        _counters["calls"] += 1
+
+    def release(_):
+        global _pending
+        with _counter_lock:
+            _pending -= 1
+
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(release)
+    return future
+
 
-    #Add parameters: context and a question.
+def _request_options() -> dict:
+    # Bounds the HTTP call itself, so a hung request also frees its thread
+    return {"timeout": LLM_TIMEOUT_SECONDS}
+
+
+def stats() -> dict:
+    with _counter_lock:
+        counters = dict(_counters, pending=_pending, inflight_prompts=len(_inflight))
+    return {
+        **counters,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "max_queue": LLM_MAX_QUEUE,
+        "circuit": _breaker.status(),
+    }
+
+
+def build_prompt(context: str, question: str) -> str:
+    """Plain-text prompt; `context` is the packed passages (see retrieval.context.pack_context)."""
+    return f"{SYSTEM_INSTRUCTION}\n\nCONTEXT:\n{context}\n\nQUESTION: {question}\n"
+
+
+async def _generate(prompt: str) -> str:
+    future = _submit(lambda: _model().generate_content(prompt, request_options=_request_options()))
     try:
-        system_instruction = (
-            "You are a highly precise and reliable assistant. "
-            "Answer the user’s question using ONLY the provided context. "
-            "Do NOT guess, infer, or use outside knowledge. "
-            "When giving an answer, provide it in a detailed and structured manner, explaining each relevant part clearly. "
-            "Use complete sentences, examples, and step-by-step explanations where helpful so that even someone with no prior knowledge can fully understand. "
-            "If multiple context passages are provided, carefully integrate them into a single coherent and thorough answer without assuming anything beyond what is written. "
-            "If you notice minor typos or spelling errors in the context, silently correct them in your answer, but do not alter or replace entire words."
-        )
-
-        # Context and question is just for testing, will be replaced later when previous tickets are ready.
-        prompt = f"""{system_instruction}
-        CONTEXT: {context}
-        QUESTION:{question}
-        """
-
-        def call_gemini():
-            model = genai.GenerativeModel("gemini-2.5-flash-lite")
-            return model.generate_content(prompt)
-
-        response = await asyncio.to_thread(call_gemini)
-
-        print(response.text)
-
-        return response.text.strip()
-
-    except TimeoutError:
-        return "The server is busy. Please try again shortly."
+        response = await asyncio.wait_for(asyncio.wrap_future(future), LLM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        future.cancel()  # drops it if it never left the queue
+        _count("timeouts")
+        _breaker.record_failure()
+        raise TimeoutError(f"LLM call timed out after {LLM_TIMEOUT_SECONDS}s")
+    except Exception:
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return response.text
+
+
+async def _answer(prompt: str) -> str:
+    try:
+        text = await _generate(prompt)
+
+        print(text)
+
+        return text.strip()
+
+    except (TimeoutError, LLMBusyError) as e:
+        print(f"[WARN] Gemini call shed: {e}")
+        return BUSY_ANSWER
     except Exception as e:
+        _count("errors")
         print(f"Error calling Gemini: {e}")
-        return "Something went wrong while generating the answer."
\ No newline at end of file
+        return ERROR_ANSWER
+
+
+async def get_answer_from_context(context: str, question: str) -> str:
+    """
+    Answer `question` from `context`. Identical requests in flight at the same time
+    share one model call; each waiter gets the same answer.
+    """
+    prompt = build_prompt(context, question)
+    key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_answer(prompt))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight.pop(key, None) if _inflight.get(key) is t else None)
+    else:
+        _count("coalesced")
+    # One waiter going away (client disconnect) must not cancel the call for the others
+    return await asyncio.shield(task)
+
+
+async def stream_answer_from_context(context: str, question: str) -> AsyncIterator[str]:
+    """
+    Yield answer text as the model produces it.
+
+    The blocking Gemini stream is consumed on an LLM executor thread and handed
+    to the event loop through a queue. Errors are raised to the caller, which
+    decides how to report them mid-stream; LLMBusyError means the call was shed.
+    """
+    prompt = build_prompt(context, question)
+    loop = asyncio.get_running_loop()
+    pieces = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+    stalled = threading.Event()  # the consumer timed out and already recorded the failure
+
+    def pump():
+        try:
+            for chunk in _model().generate_content(prompt, stream=True, request_options=_request_options()):
+                if stop.is_set():
+                    break
+                if chunk.text:
+                    loop.call_soon_threadsafe(pieces.put_nowait, chunk.text)
+            if not stalled.is_set():
+                _breaker.record_success()
+        except Exception as e:
+            if not stalled.is_set():
+                _breaker.record_failure()
+            loop.call_soon_threadsafe(pieces.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(pieces.put_nowait, done)
+
+    future = _submit(pump)
+    try:
+        while True:
+            try:
+                # No piece for this long means the upstream stalled
+                piece = await asyncio.wait_for(pieces.get(), LLM_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                # No first token, or a stall mid-stream: a hanging model must open the breaker
+                stalled.set()
+                future.cancel()  # drops it if it never left the queue
+                _count("timeouts")
+                _breaker.record_failure()
+                raise TimeoutError(f"LLM stream stalled for {LLM_TIMEOUT_SECONDS}s")
+            if piece is done:
+                break
+            if isinstance(piece, Exception):
+                raise piece
+            yield piece
+    finally:
+        # Stop pulling from the model if the client went away mid-stream
+        stop.set()
@@ -0,0 +1,27 @@
+import os
+from pathlib import Path
+
+# Hybrid retrieval for /ask: BM25 keyword matches fused with vector search results
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+# Candidates each retriever contributes before fusion (at least top_k)
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+# Reciprocal rank fusion constant: larger values flatten the advantage of top ranks
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# BM25 parameters: term-frequency saturation and document-length normalization
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+
+# Chunk texts backing the keyword index (SQLite, WAL mode); the index itself is in memory
+KEYWORD_INDEX_PATH = Path(os.getenv("KEYWORD_INDEX_PATH", Path(__file__).parent.parent.parent / "db" / "keyword_index.sqlite3"))
+
+# Prompt context: retrieved chunks are packed into at most this many tokens
+# (counted with the embedding tokenizer, close to Gemini's count for English notes)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+# Shortest shared span between neighbouring chunks treated as chunker overlap
+CONTEXT_MIN_OVERLAP_CHARS = 20
+
+# /ask/batch: most questions per request, and answers generated at once for one request
+# (keep below LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE so a batch can't shed its own calls)
+ASK_BATCH_MAX_QUESTIONS = int(os.getenv("ASK_BATCH_MAX_QUESTIONS", 100))
+ASK_BATCH_LLM_CONCURRENCY = int(os.getenv("ASK_BATCH_LLM_CONCURRENCY", 4))
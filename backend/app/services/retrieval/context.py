@@ -0,0 +1,92 @@
+from backend.app.services.embeddings.tokenizer import TokenCounter
+from backend.app.services.retrieval import config
+
+# Tokens of a passage header such as "[2] (CS301, part 4-5)"
+_HEADER_TOKENS = 12
+
+
+def strip_overlap(previous: str, following: str, min_chars: int = config.CONTEXT_MIN_OVERLAP_CHARS) -> str:
+    """`following` without the leading span it repeats from the end of `previous`."""
+    if len(previous) < min_chars or len(following) < min_chars:
+        return following
+    head = following[:min_chars]
+    start = previous.find(head, max(0, len(previous) - len(following)))
+    while start != -1:
+        # The overlap is a suffix of `previous` that `following` starts with
+        if following.startswith(previous[start:]):
+            return following[len(previous) - start:].lstrip()
+        start = previous.find(head, start + 1)
+    return following
+
+
+def _document_key(result: dict):
+    payload = result.get("payload") or {}
+    return payload.get("file_id") or result["id"]
+
+
+def _passages(selected: list[dict]) -> list[dict]:
+    """Group chunks by document and merge runs of consecutive chunk_index values."""
+    by_document = {}
+    for rank, result in enumerate(selected):
+        by_document.setdefault(_document_key(result), []).append((rank, result))
+
+    passages = []
+    for members in by_document.values():
+        members.sort(key=lambda m: (m[1].get("payload") or {}).get("chunk_index", 0))
+        current = None
+        for rank, result in members:
+            payload = result.get("payload") or {}
+            index = payload.get("chunk_index")
+            text = result.get("text") or ""
+            if current is not None and index is not None and current["last"] is not None and index == current["last"] + 1:
+                current["text"] += " " + strip_overlap(current["tail"], text)
+                current["last"] = index
+                current["tail"] = text
+                current["rank"] = min(current["rank"], rank)
+                continue
+            current = {
+                "text": text,
+                "subject_code": payload.get("subject_code"),
+                "first": index,
+                "last": index,
+                "tail": text,
+                "rank": rank,
+            }
+            passages.append(current)
+    # Best-ranked passage first, as the model weighs early context more
+    passages.sort(key=lambda p: p["rank"])
+    return passages
+
+
+def _blocks(passages: list[dict]) -> list[str]:
+    blocks = []
+    for number, passage in enumerate(passages, start=1):
+        source = passage["subject_code"] or "notes"
+        if passage["first"] is not None:
+            span = passage["first"] if passage["first"] == passage["last"] else f"{passage['first']}-{passage['last']}"
+            source += f", part {span}"
+        blocks.append(f"[{number}] ({source})\n{passage['text'].strip()}")
+    return blocks
+
+
+def pack_context(results: list[dict], token_budget: int = config.CONTEXT_TOKEN_BUDGET, counter: TokenCounter = None) -> str:
+    """
+    Plain-text prompt context from ranked store results (id, text, score, payload).
+
+    Chunks are taken in rank order while the packed context fits `token_budget`;
+    a chunk that doesn't fit is skipped in favour of smaller, lower-ranked ones.
+    Neighbouring chunks of one document (consecutive chunk_index) are merged into
+    one passage without the text the chunker repeated between them.
+    """
+    counter = counter or TokenCounter()
+    selected, passages = [], []
+    for result in results:
+        candidate = _passages(selected + [result])
+        # Counted per passage, so passages this chunk didn't change are memoized.
+        # The best chunk always goes in, even alone over budget.
+        tokens = sum(counter.count_many([p["text"] for p in candidate])) + _HEADER_TOKENS * len(candidate)
+        if selected and tokens > token_budget:
+            continue
+        selected.append(result)
+        passages = candidate
+    return "\n\n".join(_blocks(passages))
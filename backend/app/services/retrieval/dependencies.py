@@ -0,0 +1,14 @@
+from backend.app.services.lazy import Lazy
+
+
+def _create_keyword_index():
+    from backend.app.services.retrieval.keyword_index import KeywordIndex
+    return KeywordIndex()
+
+
+# Loaded from disk on first use (or by the startup warm-up)
+keyword_index = Lazy("keyword index", _create_keyword_index)
+
+
+def get_keyword_index():
+    return keyword_index.get()
@@ -0,0 +1,21 @@
+from backend.app.services.retrieval import config
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], top_k: int, k: int = config.RRF_K) -> list[dict]:
+    """
+    Merge ranked store-style results (dicts with an "id") by reciprocal rank fusion:
+    each list adds 1 / (k + rank) to a chunk's score, so chunks ranked well by
+    several retrievers rise to the top without comparing their raw scores.
+
+    The returned results carry the fused score in "score" and the per-list ranks
+    (None where a list missed the chunk) in "ranks".
+    """
+    fused = {}
+    for list_index, results in enumerate(result_lists):
+        for rank, result in enumerate(results, start=1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "score": 0.0, "ranks": [None] * len(result_lists)}
+            entry["score"] += 1.0 / (k + rank)
+            entry["ranks"][list_index] = rank
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:top_k]
@@ -0,0 +1,311 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from heapq import nlargest
+from pathlib import Path
+
+from backend.app.services.retrieval import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id            TEXT PRIMARY KEY,      -- same point id as in the vector store
+    subject_code  TEXT,
+    file_id       TEXT,
+    payload       TEXT NOT NULL          -- JSON, as stored with the vector
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks(file_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_subject ON chunks(subject_code);
+-- Ids of chunks written since a given seq, so other processes catch up incrementally
+CREATE TABLE IF NOT EXISTS changes (
+    seq  INTEGER PRIMARY KEY AUTOINCREMENT,
+    id   TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS chunks_inserted AFTER INSERT ON chunks BEGIN
+    INSERT INTO changes (id) VALUES (NEW.id);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_updated AFTER UPDATE ON chunks BEGIN
+    INSERT INTO changes (id) VALUES (NEW.id);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_deleted AFTER DELETE ON chunks BEGIN
+    INSERT INTO changes (id) VALUES (OLD.id);
+END;
+"""
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Words too common in questions and notes to say anything about a chunk
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can could did do does for from how i if in into is it its
+me my no not of on or our so than that the their them then there these they this to was we were
+what when where which who why will with would you your
+""".split())
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+# Change-log entries kept; a reader further behind than this reloads everything
+_CHANGE_LOG_MAX = 100_000
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords; course codes like CS301 stay whole."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class _Partition:
+    """Inverted index over the chunks of one subject_code."""
+
+    __slots__ = ("postings", "lengths", "total_length")
+
+    def __init__(self):
+        self.postings = {}       # term -> {doc: term frequency}
+        self.lengths = {}        # doc -> token count
+        self.total_length = 0
+
+
+class KeywordIndex:
+    """
+    In-process BM25 index over chunk texts, partitioned by subject_code.
+
+    Chunks are added at ingest time with the same ids and payloads as their
+    vectors, and persisted in SQLite; the inverted index is rebuilt from there
+    when the process starts. A search scores only the question's subject, so
+    IDF reflects how rare a term is within that subject's notes. When another
+    process (e.g. a CLI sync) changes the database, the next call applies just
+    the chunks it wrote, read from a trigger-maintained change log.
+    """
+
+    def __init__(self, path: Path = config.KEYWORD_INDEX_PATH, k1: float = config.BM25_K1, b: float = config.BM25_B):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._load()
+
+    # ---------------------------------------------------------------- loading
+
+    def _data_version(self) -> int:
+        # Changes whenever another connection commits to the database
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _last_seq(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def _load(self):
+        # One read transaction, so the rows and the change-log position match
+        self._conn.execute("BEGIN")
+        try:
+            self._load_rows()
+        finally:
+            self._conn.execute("COMMIT")
+        self._version = self._data_version()
+
+    def _load_rows(self):
+        self._partitions = {}
+        self._docs = {}          # point id -> (doc, subject_code, terms)
+        self._doc_ids = {}       # doc -> point id
+        self._next_doc = 0
+        self._seq = self._last_seq()
+        for point_id, subject_code, payload in self._conn.execute("SELECT id, subject_code, payload FROM chunks"):
+            self._index(point_id, subject_code, json.loads(payload).get("text") or "")
+        print(f"[INFO] Keyword index loaded: {len(self._docs)} chunks in {len(self._partitions)} subjects")
+
+    def _catch_up(self):
+        """Apply chunks other connections wrote since `self._seq`; call inside a transaction."""
+        oldest = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+        if oldest is not None and oldest > self._seq + 1:
+            # The log was pruned past this reader (it was idle through a very large sync)
+            self._load_rows()
+            return
+        rows = self._conn.execute("SELECT seq, id FROM changes WHERE seq > ? ORDER BY seq", (self._seq,)).fetchall()
+        if not rows:
+            return
+        ids = list(dict.fromkeys(point_id for _, point_id in rows))
+        current = {}
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            batch = ids[start:start + _LOOKUP_BATCH]
+            current.update((point_id, (subject_code, payload)) for point_id, subject_code, payload in self._conn.execute(
+                f"SELECT id, subject_code, payload FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+            ))
+        for point_id in ids:
+            if point_id in current:
+                subject_code, payload = current[point_id]
+                self._index(point_id, subject_code, json.loads(payload).get("text") or "")
+            elif point_id in self._docs:
+                self._unindex(point_id)
+        self._seq = rows[-1][0]
+
+    def _refresh(self):
+        if self._data_version() == self._version:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._catch_up()
+        finally:
+            self._conn.execute("COMMIT")
+        self._version = self._data_version()
+
+    def _write(self, statement: str, rows: list[tuple]):
+        """Run a write after catching up with other writers, and move past its own log entries."""
+        # IMMEDIATE takes the write lock first, so nobody commits between catch-up and write
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._catch_up()
+            self._conn.executemany(statement, rows)
+            self._seq = self._last_seq()
+            if self._seq > _CHANGE_LOG_MAX:
+                self._conn.execute("DELETE FROM changes WHERE seq <= ?", (self._seq - _CHANGE_LOG_MAX,))
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        self._version = self._data_version()
+
+    # ----------------------------------------------------------------- writes
+
+    def _index(self, point_id: str, subject_code: str, text: str):
+        if point_id in self._docs:
+            self._unindex(point_id)
+        counts = Counter(tokenize(text))
+        doc = self._next_doc
+        self._next_doc += 1
+        partition = self._partitions.setdefault(subject_code, _Partition())
+        for term, tf in counts.items():
+            partition.postings.setdefault(term, {})[doc] = tf
+        length = sum(counts.values())
+        partition.lengths[doc] = length
+        partition.total_length += length
+        self._docs[point_id] = (doc, subject_code, tuple(counts))
+        self._doc_ids[doc] = point_id
+
+    def _unindex(self, point_id: str):
+        doc, subject_code, terms = self._docs.pop(point_id)
+        del self._doc_ids[doc]
+        partition = self._partitions[subject_code]
+        for term in terms:
+            postings = partition.postings[term]
+            del postings[doc]
+            if not postings:
+                del partition.postings[term]
+        partition.total_length -= partition.lengths.pop(doc)
+        if not partition.lengths:
+            del self._partitions[subject_code]
+
+    def add(self, ids: list[str], payloads: list[dict]):
+        """Index chunks (replacing any with the same id) under their payload's subject_code."""
+        rows = [
+            (str(point_id), payload.get("subject_code"), payload.get("file_id"), json.dumps(payload))
+            for point_id, payload in zip(ids, payloads)
+        ]
+        with self._lock:
+            self._write("INSERT OR REPLACE INTO chunks (id, subject_code, file_id, payload) VALUES (?, ?, ?, ?)", rows)
+            for point_id, payload in zip(ids, payloads):
+                self._index(str(point_id), payload.get("subject_code"), payload.get("text") or "")
+
+    def _delete(self, ids: list[str]):
+        ids = [i for i in ids if i in self._docs]
+        if not ids:
+            return
+        self._write("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+        for point_id in ids:
+            if point_id in self._docs:
+                self._unindex(point_id)
+
+    def delete_points(self, ids: list[str]):
+        with self._lock:
+            self._refresh()
+            self._delete([str(i) for i in ids])
+
+    def delete_file(self, file_id: str):
+        with self._lock:
+            self._refresh()
+            rows = self._conn.execute("SELECT id FROM chunks WHERE file_id = ?", (file_id,)).fetchall()
+            self._delete([r[0] for r in rows])
+
+    def delete_legacy_points(self, subject_code: str):
+        """Drop chunks of `subject_code` that have no file_id (backfilled legacy points)."""
+        with self._lock:
+            self._refresh()
+            rows = self._conn.execute(
+                "SELECT id FROM chunks WHERE subject_code = ? AND (file_id IS NULL OR file_id = '')", (subject_code,)
+            ).fetchall()
+            self._delete([r[0] for r in rows])
+
+    def backfill(self, store, batch_size: int = 1000) -> int:
+        """Index every point already in the vector store (for collections ingested before this index)."""
+        ids, payloads, total = [], [], 0
+        for point_id, payload in store.iter_points():
+            ids.append(point_id)
+            payloads.append(payload)
+            if len(ids) >= batch_size:
+                self.add(ids, payloads)
+                total += len(ids)
+                ids, payloads = [], []
+        if ids:
+            self.add(ids, payloads)
+            total += len(ids)
+        print(f"[INFO] Keyword index backfilled with {total} chunks")
+        return total
+
+    # ------------------------------------------------------------------ reads
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._docs)
+
+    def _score(self, partition: _Partition, terms: set[str]) -> dict[int, float]:
+        scores = {}
+        docs = len(partition.lengths)
+        avg_length = partition.total_length / docs or 1.0
+        k1, b, lengths = self.k1, self.b, partition.lengths
+        for term in terms:
+            postings = partition.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings.items():
+                norm = k1 * (1 - b + b * lengths[doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, question: str, subject_code: str = None, top_k: int = 10) -> list[dict]:
+        """Best BM25 matches as store-style results (id, text, score, payload)."""
+        terms = set(tokenize(question))
+        if not terms or top_k <= 0:
+            return []
+
+        with self._lock:
+            self._refresh()
+            if subject_code:
+                partitions = [self._partitions[subject_code]] if subject_code in self._partitions else []
+            else:
+                # Scores are per subject; comparable enough to merge for unfiltered questions
+                partitions = list(self._partitions.values())
+            scored = []
+            for partition in partitions:
+                scores = self._score(partition, terms)
+                scored.extend(nlargest(top_k, scores.items(), key=lambda item: item[1]))
+            best = nlargest(top_k, scored, key=lambda item: item[1])
+            ids = [self._doc_ids[doc] for doc, _ in best]
+
+            payloads = {}
+            for start in range(0, len(ids), _LOOKUP_BATCH):
+                batch = ids[start:start + _LOOKUP_BATCH]
+                payloads.update(self._conn.execute(
+                    f"SELECT id, payload FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+
+        results = []
+        for point_id, (_, score) in zip(ids, best):
+            payload = json.loads(payloads[point_id])
+            results.append({"id": point_id, "text": payload.get("text"), "score": score, "payload": payload})
+        return results
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+from backend.app.services import llm_service
+from backend.app.services.embeddings import dependencies as embedding_deps
+from backend.app.services.retrieval import dependencies as retrieval_deps
+from backend.app.services.retrieval.config import HYBRID_SEARCH
+
+# "background" (default): warm up in a thread once the API is serving;
+# "blocking": warm up before the API accepts requests;
+# "off": build everything on first use (readiness then only reflects the process)
+WARMUP_MODE = os.getenv("STARTUP_WARMUP", "background").lower()
+# Pause before retrying components that failed, e.g. while Qdrant is unreachable
+WARMUP_RETRY_SECONDS = float(os.getenv("STARTUP_WARMUP_RETRY_SECONDS", 5))
+
+
+def _warm_embedder():
+    # Loads the model and runs the first forward pass, which is much slower than later ones
+    embedding_deps.get_embedding_batcher().embed_texts(["warm-up"])
+    # The tokenizer that sizes prompt context in /ask
+    from backend.app.services.embeddings.tokenizer import get_tokenizer
+    get_tokenizer()
+
+
+def _warm_qdrant():
+    embedding_deps.get_qdrant_store()
+    embedding_deps.get_async_qdrant_store()
+
+
+def _warm_keyword_index():
+    index = retrieval_deps.get_keyword_index()
+    if index.count() == 0:
+        # First start with hybrid search: index the chunks ingested before it existed
+        index.backfill(embedding_deps.get_qdrant_store())
+
+
+COMPONENTS = {
+    "embedder": _warm_embedder,
+    "qdrant": _warm_qdrant,
+    **({"keyword_index": _warm_keyword_index} if HYBRID_SEARCH else {}),
+    "llm": llm_service.warm_up,
+}
+
+
+class WarmUp:
+    """Builds the shared model and clients ahead of the first request and tracks readiness."""
+
+    def __init__(self, components: dict = None, mode: str = WARMUP_MODE):
+        self.components = components or COMPONENTS
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._status = {
+            name: {"state": "pending", "seconds": None, "error": None}
+            for name in self.components
+        }
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._status[name].update(fields)
+
+    def run_once(self) -> bool:
+        """Try every component that is not ready yet; True when all are."""
+        for name, warm in self.components.items():
+            if self._stop.is_set():
+                break
+            if self._status[name]["state"] == "ready":
+                continue
+            self._set(name, state="loading")
+            start = time.perf_counter()
+            try:
+                warm()
+                self._set(name, state="ready", seconds=round(time.perf_counter() - start, 3), error=None)
+            except Exception as e:
+                self._set(name, state="failed", seconds=round(time.perf_counter() - start, 3), error=str(e))
+                print(f"[ERROR] Warm-up of {name} failed: {e}")
+        return self.ready()
+
+    def run(self, retry_seconds: float = WARMUP_RETRY_SECONDS):
+        """Warm up, retrying failed components until all are ready or `stop` is called."""
+        while not self.run_once() and not self._stop.wait(retry_seconds):
+            pass
+
+    def start(self):
+        """Run the warm-up on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def ready(self) -> bool:
+        if self.mode == "off":
+            return True
+        with self._lock:
+            return all(s["state"] == "ready" for s in self._status.values())
+
+    def status(self) -> dict:
+        with self._lock:
+            components = {name: dict(s) for name, s in self._status.items()}
+        return {
+            "ready": self.ready(),
+            "mode": self.mode,
+            "components": components,
+            "instances": {
+                lazy.name: lazy.status()
+                for lazy in (
+                    embedding_deps.embedder,
+                    embedding_deps.embedding_batcher,
+                    embedding_deps.qdrant_store,
+                    embedding_deps.async_qdrant_store,
+                    retrieval_deps.keyword_index,
+                )
+            },
+        }
+
+
+warm_up = WarmUp()
@@ -2,51 +2,128 @@ import os
 import io
 import pickle
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
 
 # Google Drive API scope: read-only access
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 
-def get_drive_service():
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+PDF_MIME_TYPE = "application/pdf"
+
+# Listing: max page size the API allows, and only the fields sync needs
+LIST_PAGE_SIZE = 1000
+LIST_FIELDS = "nextPageToken, files(id, name, mimeType, modifiedTime, md5Checksum)"
+LIST_WORKERS = int(os.getenv("DRIVE_LIST_WORKERS", 8))  # subfolders listed in parallel
+
+# Bytes per download request; large enough that most PDFs arrive in one round-trip
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DRIVE_DOWNLOAD_CHUNK_SIZE", 32 * 1024 * 1024))
+
+# Point the client at another server (e.g. backend/benchmarks/fake_drive.py) for offline runs
+DRIVE_API_ENDPOINT = os.getenv("DRIVE_API_ENDPOINT")
+
+_creds = None
+_creds_lock = threading.Lock()
+# httplib2 connections are not thread-safe, so each thread keeps its own service
+_local = threading.local()
+# Listing threads live as long as the process, so their services survive between syncs
+_list_pool = None
+_list_pool_lock = threading.Lock()
+
+
+def _get_credentials():
     """
-    Authenticate using OAuth token stored in environment variable (Base64 of token.pickle).
+    Decode the OAuth token stored in the environment (Base64 of token.pickle) once,
+    and refresh it when it has expired.
     """
-    token_b64 = os.environ.get("GOOGLE_DRIVE_TOKEN")
-    if not token_b64:
-        raise ValueError("Missing GOOGLE_DRIVE_TOKEN environment variable")
+    global _creds
+    with _creds_lock:
+        if _creds is None:
+            if DRIVE_API_ENDPOINT:
+                _creds = AnonymousCredentials()
+                return _creds
 
-    # Decode Base64 to bytes and load as pickle
-    token_bytes = base64.b64decode(token_b64)
-    creds = pickle.load(io.BytesIO(token_bytes))
+            token_b64 = os.environ.get("GOOGLE_DRIVE_TOKEN")
+            if not token_b64:
+                raise ValueError("Missing GOOGLE_DRIVE_TOKEN environment variable")
 
-    # Refresh token if expired
-    if creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+            # Decode Base64 to bytes and load as pickle
+            token_bytes = base64.b64decode(token_b64)
+            _creds = pickle.load(io.BytesIO(token_bytes))
 
-    return build("drive", "v3", credentials=creds)
+        # Refresh token if expired
+        if getattr(_creds, "expired", False) and getattr(_creds, "refresh_token", None):
+            _creds.refresh(Request())
 
+        return _creds
 
-def list_files_in_folder(folder_id: str) -> List[Dict]:
-    """Recursively list all PDF files in a folder."""
-    service = get_drive_service()
-    all_files = []
 
-    def _list_recursive(fid):
+def get_drive_service():
+    """
+    Long-lived Drive client for the calling thread. The discovery document and
+    credentials are set up once per thread instead of once per request.
+    """
+    creds = _get_credentials()
+    service = getattr(_local, "service", None)
+    if service is None or getattr(_local, "creds", None) is not creds:
+        client_options = {"api_endpoint": DRIVE_API_ENDPOINT} if DRIVE_API_ENDPOINT else None
+        service = build(
+            "drive", "v3",
+            credentials=creds,
+            client_options=client_options,
+            cache_discovery=False,
+        )
+        _local.service = service
+        _local.creds = creds
+    return service
+
+
+def _list_folder(folder_id: str) -> List[Dict]:
+    """All PDFs and subfolders directly inside `folder_id`, following every page."""
+    service = get_drive_service()
+    items, page_token = [], None
+    while True:
         results = service.files().list(
-            q=f"'{fid}' in parents and (mimeType='application/pdf' or mimeType='application/vnd.google-apps.folder')",
-            fields="files(id, name, mimeType, modifiedTime)"
+            q=f"'{folder_id}' in parents and (mimeType='{PDF_MIME_TYPE}' or mimeType='{FOLDER_MIME_TYPE}') and trashed=false",
+            fields=LIST_FIELDS,
+            pageSize=LIST_PAGE_SIZE,
+            pageToken=page_token,
         ).execute()
+        items.extend(results.get("files", []))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return items
+
+
+def _get_list_pool() -> ThreadPoolExecutor:
+    global _list_pool
+    with _list_pool_lock:
+        if _list_pool is None:
+            _list_pool = ThreadPoolExecutor(max_workers=LIST_WORKERS, thread_name_prefix="drive-list")
+        return _list_pool
+
+
+def list_files_in_folder(folder_id: str) -> List[Dict]:
+    """Recursively list all PDF files in a folder, listing each level's subfolders in parallel."""
+    pool = _get_list_pool()
+    all_files = []
+    frontier = [folder_id]
 
-        for f in results.get("files", []):
-            if f["mimeType"] == "application/vnd.google-apps.folder":
-                _list_recursive(f["id"])
-            elif f["mimeType"] == "application/pdf":
-                all_files.append(f)
+    while frontier:
+        next_frontier = []
+        for items in pool.map(_list_folder, frontier):
+            for f in items:
+                if f["mimeType"] == FOLDER_MIME_TYPE:
+                    next_frontier.append(f["id"])
+                elif f["mimeType"] == PDF_MIME_TYPE:
+                    all_files.append(f)
+        frontier = next_frontier
 
-    _list_recursive(folder_id)
     return all_files
 
 
@@ -55,11 +132,10 @@ def download_file(file_id: str) -> bytes:
     service = get_drive_service()
     request = service.files().get_media(fileId=file_id)
     buffer = io.BytesIO()
-    downloader = MediaIoBaseDownload(buffer, request)
+    downloader = MediaIoBaseDownload(buffer, request, chunksize=DOWNLOAD_CHUNK_SIZE)
 
     done = False
     while not done:
         status, done = downloader.next_chunk()
 
-    buffer.seek(0)
-    return buffer.read()
+    return buffer.getvalue()
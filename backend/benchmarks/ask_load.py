@@ -0,0 +1,96 @@
+"""
+Load test for the /ask endpoint.
+
+Fires a fixed number of requests at each concurrency level and reports throughput
+and latency percentiles, so you can check that requests/sec keeps rising with
+concurrent clients instead of flattening at one.
+
+    python -m backend.benchmarks.ask_load --url http://localhost:8000 --concurrency 1,4,16,64
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(client: httpx.AsyncClient, url: str, payloads: list[dict], concurrency: int, total: int) -> dict:
+    """Send `total` requests from `concurrency` workers, cycling through `payloads`."""
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            payload = payloads[(total - remaining) % len(payloads)]
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "requests_per_sec": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def main(args):
+    payload = {"question": args.question, "top_k": args.top_k}
+    if args.subject_code:
+        payload["subject_code"] = args.subject_code
+
+    url = args.url.rstrip("/") + args.path
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+
+    results = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for level in levels:
+            result = await run_level(client, url, [payload], level, args.requests)
+            results.append(result)
+            print(
+                f"concurrency={level:>4}  {result['requests_per_sec']:>8} req/s  "
+                f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  errors={result['errors']}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "ask_load", "url": url, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/ask")
+    parser.add_argument("--question", default="What is the CAP theorem?")
+    parser.add_argument("--subject-code", default=None)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default=None, help="write results as JSON to this path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,150 @@
+"""
+Throughput of text cleaning and chunking, before and after the single-pass cleaner.
+
+The "legacy" path reproduces the previous behaviour: newline normalization in the
+ingest pipeline, the multi-pass regex cleaner, a splitter built per call and
+regex-based exact dedupe. The "current" path is chunker.chunk_text as shipped.
+
+    python -m backend.benchmarks.chunking --input path/to/notes   # .txt / .pdf files
+    python -m backend.benchmarks.chunking --docs 200 --pages 20   # synthetic notes
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import time
+
+from backend.app.services.chunking import chunker
+from backend.app.services.chunking.cleaner import preprocess_pdf_text
+from backend.benchmarks.corpus import make_text_corpus
+
+
+def legacy_normalize(text: str) -> str:
+    text = text.encode("utf-8", errors="ignore").decode("utf-8")
+    text = text.replace("\r\n", "\n").strip()
+    return re.sub(r"\n{2,}", "\n\n", text)
+
+
+def legacy_clean(text: str) -> str:
+    if not text:
+        return ""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"^\s*\d+\s*$", "", text, flags=re.MULTILINE)
+    lines = text.split("\n")
+    seen_headers = {}
+    for line in lines:
+        norm = line.strip()
+        if norm:
+            seen_headers[norm] = seen_headers.get(norm, 0) + 1
+    cleaned_lines = []
+    for line in lines:
+        norm = line.strip()
+        if seen_headers.get(norm, 0) >= 3 and len(norm) < 80:
+            continue
+        cleaned_lines.append(line)
+    return "\n".join(cleaned_lines).strip()
+
+
+def legacy_dedupe(chunks: list[str]) -> list[str]:
+    seen, unique = set(), []
+    for chunk in chunks:
+        norm = re.sub(r"\s+", " ", chunk).strip().lower()
+        if norm not in seen:
+            seen.add(norm)
+            unique.append(chunk)
+    return unique
+
+
+def legacy_chunk(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+    cleaned = legacy_clean(legacy_normalize(text))
+    if chunker.LANGCHAIN_AVAILABLE:
+        splitter = chunker.RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=lambda x: len(x.split()),
+            separators=["\n\n", "\n", ".", " "],
+        )
+        chunks = splitter.split_text(cleaned)
+    else:
+        chunks = chunker.sentence_chunker(cleaned, chunk_size, chunk_overlap)
+    return chunker.merge_heading_chunks(legacy_dedupe(chunks))
+
+
+def current_chunk(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+    text = text.encode("utf-8", errors="ignore").decode("utf-8")
+    return chunker.chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def load_texts(path: str) -> list[str]:
+    texts = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            full = os.path.join(root, name)
+            if name.lower().endswith(".txt"):
+                with open(full, encoding="utf-8", errors="ignore") as f:
+                    texts.append(f.read())
+            elif name.lower().endswith(".pdf"):
+                from backend.app.services.extractor import extract_text_from_pdf
+                texts.append(extract_text_from_pdf(full))
+    return texts
+
+
+def measure(fn, texts: list[str], repeat: int) -> dict:
+    megabytes = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    best, outputs = float("inf"), 0
+    # The cleaner prints a debug line per document; keep it out of the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = [fn(t) for t in texts]
+            best = min(best, time.perf_counter() - start)
+    for result in results:
+        outputs += len(result) if isinstance(result, list) else 1
+    return {
+        "seconds": round(best, 4),
+        "mb_per_sec": round(megabytes / best, 2) if best else 0.0,
+        "outputs": outputs,
+    }
+
+
+def main(args):
+    texts = load_texts(args.input) if args.input else make_text_corpus(args.docs, args.pages)
+    size, overlap = args.chunk_size, args.chunk_overlap
+
+    result = {
+        "benchmark": "chunking",
+        "documents": len(texts),
+        "megabytes": round(sum(len(t.encode("utf-8")) for t in texts) / 1e6, 3),
+        "splitter": "langchain" if chunker.LANGCHAIN_AVAILABLE else "sentence",
+        "clean": {
+            "legacy": measure(lambda t: legacy_clean(legacy_normalize(t)), texts, args.repeat),
+            "current": measure(preprocess_pdf_text, texts, args.repeat),
+        },
+        "clean_and_chunk": {
+            "legacy": measure(lambda t: legacy_chunk(t, size, overlap), texts, args.repeat),
+            "current": measure(lambda t: current_chunk(t, size, overlap), texts, args.repeat),
+        },
+    }
+    for stage in ("clean", "clean_and_chunk"):
+        legacy, current = result[stage]["legacy"]["seconds"], result[stage]["current"]["seconds"]
+        result[stage]["speedup"] = round(legacy / current, 2) if current else 0.0
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=None, help="directory of .txt/.pdf notes (default: synthetic corpus)")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,100 @@
+"""
+Prompt size before and after context packing.
+
+Chunks the synthetic notes corpus (or --input notes), retrieves chunks for the
+generated questions of hybrid_eval with the BM25 keyword index (no model or
+Qdrant needed), and builds each prompt twice:
+
+  legacy - the old prompt: the retrieved chunks' dicts formatted into an f-string
+  packed - pack_context: overlaps removed, neighbours merged, token budget applied
+
+Token counts use the embedding tokenizer, as the packer does.
+
+    python -m backend.benchmarks.context_packing --top-k 3,5,10,20 --budget 1500
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from backend.benchmarks.ask_load import percentile
+from backend.benchmarks.hybrid_eval import corpus_documents, generated_questions
+
+
+def legacy_prompt(results: list[dict], question: str) -> str:
+    from backend.app.services.llm_service import SYSTEM_INSTRUCTION
+
+    chunks = [{"text": r.get("text", ""), "score": r.get("score")} for r in results]
+    return f"""{SYSTEM_INSTRUCTION}
+        CONTEXT: {chunks}
+        QUESTION:{question}
+        """
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "mean": round(sum(values) / len(values), 1) if values else 0.0,
+        "p95": round(percentile(values, 95), 1),
+    }
+
+
+def main(args):
+    from backend.app.services.chunking.chunker import chunk_text
+    from backend.app.services.embeddings.ids import chunk_point_id
+    from backend.app.services.embeddings.tokenizer import TokenCounter
+    from backend.app.services.llm_service import build_prompt
+    from backend.app.services.retrieval.context import pack_context
+    from backend.app.services.retrieval.keyword_index import KeywordIndex
+
+    counter = TokenCounter()
+    questions = generated_questions()
+    result = {"benchmark": "context_packing", "budget": args.budget, "exact_tokens": counter.exact, "top_k": {}}
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        index = KeywordIndex(os.path.join(tmp, "keywords.sqlite3"))
+        for i, (subject_code, text) in enumerate(corpus_documents(args)):
+            chunks = chunk_text(text)
+            file_id = f"doc{i}"
+            index.add(
+                [chunk_point_id(file_id, j) for j in range(len(chunks))],
+                [{"chunk_index": j, "text": c, "subject_code": subject_code, "file_id": file_id} for j, c in enumerate(chunks)],
+            )
+
+        for top_k in (int(k) for k in args.top_k.split(",")):
+            legacy, packed, kept, seconds = [], [], [], []
+            for question in questions:
+                results = index.search(question["question"], subject_code=question["subject_code"], top_k=top_k)
+                legacy.append(counter(legacy_prompt(results, question["question"])))
+                start = time.perf_counter()
+                # Fresh counter per call, as in /ask, so packing time includes tokenizing
+                context = pack_context(results, token_budget=args.budget, counter=TokenCounter(counter.tokenizer))
+                seconds.append((time.perf_counter() - start) * 1000)
+                packed.append(counter(build_prompt(context, question["question"])))
+                kept.append(sum(1 for r in results if (r["text"] or "").strip()[-60:] in context) / len(results) if results else 1.0)
+
+            result["top_k"][top_k] = {
+                "legacy_prompt_tokens": summarize(legacy),
+                "packed_prompt_tokens": summarize(packed),
+                "reduction": round(1 - sum(packed) / sum(legacy), 4) if sum(legacy) else 0.0,
+                "chunks_kept": round(sum(kept) / len(kept), 4),
+                "pack_ms": summarize(seconds),
+            }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=None, help="directory of .txt/.pdf notes named <subject_code>.pdf (default: synthetic corpus)")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--top-k", default="3,5,10,20")
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
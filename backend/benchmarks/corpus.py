@@ -0,0 +1,77 @@
+"""
+Synthetic lecture-notes corpus for offline benchmarks.
+
+Builds notes-like text (headings, definitions, numbered lists, repeated
+headers/footers and page numbers, the things the cleaner and chunker deal with)
+and renders it into PDFs with PyMuPDF.
+"""
+import random
+
+import fitz  # pyright: ignore[reportMissingImports]
+
+TOPICS = [
+    ("CS301", "Distributed Systems", ["CAP theorem", "Paxos", "Raft", "vector clocks", "consistent hashing", "two-phase commit"]),
+    ("CS302", "Databases", ["B-tree index", "normalization", "ACID transactions", "query planner", "write-ahead log", "MVCC"]),
+    ("MA201", "Linear Algebra", ["eigenvalues", "orthogonal projection", "singular value decomposition", "rank", "determinant"]),
+    ("PH101", "Mechanics", ["Newton's second law", "conservation of momentum", "angular velocity", "work-energy theorem"]),
+    ("CS210", "Operating Systems", ["page table", "context switch", "semaphore", "deadlock", "virtual memory", "scheduler"]),
+]
+
+WORDS = (
+    "system state value process node request data model time order memory result method "
+    "example property function update message failure network client server value key "
+    "algorithm structure proof condition case input output step rule set level").split()
+
+
+def _sentence(rng: random.Random, concept: str) -> str:
+    words = rng.sample(WORDS, rng.randint(8, 16))
+    words.insert(rng.randint(0, len(words)), concept)
+    return " ".join(words).capitalize() + "."
+
+
+def notes_text(rng: random.Random, course: tuple, pages: int) -> list[str]:
+    """Page texts for one synthetic lecture pack."""
+    code, title, concepts = course
+    page_texts = []
+    for page in range(1, pages + 1):
+        concept = rng.choice(concepts)
+        lines = [f"{code} - {title}", ""]
+        lines.append(f"{rng.randint(1, 9)}. {concept.upper()}")
+        lines.append(f"Definition: {concept} is " + _sentence(rng, concept).lower())
+        for _ in range(rng.randint(3, 6)):
+            paragraph = " ".join(_sentence(rng, concept) for _ in range(rng.randint(2, 5)))
+            lines.append(paragraph)
+            lines.append("")
+        lines.append(f"{code} Lecture Notes")
+        lines.append(str(page))
+        page_texts.append("\n".join(lines))
+    return page_texts
+
+
+def make_pdf(pages: int = 10, seed: int = 0, course: tuple = None) -> bytes:
+    rng = random.Random(seed)
+    course = course or TOPICS[seed % len(TOPICS)]
+    doc = fitz.open()
+    for text in notes_text(rng, course, pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 800), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_corpus(files: int = 20, pages: int = 10, seed: int = 0) -> list[tuple[str, bytes]]:
+    """(file name, PDF bytes) pairs; file names are subject codes as in Drive."""
+    corpus = []
+    for i in range(files):
+        course = TOPICS[i % len(TOPICS)]
+        corpus.append((f"{course[0]}_{i:04d}.pdf", make_pdf(pages, seed + i, course)))
+    return corpus
+
+
+def make_text_corpus(docs: int = 20, pages: int = 10, seed: int = 0) -> list[str]:
+    """Raw extracted-text equivalents of `make_corpus`, for text-only stages."""
+    return [
+        "\n".join(notes_text(random.Random(seed + i), TOPICS[i % len(TOPICS)], pages))
+        for i in range(docs)
+    ]
@@ -0,0 +1,179 @@
+"""
+Throughput, memory and accuracy of the embedding backends (torch, onnx, onnx-int8).
+
+Each backend runs in its own process on the same sample of note chunks, and
+reports load time, embeddings/sec and resident memory. The vectors are then
+compared with the torch ones: per-chunk cosine similarity, and whether each
+chunk's nearest neighbours stay the same.
+
+    python -m backend.benchmarks.embedding_backends --samples 2000 --threads 1
+    python -m backend.benchmarks.embedding_backends --backends torch,onnx-int8 --min-cosine 0.98
+
+Exits non-zero when a backend's mean cosine to torch is below --min-cosine.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backend.benchmarks.chunking import load_texts
+from backend.benchmarks.corpus import make_text_corpus
+
+
+def sample_chunks(args) -> list[str]:
+    from backend.app.services.chunking.chunker import chunk_text
+
+    texts = load_texts(args.input) if args.input else make_text_corpus(args.docs, args.pages)
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = [chunk for text in texts for chunk in chunk_text(text)]
+    return chunks[:args.samples]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+def worker(args):
+    """Runs in a child process: embed the sample with one backend."""
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    from backend.app.services.embeddings.embedder import Embedder
+
+    with open(args.texts) as f:
+        texts = json.load(f)
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    embedder = Embedder(backend=args.worker)
+    embedder.embed_texts(texts[:8])  # first call initializes kernels/sessions
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = np.asarray(embedder.embed_texts(texts), dtype=np.float32)
+    seconds = time.perf_counter() - start
+    np.save(args.vectors, vectors)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("RESULT " + json.dumps({
+        "load_seconds": round(load_seconds, 3),
+        "embed_seconds": round(seconds, 3),
+        "embeddings_per_sec": round(len(texts) / seconds, 1) if seconds else 0.0,
+        "rss_mb": _rss_mb(),
+        "model_rss_mb": round(_rss_mb() - rss_before, 1),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }))
+
+
+def run_backend(backend: str, texts_path: str, vectors_path: str, threads: int) -> dict:
+    cmd = [
+        sys.executable, "-m", "backend.benchmarks.embedding_backends",
+        "--worker", backend, "--texts", texts_path, "--vectors", vectors_path,
+    ]
+    env = dict(os.environ)
+    if threads:
+        # Same thread budget for torch, ONNX Runtime and BLAS
+        env.update(OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+        cmd += ["--threads", str(threads)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def agreement(reference: np.ndarray, vectors: np.ndarray, k: int = 10) -> dict:
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    vec = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosine = np.sum(ref * vec, axis=1)
+
+    # Nearest neighbours of every chunk among the others, under each backend
+    k = min(k, len(ref) - 1)
+    ref_sims, vec_sims = ref @ ref.T, vec @ vec.T
+    np.fill_diagonal(ref_sims, -np.inf)
+    np.fill_diagonal(vec_sims, -np.inf)
+    ref_top = np.argpartition(-ref_sims, k, axis=1)[:, :k]
+    vec_top = np.argpartition(-vec_sims, k, axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, vec_top)] if k > 0 else [1.0]
+
+    return {
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        "cosine_p01": round(float(np.percentile(cosine, 1)), 5),
+        f"neighbours_at_{k}_overlap": round(float(np.mean(overlap)), 4),
+    }
+
+
+def main(args):
+    backends = args.backends.split(",")
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # reference for the accuracy check
+
+    texts = sample_chunks(args)
+    result = {"benchmark": "embedding_backends", "samples": len(texts), "threads": args.threads, "backends": {}}
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w") as f:
+            json.dump(texts, f)
+
+        vectors = {}
+        for backend in backends:
+            path = os.path.join(tmp, f"{backend}.npy")
+            stats = run_backend(backend, texts_path, path, args.threads)
+            if "error" not in stats:
+                vectors[backend] = np.load(path)
+            result["backends"][backend] = stats
+
+        for backend, stats in result["backends"].items():
+            if backend == "torch" or backend not in vectors or "torch" not in vectors:
+                continue
+            stats["accuracy"] = agreement(vectors["torch"], vectors[backend])
+            if stats["accuracy"]["cosine_mean"] < args.min_cosine:
+                failed = True
+            if result["backends"]["torch"].get("embeddings_per_sec"):
+                stats["speedup"] = round(stats["embeddings_per_sec"] / result["backends"]["torch"]["embeddings_per_sec"], 2)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if failed:
+        sys.exit(f"A backend's mean cosine to torch is below {args.min_cosine}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--input", default=None, help="directory of .txt/.pdf notes (default: synthetic corpus)")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per backend (0: library default)")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--output", default=None)
+    # Internal: run one backend in this process
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--texts", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", default=None, help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.worker:
+        worker(parsed)
+    else:
+        main(parsed)
@@ -0,0 +1,162 @@
+"""
+Local fake of the Drive v3 files API (list + alt=media download) for offline runs.
+
+Serves a synthetic Root → Semester → Subject folder tree of generated PDFs. Point
+the app at it with DRIVE_API_ENDPOINT=<url>; credentials are then skipped.
+
+Run as a benchmark of listing and download throughput:
+
+    python -m backend.benchmarks.fake_drive --folders 20 --files-per-folder 50 --latency-ms 30
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backend.benchmarks.corpus import make_corpus
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+PDF_MIME_TYPE = "application/pdf"
+
+
+class FakeDrive:
+    """In-memory folder tree: folder id → children, file id → bytes."""
+
+    def __init__(self, root_id: str = "root"):
+        self.root_id = root_id
+        self.children = {root_id: []}
+        self.blobs = {}
+        self.requests = 0
+        self.latency = 0.0
+
+    def add_folder(self, parent_id: str, folder_id: str, name: str):
+        self.children[parent_id].append({"id": folder_id, "name": name, "mimeType": FOLDER_MIME_TYPE})
+        self.children[folder_id] = []
+
+    def add_file(self, parent_id: str, file_id: str, name: str, data: bytes, modified_time: str = "2025-01-01T00:00:00Z"):
+        self.children[parent_id].append({
+            "id": file_id, "name": name, "mimeType": PDF_MIME_TYPE, "modifiedTime": modified_time,
+        })
+        self.blobs[file_id] = data
+
+    @classmethod
+    def synthetic(cls, folders: int, files_per_folder: int, pages: int = 5) -> "FakeDrive":
+        drive = cls()
+        corpus = make_corpus(files=min(files_per_folder, 50), pages=pages)
+        for f in range(folders):
+            semester = f"sem{f // 4}"
+            if semester not in drive.children:
+                drive.add_folder(drive.root_id, semester, semester)
+            folder_id = f"folder{f}"
+            drive.add_folder(semester, folder_id, f"Subject {f}")
+            for i in range(files_per_folder):
+                name, data = corpus[i % len(corpus)]
+                drive.add_file(folder_id, f"file{f}_{i}", name, data)
+        return drive
+
+
+def _handler(drive: FakeDrive):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            drive.requests += 1
+            if drive.latency:
+                time.sleep(drive.latency)
+
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            path = re.sub(r"^/drive/v3", "", url.path).rstrip("/")
+
+            if path == "/files":
+                match = re.search(r"'([^']+)' in parents", params.get("q", [""])[0])
+                items = drive.children.get(match.group(1), []) if match else []
+                size = int(params.get("pageSize", ["100"])[0])
+                offset = int(params.get("pageToken", ["0"])[0])
+                body = {"files": items[offset:offset + size]}
+                if offset + size < len(items):
+                    body["nextPageToken"] = str(offset + size)
+                return self._send(200, json.dumps(body).encode(), "application/json")
+
+            match = re.fullmatch(r"/files/([^/]+)", path)
+            if match and params.get("alt") == ["media"]:
+                data = drive.blobs.get(match.group(1))
+                if data is None:
+                    return self._send(404, b'{"error": {"code": 404}}', "application/json")
+                return self._send(200, data, PDF_MIME_TYPE)
+
+            self._send(404, b'{"error": {"code": 404}}', "application/json")
+
+    return Handler
+
+
+def serve(drive: FakeDrive, port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the fake in a background thread; returns (server, endpoint url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(drive))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def main(args):
+    drive = FakeDrive.synthetic(args.folders, args.files_per_folder, pages=args.pages)
+    drive.latency = args.latency_ms / 1000
+    server, url = serve(drive, args.port)
+
+    # google_drive reads its endpoint at import time
+    os.environ["DRIVE_API_ENDPOINT"] = url
+    import backend.app.utils.google_drive as google_drive
+
+    start = time.perf_counter()
+    files = google_drive.list_files_in_folder(drive.root_id)
+    list_seconds = time.perf_counter() - start
+    list_requests = drive.requests
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.download_workers) as pool:
+        sizes = list(pool.map(lambda f: len(google_drive.download_file(f["id"])), files[:args.downloads]))
+    download_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    result = {
+        "benchmark": "drive",
+        "files_listed": len(files),
+        "list_requests": list_requests,
+        "list_seconds": round(list_seconds, 3),
+        "files_downloaded": len(sizes),
+        "download_seconds": round(download_seconds, 3),
+        "download_files_per_sec": round(len(sizes) / download_seconds, 2) if download_seconds else 0.0,
+        "download_mb_per_sec": round(sum(sizes) / 1e6 / download_seconds, 2) if download_seconds else 0.0,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folders", type=int, default=20)
+    parser.add_argument("--files-per-folder", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated per-request latency")
+    parser.add_argument("--downloads", type=int, default=200)
+    parser.add_argument("--download-workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,169 @@
+"""
+Retrieval quality and latency of vector, BM25 keyword and hybrid (RRF) search.
+
+Ingests the synthetic notes corpus (or --input notes) into a local vector store
+and keyword index in a temporary directory, then asks a labeled question set
+and reports, per mode:
+
+  hit_rate   - share of questions with a relevant chunk in the top k
+  mrr        - mean reciprocal rank of the first relevant chunk
+  precision  - share of returned chunks that are relevant
+  p50_ms/p95_ms - search latency (question embedding excluded); for hybrid,
+               the keyword search and fusion on top of the vector search
+
+The default question set is generated from the corpus topics, e.g. "what is the
+CAP theorem in CS301", with every chunk of that subject mentioning the concept
+counted as relevant. --questions takes a JSON list of
+{"question", "subject_code", "relevant": [substrings]} for a hand-labeled set.
+
+    python -m backend.benchmarks.hybrid_eval --docs 50 --k 3
+    python -m backend.benchmarks.hybrid_eval --input notes/ --questions labeled.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from backend.benchmarks.ask_load import percentile
+
+TEMPLATES = [
+    "what is the {concept} in {code}",
+    "explain {concept}",
+    "{code} {concept} definition",
+    "how does {concept} work in {title}",
+]
+
+
+def corpus_documents(args) -> list[tuple[str, str]]:
+    """(subject_code, text) per document."""
+    if args.input:
+        documents = []
+        for name in sorted(os.listdir(args.input)):
+            path = os.path.join(args.input, name)
+            if name.lower().endswith(".txt"):
+                with open(path, encoding="utf-8", errors="ignore") as f:
+                    documents.append((os.path.splitext(name)[0], f.read()))
+            elif name.lower().endswith(".pdf"):
+                from backend.app.services.extractor import extract_text_from_pdf
+                documents.append((os.path.splitext(name)[0], extract_text_from_pdf(path)))
+        return documents
+    from backend.benchmarks.corpus import TOPICS, make_text_corpus
+    return [(TOPICS[i % len(TOPICS)][0], text) for i, text in enumerate(make_text_corpus(args.docs, args.pages))]
+
+
+def generated_questions() -> list[dict]:
+    from backend.benchmarks.corpus import TOPICS
+    return [
+        {"question": template.format(concept=concept, code=code, title=title), "subject_code": code, "relevant": [concept]}
+        for code, title, concepts in TOPICS
+        for concept in concepts
+        for template in TEMPLATES
+    ]
+
+
+def evaluate(results: list[list[dict]], questions: list[dict], k: int) -> dict:
+    hits, reciprocal_ranks, precisions = 0, [], []
+    for found, question in zip(results, questions):
+        needles = [n.lower() for n in question["relevant"]]
+        relevant = [any(n in (r["text"] or "").lower() for n in needles) for r in found[:k]]
+        hits += any(relevant)
+        reciprocal_ranks.append(next((1 / (i + 1) for i, ok in enumerate(relevant) if ok), 0.0))
+        precisions.append(sum(relevant) / k)
+    return {
+        "hit_rate": round(hits / len(questions), 4),
+        "mrr": round(sum(reciprocal_ranks) / len(questions), 4),
+        "precision": round(sum(precisions) / len(questions), 4),
+    }
+
+
+def timed(fn) -> tuple[list, float]:
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def main(args):
+    from backend.app.services.chunking.chunker import chunk_text
+    from backend.app.services.embeddings.embedder import Embedder
+    from backend.app.services.embeddings.ids import chunk_point_id
+    from backend.app.services.embeddings.local_store import LocalVectorStore
+    from backend.app.services.retrieval.fusion import reciprocal_rank_fusion
+    from backend.app.services.retrieval.keyword_index import KeywordIndex
+
+    if args.questions:
+        with open(args.questions) as f:
+            questions = json.load(f)
+    else:
+        questions = generated_questions()
+
+    embedder = Embedder()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        store = LocalVectorStore(os.path.join(tmp, "vectors"))
+        index = KeywordIndex(os.path.join(tmp, "keywords.sqlite3"))
+        chunk_count = 0
+        for i, (subject_code, text) in enumerate(corpus_documents(args)):
+            chunks = chunk_text(text)
+            if not chunks:
+                continue
+            file_id = f"doc{i}"
+            ids = [chunk_point_id(file_id, j) for j in range(len(chunks))]
+            payloads = [
+                {"chunk_index": j, "text": chunk, "subject_code": subject_code, "file_id": file_id}
+                for j, chunk in enumerate(chunks)
+            ]
+            store.upsert(embedder.embed_texts(chunks), payloads, ids=ids)
+            index.add(ids, payloads)
+            chunk_count += len(chunks)
+
+        query_vectors = embedder.embed_texts([q["question"] for q in questions])
+        limit = max(args.k, args.candidates)
+        runs = {"vector": ([], []), "keyword": ([], []), "hybrid": ([], [])}
+        for question, vector in zip(questions, query_vectors):
+            subject_code = question.get("subject_code")
+            vector_results, vector_ms = timed(lambda: store.query(vector, subject_code=subject_code, top_k=limit))
+            keyword_results, keyword_ms = timed(lambda: index.search(question["question"], subject_code=subject_code, top_k=limit))
+            fused, fusion_ms = timed(lambda: reciprocal_rank_fusion([vector_results, keyword_results], args.k))
+            for mode, results, ms in (
+                ("vector", vector_results[:args.k], vector_ms),
+                ("keyword", keyword_results[:args.k], keyword_ms),
+                # Overhead over vector search: /ask runs the keyword search while Qdrant is searching
+                ("hybrid", fused, keyword_ms + fusion_ms),
+            ):
+                runs[mode][0].append(results)
+                runs[mode][1].append(ms)
+
+    result = {
+        "benchmark": "hybrid_eval",
+        "documents": args.docs if not args.input else None,
+        "chunks": chunk_count,
+        "questions": len(questions),
+        "k": args.k,
+        "candidates": limit,
+        "modes": {
+            mode: {
+                **evaluate(results, questions, args.k),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+            }
+            for mode, (results, latencies) in runs.items()
+        },
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=None, help="directory of .txt/.pdf notes named <subject_code>.pdf (default: synthetic corpus)")
+    parser.add_argument("--questions", default=None, help="labeled questions JSON (default: generated from the corpus topics)")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=20, help="results per retriever before fusion")
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+"""
+Startup cost of the API, broken down per component.
+
+Each component is measured in a fresh interpreter, so import costs are not hidden
+by modules an earlier measurement already loaded:
+
+  import_seconds - importing the component's modules
+  init_seconds   - building it (loading the model, connecting to Qdrant, ...)
+
+The "app" row imports backend.app.main (what a cold worker pays before it can
+serve /) and then runs one blocking warm-up pass (what it pays before /ready).
+
+    python -m backend.benchmarks.startup --output startup.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Each snippet sets `imported` and `initialized` to perf_counter() readings
+COMPONENTS = {
+    "app": """
+import backend.app.main
+imported = time.perf_counter()
+from backend.app.services.startup import warm_up
+warm_up.run_once()
+initialized = time.perf_counter()
+extra = warm_up.status()["components"]
+""",
+    "embedder": """
+import sentence_transformers
+imported = time.perf_counter()
+from backend.app.services.embeddings.embedder import Embedder
+Embedder().embed("warm-up")
+initialized = time.perf_counter()
+""",
+    "qdrant": """
+import qdrant_client
+imported = time.perf_counter()
+from backend.app.services.embeddings.qdrant_store import QdrantStore
+QdrantStore(collection_name="notes", vector_size=384)
+initialized = time.perf_counter()
+""",
+    "llm": """
+import google.generativeai
+imported = time.perf_counter()
+from backend.app.services import llm_service
+llm_service.warm_up()
+initialized = time.perf_counter()
+""",
+    "chunking": """
+import backend.app.services.chunking.chunker
+imported = time.perf_counter()
+from backend.app.services.embeddings.tokenizer import get_tokenizer
+get_tokenizer()
+initialized = time.perf_counter()
+""",
+    "drive": """
+import backend.app.utils.google_drive
+imported = time.perf_counter()
+initialized = imported
+""",
+}
+
+_HARNESS = """
+import json, time
+start = time.perf_counter()
+extra, result = None, {{}}
+try:
+{body}
+    result = {{"import_seconds": round(imported - start, 3), "init_seconds": round(initialized - imported, 3)}}
+except Exception as e:
+    result = {{"error": f"{{type(e).__name__}}: {{e}}"}}
+if extra is not None:
+    result["components"] = extra
+print("RESULT " + json.dumps(result))
+"""
+
+
+def measure(name: str, timeout: float) -> dict:
+    body = "\n".join("    " + line for line in COMPONENTS[name].strip().splitlines())
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", _HARNESS.format(body=body)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout}s"}
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def main(args):
+    names = args.components.split(",") if args.components else list(COMPONENTS)
+    result = {"benchmark": "startup"}
+    for name in names:
+        runs = [measure(name, args.timeout) for _ in range(args.repeat)]
+        ok = [r for r in runs if "error" not in r]
+        # Best of N: the floor is the cost itself, the rest is machine noise
+        result[name] = min(ok, key=lambda r: r["import_seconds"] + r["init_seconds"]) if ok else runs[-1]
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", default=None, help=f"comma-separated subset of {','.join(COMPONENTS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
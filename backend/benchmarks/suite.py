@@ -0,0 +1,272 @@
+"""
+End-to-end performance suite, fully offline.
+
+Generates the synthetic PDF corpus, serves it from the fake Drive, and runs the
+app against the local vector store and the fake LLM (LLM_BACKEND=fake), all
+under a temporary directory. Reports, per stage:
+
+  extract - PyMuPDF text extraction: pages/s, PDF MB/s
+  chunk   - chunk_text: MB/s of extracted text, chunks/s
+  embed   - the configured Embedder (EMBEDDING_BACKEND, or EMBEDDING_SERVER_SOCKET): embeddings/s
+  upsert  - vector store writes: points/s (local store; --qdrant-url adds QdrantStore)
+  sync    - sync_drive_folder from the fake Drive: files/s, chunks/s and its own stage stats
+  ask     - /ask in-process under concurrent load: requests/s and latency percentiles
+
+The embedding model must be in the local Hugging Face cache. Results are JSON,
+tagged with the git commit; --baseline takes an earlier result file and adds the
+relative change of every throughput and latency figure.
+
+    python -m backend.benchmarks.suite --files 20 --pages 10 --output bench.json
+    python -m backend.benchmarks.suite --baseline bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from backend.benchmarks.ask_load import run_level
+from backend.benchmarks.corpus import TOPICS, make_corpus
+from backend.benchmarks.fake_drive import FakeDrive, serve
+from backend.benchmarks.hybrid_eval import generated_questions
+
+
+def rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds else 0.0
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure(tmp: str, drive_url: str):
+    """Point every store and client at the temporary directory and the fakes; before any app import."""
+    os.environ.update({
+        "DRIVE_API_ENDPOINT": drive_url,
+        "DRIVE_FOLDER_ID": "root",
+        "VECTOR_STORE": "local",
+        "LOCAL_VECTOR_STORE_PATH": os.path.join(tmp, "vectors"),
+        "KEYWORD_INDEX_PATH": os.path.join(tmp, "keyword_index.sqlite3"),
+        "INGEST_MANIFEST_PATH": os.path.join(tmp, "manifest.sqlite3"),
+        "EMBED_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite3"),
+        "LLM_BACKEND": "fake",
+        "STARTUP_WARMUP": "off",
+    })
+
+
+def corpus_drive(corpus: list[tuple[str, bytes]]) -> FakeDrive:
+    """Root → semester → one folder per subject, files named <subject_code>.pdf as in the real Drive."""
+    drive = FakeDrive()
+    drive.add_folder(drive.root_id, "sem1", "Semester 1")
+    for i, (name, data) in enumerate(corpus):
+        code = name.split("_")[0]
+        if code not in drive.children:
+            drive.add_folder("sem1", code, code)
+        drive.add_file(code, f"file{i}", f"{code}.pdf", data)
+    return drive
+
+
+def bench_extract(corpus: list[tuple[str, bytes]]) -> tuple[dict, list[str]]:
+    from backend.app.services.extractor import extract_text_from_pdf_bytes, page_count
+
+    pages = sum(page_count(data) for _, data in corpus)
+    start = time.perf_counter()
+    texts = [extract_text_from_pdf_bytes(data) for _, data in corpus]
+    seconds = time.perf_counter() - start
+    size = sum(len(data) for _, data in corpus)
+    return {
+        "files": len(corpus),
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": rate(pages, seconds),
+        "mb_per_sec": rate(size / 1e6, seconds),
+    }, texts
+
+
+def bench_chunk(texts: list[str]) -> tuple[dict, list[list[str]]]:
+    from backend.app.services.chunking.chunker import chunk_text
+
+    start = time.perf_counter()
+    chunks = [chunk_text(text) for text in texts]
+    seconds = time.perf_counter() - start
+    count = sum(len(c) for c in chunks)
+    size = sum(len(text.encode("utf-8")) for text in texts)
+    return {
+        "chunks": count,
+        "seconds": round(seconds, 3),
+        "mb_per_sec": rate(size / 1e6, seconds),
+        "chunks_per_sec": rate(count, seconds),
+    }, chunks
+
+
+def bench_embed(texts: list[str]) -> tuple[dict, list[list[float]]]:
+    from backend.app.services.embeddings.config import BATCH_SIZE
+    from backend.app.services.embeddings.dependencies import get_embedder
+
+    embedder = get_embedder()
+    embedder.embed_texts(texts[:1])  # first forward pass is slower than the rest
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), BATCH_SIZE):
+        vectors.extend(embedder.embed_texts(texts[i:i + BATCH_SIZE]))
+    seconds = time.perf_counter() - start
+    return {
+        "embeddings": len(vectors),
+        "batch_size": BATCH_SIZE,
+        "seconds": round(seconds, 3),
+        "embeddings_per_sec": rate(len(vectors), seconds),
+    }, vectors
+
+
+def bench_upsert(store, vectors: list[list[float]], payloads: list[dict], ids: list[str]) -> dict:
+    from backend.app.services.ingestion.config import UPSERT_BATCH_POINTS
+
+    start = time.perf_counter()
+    for i in range(0, len(vectors), UPSERT_BATCH_POINTS):
+        end = i + UPSERT_BATCH_POINTS
+        store.upsert(vectors[i:end], payloads[i:end], ids=ids[i:end])
+    seconds = time.perf_counter() - start
+    return {
+        "points": len(vectors),
+        "batch_points": UPSERT_BATCH_POINTS,
+        "seconds": round(seconds, 3),
+        "points_per_sec": rate(len(vectors), seconds),
+    }
+
+
+def bench_sync(file_count: int) -> dict:
+    from backend.app.services.drive_ingestor import sync_drive_folder
+
+    start = time.perf_counter()
+    summary = sync_drive_folder(batch_size=file_count)
+    seconds = time.perf_counter() - start
+    return {
+        "files": summary["files_stored"],
+        "chunks": summary["chunks_stored"],
+        "seconds": round(seconds, 3),
+        "files_per_sec": rate(summary["files_stored"], seconds),
+        "chunks_per_sec": rate(summary["chunks_stored"], seconds),
+        "stages": summary["stages"],
+        "writer": summary["writer"],
+    }
+
+
+async def bench_ask(levels: list[int], requests: int, top_k: int) -> list[dict]:
+    import httpx
+    from backend.app.main import app
+    from backend.app.services.startup import warm_up
+
+    # Load the model, store and keyword index first, so the first level doesn't pay for it
+    await asyncio.to_thread(warm_up.run_once)
+    payloads = [
+        {"question": q["question"], "subject_code": q["subject_code"], "top_k": top_k}
+        for q in generated_questions()
+    ]
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for level in levels:
+            results.append(await run_level(client, "/ask", payloads, level, requests))
+    return results
+
+
+def compare(current: dict, baseline: dict, path: str = "") -> dict:
+    """Relative change of every *_per_sec and *_ms figure found in both results."""
+    changes = {}
+    for key, value in current.items():
+        name = f"{path}.{key}" if path else str(key)
+        previous = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            changes.update(compare(value, previous or {}, name))
+        elif isinstance(value, list) and isinstance(previous, list):
+            for i, (item, old) in enumerate(zip(value, previous)):
+                if isinstance(item, dict):
+                    label = item.get("concurrency", i)
+                    changes.update(compare(item, old, f"{name}[{label}]"))
+        elif str(key).endswith(("_per_sec", "_ms")) and isinstance(previous, (int, float)) and previous:
+            changes[name] = {"baseline": previous, "current": value, "change": round(value / previous - 1, 4)}
+    return changes
+
+
+def main(args):
+    corpus = make_corpus(files=args.files, pages=args.pages)
+    drive = corpus_drive(corpus)
+    server, url = serve(drive)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    result = {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "files": args.files,
+        "pages_per_file": args.pages,
+        "stages": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(tmp, url)
+        from backend.app.services.embeddings.ids import chunk_point_id
+        from backend.app.services.embeddings.local_store import LocalVectorStore
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            stages = result["stages"]
+            stages["extract"], texts = bench_extract(corpus)
+            stages["chunk"], chunks = bench_chunk(texts)
+
+            ids, payloads, chunk_texts = [], [], []
+            for i, ((name, _), file_chunks) in enumerate(zip(corpus, chunks)):
+                for j, text in enumerate(file_chunks):
+                    ids.append(chunk_point_id(f"bench{i}", j))
+                    payloads.append({"text": text, "subject_code": name.split("_")[0], "file_id": f"bench{i}", "chunk_index": j})
+                    chunk_texts.append(text)
+            stages["embed"], vectors = bench_embed(chunk_texts)
+
+            store = LocalVectorStore(os.path.join(tmp, "upsert"), vector_size=len(vectors[0]))
+            stages["upsert"] = {"local": bench_upsert(store, vectors, payloads, ids)}
+            store.close()
+            if args.qdrant_url:
+                from qdrant_client import QdrantClient
+                from backend.app.services.embeddings.qdrant_store import QdrantStore
+
+                client = QdrantClient(":memory:") if args.qdrant_url == ":memory:" else QdrantClient(url=args.qdrant_url)
+                store = QdrantStore("bench_suite", len(vectors[0]), client=client)
+                stages["upsert"]["qdrant"] = bench_upsert(store, vectors, payloads, ids)
+                client.delete_collection("bench_suite")
+
+            result["sync"] = bench_sync(len(corpus))
+            result["ask"] = asyncio.run(bench_ask(levels, args.requests, args.top_k))
+    server.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        result["baseline_commit"] = baseline.get("commit")
+        result["comparison"] = compare(
+            {k: result[k] for k in ("stages", "sync", "ask")},
+            {k: baseline.get(k) for k in ("stages", "sync", "ask")},
+        )
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20, help=f"PDFs to generate, spread over {len(TOPICS)} subjects")
+    parser.add_argument("--pages", type=int, default=10, help="pages per PDF")
+    parser.add_argument("--qdrant-url", default=None, help="also time upserts into QdrantStore (':memory:' for the local client)")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=100, help="/ask requests per concurrency level")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--baseline", default=None, help="earlier result JSON to compare against")
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
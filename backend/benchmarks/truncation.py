@@ -0,0 +1,86 @@
+"""
+How many chunks the embedding model truncates, with word-sized vs token-sized chunking.
+
+all-MiniLM-L6-v2 reads at most EMBEDDING_MAX_TOKENS word pieces (including [CLS]
+and [SEP]) and silently drops the rest. The "legacy" path sizes chunks as 500
+whitespace words, the way chunking used to work. The "current" path is chunk_text
+with the ingestion settings, sized in model tokens.
+
+    python -m backend.benchmarks.truncation --input path/to/notes   # .txt / .pdf files
+    python -m backend.benchmarks.truncation --docs 100 --pages 20   # synthetic notes
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from backend.app.services.chunking.chunker import chunk_text
+from backend.app.services.embeddings.config import EMBEDDING_MAX_TOKENS
+from backend.app.services.embeddings.tokenizer import TokenCounter
+from backend.app.services.ingestion import config as ingest_config
+from backend.benchmarks.chunking import legacy_chunk, load_texts
+from backend.benchmarks.corpus import make_text_corpus
+
+SPECIAL_TOKENS = 2  # [CLS] and [SEP]
+
+
+def report(chunks: list[str], counter: TokenCounter, seconds: float) -> dict:
+    limit = EMBEDDING_MAX_TOKENS - SPECIAL_TOKENS
+    lengths = counter.count_many(chunks)
+    truncated = [n for n in lengths if n > limit]
+    total = sum(lengths)
+    dropped = sum(n - limit for n in truncated)
+    return {
+        "chunks": len(chunks),
+        "chunk_seconds": round(seconds, 3),
+        "max_tokens": max(lengths, default=0),
+        "mean_tokens": round(total / len(lengths), 1) if lengths else 0.0,
+        "truncated_chunks": len(truncated),
+        "truncated_pct": round(100 * len(truncated) / len(chunks), 2) if chunks else 0.0,
+        "tokens_total": total,
+        "tokens_dropped": dropped,
+        "tokens_dropped_pct": round(100 * dropped / total, 2) if total else 0.0,
+    }
+
+
+def run(fn, texts: list[str]) -> tuple[list[str], float]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = [chunk for text in texts for chunk in fn(text)]
+    return chunks, time.perf_counter() - start
+
+
+def main(args):
+    texts = load_texts(args.input) if args.input else make_text_corpus(args.docs, args.pages)
+    counter = TokenCounter()
+    if not counter.exact:
+        print("[WARN] Embedding tokenizer unavailable; token counts below are estimates")
+
+    legacy_chunks, legacy_seconds = run(lambda t: legacy_chunk(t, 500, 50), texts)
+    current_chunks, current_seconds = run(
+        lambda t: chunk_text(t, chunk_size=ingest_config.CHUNK_SIZE, chunk_overlap=ingest_config.CHUNK_OVERLAP),
+        texts,
+    )
+
+    result = {
+        "benchmark": "truncation",
+        "documents": len(texts),
+        "exact_tokenizer": counter.exact,
+        "model_max_tokens": EMBEDDING_MAX_TOKENS,
+        "legacy_words_500": report(legacy_chunks, counter, legacy_seconds),
+        f"current_tokens_{ingest_config.CHUNK_SIZE}": report(current_chunks, counter, current_seconds),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=None, help="directory of .txt/.pdf notes (default: synthetic corpus)")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())
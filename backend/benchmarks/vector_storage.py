@@ -0,0 +1,204 @@
+"""
+Recall, latency and memory of the Qdrant collection layouts.
+
+Loads the same points into two throwaway collections on a live Qdrant:
+
+  baseline - fp32 vectors and payloads in RAM (the layout before quantization)
+  compact  - int8 scalar quantized vectors in RAM, originals and payloads on disk
+
+then runs subject-filtered searches, as /ask does, for every hnsw_ef and
+oversampling value, and compares them with exact (brute force) results:
+
+  recall_at_k  - share of the true top k returned
+  p50_ms/p95_ms - search latency seen by the client
+  ram_mb       - estimated resident size: in-RAM vectors, HNSW links and payloads
+
+    python -m backend.benchmarks.vector_storage --points 50000 --hnsw-ef 32,64,128 --oversampling 1,2,4
+    python -m backend.benchmarks.vector_storage --embed --docs 200   # real note chunks and embeddings
+
+Needs QDRANT_URL (or --url; ":memory:" runs exact search in-process, as a dry
+run). Collections are deleted afterwards unless --keep.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+from backend.benchmarks.ask_load import percentile
+
+LAYOUTS = {
+    "baseline": {"quantization": "none", "on_disk": False},
+    "compact": {"quantization": "int8", "on_disk": True},
+}
+
+
+def synthetic_points(count: int, dim: int, subjects: int, seed: int) -> tuple[np.ndarray, list[dict]]:
+    """Clustered unit vectors (topics within subjects) with chunk-sized payloads."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((subjects * 20, dim)).astype(np.float32)
+    topic = rng.integers(0, len(topics), count)
+    vectors = topics[topic] + 0.8 * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    text = "lorem ipsum " * 80  # ~1 KB, about one chunk of notes
+    payloads = [
+        {"chunk_index": i % 40, "text": text, "subject_code": f"S{t % subjects:02d}", "file_id": f"f{i // 40}"}
+        for i, t in enumerate(topic)
+    ]
+    return vectors, payloads
+
+
+def embedded_points(docs: int, pages: int) -> tuple[np.ndarray, list[dict]]:
+    """Chunks of the synthetic notes corpus, embedded with the configured model."""
+    from backend.app.services.chunking.chunker import chunk_text
+    from backend.app.services.embeddings.embedder import Embedder
+    from backend.benchmarks.corpus import TOPICS, make_text_corpus
+
+    payloads = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, text in enumerate(make_text_corpus(docs, pages)):
+            for j, chunk in enumerate(chunk_text(text)):
+                payloads.append({"chunk_index": j, "text": chunk, "subject_code": TOPICS[i % len(TOPICS)][0], "file_id": f"f{i}"})
+    vectors = np.asarray(Embedder().embed_texts([p["text"] for p in payloads]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, payloads
+
+
+def exact_top_k(vectors: np.ndarray, subjects: np.ndarray, queries: np.ndarray, query_subjects: list, k: int) -> list[set]:
+    truth = []
+    for q, subject in zip(queries, query_subjects):
+        rows = np.flatnonzero(subjects == subject)
+        scores = vectors[rows] @ q
+        truth.append(set(rows[np.argsort(-scores)[:k]].tolist()))
+    return truth
+
+
+def estimated_ram_mb(layout: dict, vectors: np.ndarray, payloads: list[dict], hnsw_m: int) -> dict:
+    count, dim = vectors.shape
+    ram = {
+        # Layer 0 keeps up to 2*m neighbour ids per point
+        "hnsw": count * hnsw_m * 2 * 4,
+        "vectors": 0 if layout["on_disk"] else count * dim * 4,
+        "quantized": count * (dim + 4) if layout["quantization"] == "int8" else 0,
+        "payloads": 0 if layout["on_disk"] else sum(len(json.dumps(p)) for p in payloads),
+    }
+    ram = {name: round(size / 2**20, 1) for name, size in ram.items()}
+    ram["total"] = round(sum(ram.values()), 1)
+    return ram
+
+
+def wait_indexed(client, name: str, count: int, timeout: float):
+    """Block until the optimizer has built the HNSW index (and quantized vectors)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green") and (info.indexed_vectors_count or 0) >= count * 0.99:
+            return True
+        time.sleep(1)
+    return False
+
+
+def search(store, queries: np.ndarray, query_subjects: list, k: int, point_ids: dict, **params) -> tuple[list[set], list[float]]:
+    found, latencies = [], []
+    for q, subject in zip(queries, query_subjects):
+        start = time.perf_counter()
+        results = store.query(q.tolist(), subject_code=subject, top_k=k, **params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append({point_ids[r["id"]] for r in results})
+    return found, latencies
+
+
+def main(args):
+    from qdrant_client import QdrantClient
+
+    from backend.app.services.embeddings.qdrant_store import QdrantStore
+
+    if args.embed:
+        vectors, payloads = embedded_points(args.docs, args.pages)
+    else:
+        vectors, payloads = synthetic_points(args.points, args.dim, args.subjects, args.seed)
+    subjects = np.array([p["subject_code"] for p in payloads])
+
+    rng = np.random.default_rng(args.seed + 1)
+    sample = rng.choice(len(vectors), args.queries, replace=len(vectors) < args.queries)
+    queries = vectors[sample] + 0.3 * rng.standard_normal((len(sample), vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    query_subjects = subjects[sample].tolist()
+    truth = exact_top_k(vectors, subjects, queries, query_subjects, args.k)
+
+    client = QdrantClient(location=args.url, api_key=os.getenv("QDRANT_API_KEY"), timeout=120)
+    ids = [f"00000000-0000-4000-8000-{i:012x}" for i in range(len(vectors))]
+    point_ids = {point_id: i for i, point_id in enumerate(ids)}
+    hnsw_efs = [int(v) for v in args.hnsw_ef.split(",")]
+    oversamplings = [float(v) for v in args.oversampling.split(",")]
+
+    result = {"benchmark": "vector_storage", "points": len(vectors), "dim": vectors.shape[1], "k": args.k,
+              "queries": len(queries), "hnsw_m": args.hnsw_m, "hnsw_ef_construct": args.ef_construct, "layouts": {}}
+    for name, layout in LAYOUTS.items():
+        collection = f"{args.prefix}_{name}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        with contextlib.redirect_stdout(io.StringIO()):
+            store = QdrantStore(collection, vectors.shape[1], hnsw_m=args.hnsw_m, hnsw_ef_construct=args.ef_construct,
+                                client=client, **layout)
+            start = time.perf_counter()
+            for b in range(0, len(vectors), 512):
+                store.upsert(vectors[b:b + 512].tolist(), payloads[b:b + 512], ids=ids[b:b + 512])
+        load_seconds = time.perf_counter() - start
+        indexed = wait_indexed(client, collection, len(vectors), args.index_timeout)
+
+        runs = []
+        for hnsw_ef in hnsw_efs:
+            # Oversampling only changes anything when there are quantized vectors to rescore
+            for oversampling in (oversamplings if layout["quantization"] != "none" else [1.0]):
+                search(store, queries[:10], query_subjects[:10], args.k, point_ids, hnsw_ef=hnsw_ef, oversampling=oversampling)
+                found, latencies = search(store, queries, query_subjects, args.k, point_ids,
+                                          hnsw_ef=hnsw_ef, oversampling=oversampling)
+                runs.append({
+                    "hnsw_ef": hnsw_ef,
+                    "oversampling": oversampling,
+                    "recall_at_k": round(float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])), 4),
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                })
+
+        result["layouts"][name] = {
+            **layout,
+            "load_seconds": round(load_seconds, 2),
+            "indexed": indexed,
+            "ram_mb": estimated_ram_mb(layout, vectors, payloads, args.hnsw_m),
+            "searches": runs,
+        }
+        if not args.keep:
+            client.delete_collection(collection)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL"))
+    parser.add_argument("--prefix", default="bench_vector_storage")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--embed", action="store_true", help="embed synthetic note chunks instead of random clustered vectors")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--ef-construct", type=int, default=100)
+    parser.add_argument("--hnsw-ef", default="32,64,128")
+    parser.add_argument("--oversampling", default="1,2,4")
+    parser.add_argument("--index-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the collections for inspection")
+    parser.add_argument("--output", default=None)
+    main(parser.parse_args())